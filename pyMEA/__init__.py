@@ -9,7 +9,13 @@ import importlib
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from pyMEA.application.read_MEA import read_MEA, read_MEA_npz
+    from pyMEA.application.cache import disable_result_cache, enable_result_cache
+    from pyMEA.application.convert import convert_directory
+    from pyMEA.application.out_of_core import filter_to_npy
+    from pyMEA.application.read_MEA import iter_MEA, open_MEA, read_MEA, read_MEA_npz
+    from pyMEA.application.recording import Recording
+    from pyMEA.domain.model.CausalFilter import CausalFilter
+    from pyMEA.domain.model.FilterPipeline import FilterPipeline
     from pyMEA.domain.model.FilterType import FilterType
     from pyMEA.domain.model.MEA import MEA
     from pyMEA.application.MutableMEA import MutableMEA
@@ -26,6 +32,15 @@ if TYPE_CHECKING:
 _EXPORTS = {
     "read_MEA": "pyMEA.application.read_MEA",
     "read_MEA_npz": "pyMEA.application.read_MEA",
+    "open_MEA": "pyMEA.application.read_MEA",
+    "iter_MEA": "pyMEA.application.read_MEA",
+    "Recording": "pyMEA.application.recording",
+    "convert_directory": "pyMEA.application.convert",
+    "filter_to_npy": "pyMEA.application.out_of_core",
+    "enable_result_cache": "pyMEA.application.cache",
+    "disable_result_cache": "pyMEA.application.cache",
+    "CausalFilter": "pyMEA.domain.model.CausalFilter",
+    "FilterPipeline": "pyMEA.domain.model.FilterPipeline",
     "FilterType": "pyMEA.domain.model.FilterType",
     "MEA": "pyMEA.domain.model.MEA",
     "MutableMEA": "pyMEA.application.MutableMEA",
@@ -40,6 +55,15 @@ _EXPORTS = {
 __all__ = [
     "read_MEA",
     "read_MEA_npz",
+    "open_MEA",
+    "iter_MEA",
+    "Recording",
+    "convert_directory",
+    "filter_to_npy",
+    "enable_result_cache",
+    "disable_result_cache",
+    "CausalFilter",
+    "FilterPipeline",
     "FilterType",
     "MEA",
     "MutableMEA",
@@ -43,7 +43,15 @@ class PyMEA:
     def __floordiv__(self, value):
         return self.data.array // value
 
-    def save_npz(self, path: str, dtype: str = "int16") -> None:
+    def save_npz(
+        self,
+        path: str,
+        dtype: str = "int16",
+        chunked: bool = False,
+        compresslevel: int = 6,
+        workers: int | None = None,
+        codec: str = "none",
+    ) -> None:
         """計測データを .npz(圧縮)で保存する。
 
         Parameters
@@ -53,10 +61,30 @@ class PyMEA:
         dtype : str
             "int16"(既定, 16bit量子化, 約1/4。誤差は測定分解能以下) /
             "float32"(ビット完全一致, 約1/2)
+        chunked : bool
+            True なら電極・時間ごとのチャンク形式で保存し、
+            read_MEA_npz(path, start=, end=, chs=) で一部だけを読み込めるようにする。
+            チャンクは並列に圧縮されるため、長時間記録の保存も速い
+        compresslevel : int
+            チャンクの zlib 圧縮レベル (0〜9, chunked=True のときのみ)
+        workers : int | None
+            チャンクを圧縮するスレッド数 (None なら CPU 数, chunked=True のときのみ)
+        codec : str
+            圧縮前の可逆な変換。"none" / "delta" / "shuffle" / "delta_shuffle"。
+            int16 では "delta_shuffle" が最も小さくなる
         """
         from pyMEA.infrastructure.npz_io import save_mea_npz
 
-        save_mea_npz(self.data, path, dtype, self.electrode.ele_dis)
+        save_mea_npz(
+            self.data,
+            path,
+            dtype,
+            self.electrode.ele_dis,
+            chunked=chunked,
+            compresslevel=compresslevel,
+            workers=workers,
+            codec=codec,
+        )
 
     def _rebuild(self, new_data: MEA) -> "PyMEA":
         """変換後のMEAデータから各責務クラスを再構築したPyMEAを返す"""
@@ -0,0 +1,36 @@
+from pyMEA.domain.result_cache import set_result_cache
+from pyMEA.infrastructure.result_cache import DEFAULT_MAX_BYTES, DiskResultCache
+
+
+def enable_result_cache(
+    directory: str, max_bytes: int = DEFAULT_MAX_BYTES
+) -> DiskResultCache:
+    """派生結果 (フィルタ後の電位・ピーク・勾配) のディスクキャッシュを有効にする。
+
+    Parameters
+    ----------
+    directory : str
+        保存先ディレクトリ。複数のプロセス・夜間バッチで共有してよい
+    max_bytes : int
+        キャッシュの合計サイズの上限 (超えたら最後に使ってから長い結果から消す)
+
+    Returns
+    -------
+    DiskResultCache
+        登録したキャッシュ (clear() で中身を消せる)
+
+    Notes
+    -----
+    キーは元ファイルの指紋 (パス・サイズ・更新時刻)・読込区間・処理とパラメータの列
+    なので、変更のない記録に同じ処理をかけると再計算せずに memmap で読み込む。
+    元ファイルを書き換えると指紋が変わり、古い結果は使われなくなる。
+    read_MEA / read_MEA_npz / iter_MEA / open_MEA で読み込んだ MEA が対象。
+    """
+    cache = DiskResultCache(directory, max_bytes)
+    set_result_cache(cache)
+    return cache
+
+
+def disable_result_cache() -> None:
+    """enable_result_cache で有効にしたキャッシュを無効にする (保存済みの結果は消さない)"""
+    set_result_cache(None)
@@ -0,0 +1,166 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from pyMEA.constants import DEFAULT_ELECTRODE_DISTANCE
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.infrastructure.npz_codec import CODEC_NONE
+from pyMEA.infrastructure.npz_io import save_recording_npz
+from pyMEA.infrastructure.read_bio import find_bio_segments
+
+STATUS_CONVERTED = "converted"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class ConversionReport:
+    """1記録の変換結果"""
+
+    hed_path: str
+    npz_path: str
+    # "converted" / "skipped"(変換済みで最新) / "failed"
+    status: str
+    # 変換にかかった時間 (s)
+    seconds: float = 0.0
+    # 読み込んだ .bio の合計サイズ (MB)
+    megabytes: float = 0.0
+    error: str | None = None
+
+    @property
+    def mb_per_s(self) -> float:
+        """変換のスループット (MB/s, 読み込んだ .bio の量基準)"""
+        return self.megabytes / self.seconds if self.seconds > 0 else 0.0
+
+
+def convert_directory(
+    src: str,
+    dst: str,
+    dtype: str = "int16",
+    workers: int | None = None,
+    electrode_distance: int = DEFAULT_ELECTRODE_DISTANCE,
+    window_s: float = 10,
+    codec: str = CODEC_NONE,
+    overwrite: bool = False,
+    verbose: bool = True,
+) -> list[ConversionReport]:
+    """src 以下の .hed/.bio をすべてチャンク形式の .npz に変換する。
+
+    Parameters
+    ----------
+    src : str
+        .hed を探すディレクトリ (サブディレクトリも探す)
+    dst : str
+        .npz の出力先ディレクトリ。src からの相対パスを保って <名前>.npz を書き出す
+    dtype : str
+        "int16"(既定, .bio の生値をそのまま保存) / "float32"
+    workers : int | None
+        並列に変換するプロセス数 (None なら CPU 数)
+    electrode_distance : int
+        .npz に保存する電極間距離 (μm)
+    window_s : float
+        1回に読み込む長さ (s)。1プロセスあたりのメモリはこの長さ分で頭打ちになる
+    codec : str
+        圧縮前の可逆な変換 ("none" / "delta" / "shuffle" / "delta_shuffle")
+    overwrite : bool
+        True なら変換済みの .npz も作り直す
+    verbose : bool
+        True なら1記録ごとに結果とスループット (MB/s) を表示する
+
+    Returns
+    -------
+    list[ConversionReport]
+        .hed のパス順の変換結果
+
+    Notes
+    -----
+    .npz が .hed/.bio より新しければ変換済みとしてスキップする。変換中の .npz は
+    一時ファイルに書き、完了してから置き換えるため、途中で止まっても壊れた .npz を
+    変換済みと誤認しない。変換できない記録があっても残りの変換は続ける。
+    """
+    src = os.path.abspath(src)
+    jobs = []
+    for dirpath, _, names in os.walk(src):
+        for name in names:
+            if name.endswith(".hed"):
+                hed_path = os.path.join(dirpath, name)
+                relative = os.path.relpath(hed_path, src)[: -len(".hed")] + ".npz"
+                jobs.append((hed_path, os.path.join(dst, relative)))
+    jobs.sort()
+
+    options = (dtype, electrode_distance, window_s, codec, overwrite)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = [pool.submit(_convert_one, *job, *options) for job in jobs]
+            reports = []
+            for future in futures:
+                reports.append(future.result())
+                if verbose:
+                    _print_report(reports[-1])
+    else:
+        reports = []
+        for job in jobs:
+            reports.append(_convert_one(*job, *options))
+            if verbose:
+                _print_report(reports[-1])
+    return reports
+
+
+def _convert_one(
+    hed_path: str,
+    npz_path: str,
+    dtype: str,
+    electrode_distance: int,
+    window_s: float,
+    codec: str,
+    overwrite: bool,
+) -> ConversionReport:
+    """1記録を変換する (プロセスプールから呼ばれるためモジュール関数にしている)"""
+    partial = npz_path[: -len(".npz")] + ".partial.npz"
+    try:
+        bio_paths = [
+            p.path for p in find_bio_segments(HedPath(hed_path)) if os.path.exists(p.path)
+        ]
+        inputs = [hed_path, *bio_paths]
+        megabytes = sum(os.path.getsize(p) for p in bio_paths) / 1e6
+        if (
+            not overwrite
+            and os.path.exists(npz_path)
+            and os.path.getmtime(npz_path) >= max(os.path.getmtime(p) for p in inputs)
+        ):
+            return ConversionReport(hed_path, npz_path, STATUS_SKIPPED)
+
+        os.makedirs(os.path.dirname(npz_path) or ".", exist_ok=True)
+        began = time.perf_counter()
+        # 変換自体をプロセスで並列化しているので、チャンクの圧縮は1スレッドで行う
+        save_recording_npz(
+            hed_path,
+            partial,
+            dtype,
+            electrode_distance,
+            window_s=window_s,
+            workers=1,
+            codec=codec,
+        )
+        os.replace(partial, npz_path)
+        seconds = time.perf_counter() - began
+        return ConversionReport(hed_path, npz_path, STATUS_CONVERTED, seconds, megabytes)
+    except Exception as e:
+        if os.path.exists(partial):
+            os.remove(partial)
+        return ConversionReport(hed_path, npz_path, STATUS_FAILED, error=repr(e))
+
+
+def _print_report(report: ConversionReport) -> None:
+    name = os.path.basename(report.hed_path)
+    if report.status == STATUS_CONVERTED:
+        print(
+            f"{name}: {report.megabytes:.1f} MB / {report.seconds:.2f} s "
+            f"({report.mb_per_s:.1f} MB/s)"
+        )
+    elif report.status == STATUS_SKIPPED:
+        print(f"{name}: 変換済みのためスキップ")
+    else:
+        print(f"{name}: 変換に失敗しました {report.error}")
@@ -0,0 +1,88 @@
+from dataclasses import replace
+
+import numpy as np
+from numpy import float32
+
+from pyMEA.application.PyMEA import PyMEA
+from pyMEA.application.read_MEA import _build_pymea, _to_mea
+from pyMEA.constants import DEFAULT_ELECTRODE_DISTANCE
+from pyMEA.domain.model.FilterPipeline import PRESET_PIPELINES, FilterPipeline
+from pyMEA.domain.model.FilterType import FilterType
+from pyMEA.infrastructure.reader import HedBioMemmapReader
+
+# 同時に処理するチャンク数の既定値。チャンクはのりしろを含めると数十万フレームになり、
+# 1つで数十〜数百 MB の作業領域を使うため、CPU 数ではなく少数に抑える
+DEFAULT_OUT_OF_CORE_WORKERS = 2
+
+
+def filter_to_npy(
+    hed_path: str,
+    npy_path: str,
+    pipeline: FilterPipeline | FilterType = FilterType.CARDIO_DENOISE,
+    electrode_distance: int = DEFAULT_ELECTRODE_DISTANCE,
+    workers: int = DEFAULT_OUT_OF_CORE_WORKERS,
+    chunk_s: float | None = None,
+    max_bytes: int | None = None,
+) -> PyMEA:
+    """メモリに載らない長さの記録にゼロ位相フィルタをかけ、結果を .npy に書き出す。
+
+    Parameters
+    ----------
+    hed_path : str
+        .hedファイルのパス
+    npy_path : str
+        結果の書き出し先 (.npy)。(64, N) の float32 で、i 行目が電極 i+1 の電位
+    pipeline : FilterPipeline | FilterType
+        適用するフィルタの列、または read_MEA のデノイズ系プリセット
+        (デフォルト CARDIO_DENOISE = highpass(1Hz) + 共通中央値リファレンス)
+    electrode_distance : int
+        電極間距離 (μm)
+    workers : int
+        同時に処理するチャンク数の上限 (デフォルト 2)。メモリに載るのはこの数のチャンク分
+    chunk_s : float | None
+        1チャンクの長さ (s)。None なら pipeline の chunk_s を使う。指定した長さは
+        そのまま使い、のりしろの4倍より短いと RuntimeWarning を出す
+        (のりしろを毎回読み直すため、短いほど遅くなる)
+    max_bytes : int | None
+        同時に処理するチャンクの作業領域の合計の上限 (None なら 512 MiB)。
+        workers はこれに収まるように減らし、1チャンクも収まらなければ
+        .npy を作らずに ValueError を送出する
+
+    Returns
+    -------
+    PyMEA
+        書き出した .npy を memmap で参照する記録全体の PyMEA
+
+    Notes
+    -----
+    入力は .bio を memmap で開き、のりしろつきの時間チャンクごとに復号・フィルタして
+    出力の memmap に書き込む。メモリに載るのは処理中のチャンクの作業領域だけで、
+    1チャンクあたり L = チャンク長 + 2 × のりしろ (フレーム) として
+
+        L × (4 × 電極数 + 32 × ブロック電極数) バイト (+ 中央値の段があれば約 8 MiB)
+
+    になる (float32 のチャンク + 電極ブロックの float64 の作業配列 4 つ)。ブロック電極数は
+    max_bytes に収まるように 1 まで小さくする。正確な値は
+    ``pipeline.plan(N, chs, sampling_rate, workers, max_bytes).chunk_bytes`` で確かめられる。
+    CARDIO_DENOISE (1Hz ハイパス) ののりしろは約 6.6 s なので、64 電極では1チャンクで
+    約 140 MB (10 kHz)・約 240 MB (20 kHz) になる。
+    のりしろはフィルタのインパルス応答が float32 の丸め誤差まで減衰する長さなので、結果は
+    記録全体に sosfiltfilt をかけた場合と float32 の丸め誤差の範囲 (振幅の 1e-6 程度) で
+    一致する。
+    書き出した結果は ``np.load(npy_path, mmap_mode="r")`` で読み直せる。
+    """
+    if isinstance(pipeline, FilterType):
+        if pipeline not in PRESET_PIPELINES:
+            raise ValueError(f"{pipeline.name} はフィルタの列ではありません")
+        pipeline = PRESET_PIPELINES[pipeline]
+    if chunk_s is not None:
+        pipeline = replace(pipeline, chunk_s=chunk_s)
+    data = _to_mea(HedBioMemmapReader(hed_path).read())
+    shape = (len(data.channels), data.array.shape[1])
+    # 作業領域が max_bytes に収まらなければ、出力を作る前にエラーにする
+    pipeline.plan(shape[1], data.channels, data.SAMPLING_RATE, workers, max_bytes)
+    out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=float32, shape=shape)
+    filtered = data.apply_pipeline(
+        pipeline, out=out, workers=workers, max_bytes=max_bytes
+    )
+    return _build_pymea(filtered, electrode_distance)
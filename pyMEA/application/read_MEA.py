@@ -1,14 +1,22 @@
+from collections.abc import Iterable, Iterator
+
 from pyMEA.domain.service.calculator import Calculator
 from pyMEA.constants import DEFAULT_ELECTRODE_DISTANCE, DEFAULT_PEAK_DISTANCE
 from pyMEA.domain.model.Electrode import Electrode
 from pyMEA.presentation.FigMEA import FigMEA
+from pyMEA.domain.model.FilterPipeline import PRESET_PIPELINES
 from pyMEA.domain.model.FilterType import FilterType
 from pyMEA.application.PyMEA import PyMEA
 from pyMEA.domain.service.CardioAveWave import cardio_ave_wave_factory
 from pyMEA.domain.service.FilterMEA import filter_by_moving_average
 from pyMEA.domain.model.HedPath import HedPath
 from pyMEA.domain.model.MEA import MEA
-from pyMEA.infrastructure.reader import MEAReadResult, create_reader
+from pyMEA.infrastructure.prefetch import PrefetchReader
+from pyMEA.infrastructure.reader import (
+    HedBioMemmapReader,
+    MEAReadResult,
+    create_reader,
+)
 
 
 def _build_pymea(data: MEA, electrode_distance: int) -> PyMEA:
@@ -19,8 +27,37 @@ def _build_pymea(data: MEA, electrode_distance: int) -> PyMEA:
     return PyMEA(data, electrode, fig, calculator)
 
 
+# 記録全体がメモリ上にあり1チャンクに収まる場合に、プリセットと同じ段を順にかけるチェーン
+_PRESET_CHAINS = {
+    # 心筋(強〜中信号): ドリフト除去 + 共通モードノイズ除去
+    FilterType.CARDIO_DENOISE: lambda data: data.highpass(1).common_median_reference(),
+    # 微弱心筋: 帯域通過(広帯域ノイズ除去) + 共通モードノイズ除去
+    FilterType.CARDIO_DENOISE_WEAK: (
+        lambda data: data.bandpass(1, 1000).common_median_reference()
+    ),
+    # 神経: スパイク帯のみ通過
+    FilterType.NEURO_DENOISE: lambda data: data.bandpass(100, 3000),
+}
+
+
+def _apply_preset(data: MEA, filter_type: FilterType) -> MEA:
+    """
+    デノイズのプリセットをかける。メモリ上にない電位はチャンクごとに読みながら
+    1つの出力へフィルタし、途中の段の電位 (記録全体の長さ) を確保しない
+    """
+    pipeline = PRESET_PIPELINES[filter_type]
+    n_frames = data.array.n_frames
+    if data.array.held_nbytes > 0:
+        plan = pipeline.plan(n_frames, data.channels, data.SAMPLING_RATE)
+        if n_frames <= plan.chunk_frames:
+            # 1チャンクに収まるなら分割しても同じなので、各段の結果をキャッシュで
+            # 使い回せるチェーンで記録全体へ順にかける
+            return _PRESET_CHAINS[filter_type](data)
+    return data.apply_pipeline(pipeline)
+
+
 def _to_mea(result: MEAReadResult) -> MEA:
-    return MEA(
+    data = MEA(
         result.hed_path,
         result.start,
         result.end,
@@ -28,6 +65,12 @@ def _to_mea(result: MEAReadResult) -> MEA:
         result.gain,
         result.array,
     )
+    if result.source is None:
+        return data
+    # 元ファイルの指紋と読込区間を由来にする (派生結果のキャッシュキーになる)
+    return data.with_lineage(
+        [("source", result.source, result.start, result.end, tuple(data.channels))]
+    )
 
 
 def read_MEA(
@@ -41,6 +84,8 @@ def read_MEA(
     distance=DEFAULT_PEAK_DISTANCE,
     power_noise_freq=50,
     steps=10,
+    chs: list[int] | None = None,
+    quantized: bool = False,
 ) -> PyMEA:
     """
 
@@ -57,6 +102,10 @@ def read_MEA(
         #### 以降はFilterMEAを使用する用
         power_noise_freq:
         steps:
+        chs: 読み込む電極番号 (None なら64電極すべて)。指定した電極の列だけを
+            .bio から読み、指定外の電極は0として扱う
+        quantized: True なら電位を .bio の生値 (int16) + scale のまま保持する。
+            メモリは float32 の半分になり、値は電極ごとにアクセス時に float32 へ戻す
 
     Returns:
         PyMEA
@@ -65,7 +114,14 @@ def read_MEA(
     """
     # .hed以外(.bio等)は専用メッセージで弾く(拡張子バリデーション)
     HedPath(hed_path)
-    result = create_reader(hed_path, start=start, end=end).read()
+    if filter_type in PRESET_PIPELINES and chs is None and not quantized:
+        # デノイズのプリセットは電位を読み込まずに memmap から区間ごとに読みながらかける
+        reader = HedBioMemmapReader(hed_path, start, end)
+    else:
+        reader = create_reader(
+            hed_path, start=start, end=end, chs=chs, quantized=quantized
+        )
+    result = reader.read()
     data = _to_mea(result)
 
     if filter_type == FilterType.CARDIO_AVE_WAVE:
@@ -80,28 +136,114 @@ def read_MEA(
             result.gain,
             filtered_array,
         )
-    elif filter_type == FilterType.CARDIO_DENOISE:
-        # 心筋(強〜中信号): ドリフト除去 + 共通モードノイズ除去
-        data = data.highpass(1).common_median_reference()
-    elif filter_type == FilterType.CARDIO_DENOISE_WEAK:
-        # 微弱心筋: 帯域通過(広帯域ノイズ除去) + 共通モードノイズ除去
-        data = data.bandpass(1, 1000).common_median_reference()
-    elif filter_type == FilterType.NEURO_DENOISE:
-        # 神経: スパイク帯のみ通過
-        data = data.bandpass(100, 3000)
+    elif filter_type in PRESET_PIPELINES:
+        data = _apply_preset(data, filter_type)
     else:
         pass
 
     return _build_pymea(data, electrode_distance)
 
 
-def read_MEA_npz(path: str) -> PyMEA:
+def iter_MEA(
+    hed_paths: Iterable[str],
+    start: int,
+    end: int,
+    electrode_distance: int = DEFAULT_ELECTRODE_DISTANCE,
+    chs: list[int] | None = None,
+    depth: int = 2,
+    max_bytes: int | None = None,
+    quantized: bool = False,
+) -> Iterator[PyMEA]:
+    """複数の記録を順に読み込み、次の記録を先読みしながら PyMEA を返すジェネレータ。
+
+    Parameters
+    ----------
+    hed_paths : Iterable[str]
+        .hedファイル (または .npz) のパスの列
+    start : int
+        読み込み開始地点 (s)
+    end : int
+        読み込み終了地点 (s)
+    electrode_distance : int
+        電極間距離 (μm)
+    chs : list[int] | None
+        読み込む電極番号 (None なら64電極すべて)
+    depth : int
+        先読みして保持しておく記録の最大数
+    max_bytes : int | None
+        先読み済みの電位データの合計バイト数の上限 (None なら無制限)
+    quantized : bool
+        True なら電位を int16 + scale で保持する (メモリは float32 の半分)
+
+    Yields
+    -------
+    PyMEA
+
+    Notes
+    -----
+    記録 i を解析している間にバックグラウンドスレッドで記録 i+1 以降を読み込むため、
+    ネットワークストレージ上の記録でもフィルタやピーク検出が読込待ちで止まらない。
+    読込の失敗はその記録の順番で例外として送出する。
+    """
+    readers = (
+        create_reader(path, start=start, end=end, chs=chs, quantized=quantized)
+        for path in hed_paths
+    )
+    with PrefetchReader(readers, depth=depth, max_bytes=max_bytes) as results:
+        for result in results:
+            yield _build_pymea(_to_mea(result), electrode_distance)
+
+
+def open_MEA(
+    hed_path: str, electrode_distance: int = DEFAULT_ELECTRODE_DISTANCE
+) -> PyMEA:
+    """.hed/.bio を memmap で開き、記録全体を遅延読み込みした PyMEA を返す。
+
+    Parameters
+    ----------
+    hed_path : str
+        .hedファイルのパス
+    electrode_distance : int
+        電極間距離 (μm)
+
+    Returns
+    -------
+    PyMEA
+
+    Notes
+    -----
+    電位データは読み込まずに開くため、記録長に関わらず O(1) で開ける。
+    ``data[ch]`` や ``from_slice``・各フィルタは触れた電極・区間だけを復号するので、
+    メモリに載らない長時間記録も ``from_slice`` で切り出しながら解析できる。
+    """
+    result = HedBioMemmapReader(hed_path).read()
+    return _build_pymea(_to_mea(result), electrode_distance)
+
+
+def read_MEA_npz(
+    path: str,
+    start: float | None = None,
+    end: float | None = None,
+    chs: list[int] | None = None,
+    quantized: bool = False,
+) -> PyMEA:
     """save_npz で保存した .npz を読み込み PyMEA を返す。
 
     Parameters
     ----------
     path : str
         .npz ファイルのパス
+    start : float | None
+        読み込み開始時間 (s)。None なら保存されている区間の先頭から
+    end : float | None
+        読み込み終了時間 (s)。None なら保存されている区間の末尾まで
+    chs : list[int] | None
+        読み込む電極番号。None なら64電極すべて。指定した電極だけを保持し、
+        指定外の電極は0として扱う
+    quantized : bool
+        True なら電位を int16 + scale のまま保持する (メモリは float32 の半分)。
+        int16 で保存したファイルは展開せずにそのまま保持し、float32 のファイルは
+        読み込み後に量子化する
 
     Returns
     -------
@@ -112,11 +254,18 @@ def read_MEA_npz(path: str) -> PyMEA:
     サンプリングレート・GAIN・start・end・電極間距離はすべてファイルのメタ情報から
     復元する(読み込み時に値を渡さないため、意図しない値の混入が起きない)。
     時刻行は再生成する。.hed/.bio 読込(read_MEA)とは入口を分けている。
+    チャンク形式 (save_npz(chunked=True)) で保存したファイルは、区間・電極にかかる
+    チャンクだけを展開するため、長い記録の一部だけを素早く読み込める。
     """
-    result = create_reader(path).read()
+    result = create_reader(
+        path, start=start, end=end, chs=chs, quantized=quantized
+    ).read()
+    data = _to_mea(result)
+    if quantized:
+        data = data.quantize()
     distance = (
         result.electrode_distance
         if result.electrode_distance is not None
         else DEFAULT_ELECTRODE_DISTANCE
     )
-    return _build_pymea(_to_mea(result), distance)
+    return _build_pymea(data, distance)
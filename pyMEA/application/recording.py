@@ -0,0 +1,215 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from numpy import float32
+from numpy._typing import NDArray
+
+from pyMEA.application.PyMEA import PyMEA
+from pyMEA.application.read_MEA import _build_pymea, _to_mea
+from pyMEA.constants import DEFAULT_ELECTRODE_DISTANCE, NUM_ELECTRODES
+from pyMEA.domain.model.ChannelSubsetArray import ChannelSubsetArray
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.VoltageBlock import VoltageBlock
+from pyMEA.domain.validators import time_validator
+from pyMEA.infrastructure import read_bio
+from pyMEA.infrastructure.reader import MEAReadResult, hed_fingerprint
+
+DEFAULT_BLOCK_SECONDS = 1.0
+DEFAULT_CACHE_BYTES = 512 * 1024**2
+
+
+@dataclass(frozen=True)
+class RecordingCacheStats:
+    """Recording のブロックキャッシュの利用状況"""
+
+    hits: int
+    misses: int
+    evictions: int
+    # キャッシュしている復号済みブロックの数と合計バイト数
+    blocks: int
+    nbytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class Recording:
+    """
+    1つの記録を開いたままにして、任意の区間を何度でも読み出すハンドル
+    ----------
+    Args:
+        hed_path: .hedファイルのパス
+        electrode_distance: 電極間距離 (μm)
+        block_s: 復号・キャッシュの単位 (s)
+        max_bytes: 復号済みブロックのキャッシュに使うメモリの上限
+
+    .hed の解読と .bio のオープン (memmap) は最初の1回だけ行う。read(start, end)
+    は区間にかかるブロックを復号済みのキャッシュ (LRU) から取り出し、なければ
+    そのブロックだけを .bio から復号する。重なった区間を行き来する対話的な解析でも
+    同じ部分を読み直さない。1ブロックに収まる区間はコピーせずにビューで返す。
+    """
+
+    def __init__(
+        self,
+        hed_path: str,
+        electrode_distance: int = DEFAULT_ELECTRODE_DISTANCE,
+        block_s: float = DEFAULT_BLOCK_SECONDS,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+    ):
+        if block_s <= 0:
+            raise ValueError("block_sは正の値で入力してください")
+        if max_bytes <= 0:
+            raise ValueError("max_bytesは正の値で入力してください")
+        self._hed_path = HedPath(hed_path)
+        self._electrode_distance = electrode_distance
+        self._max_bytes = max_bytes
+        # フィクスチャ差し替えが効くようモジュール経由で呼ぶ
+        self._hed_data = read_bio.decode_hed(self._hed_path)
+        self._memmap = read_bio.hed2memmap(self._hed_path)
+        self._source = hed_fingerprint(self._hed_path)
+        self._block_frames = max(1, int(round(block_s * self.sampling_rate)))
+
+        self._blocks: OrderedDict[int, NDArray[float32]] = OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Recording":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"Recording({self._hed_path.path!r}, duration={self.duration} s, "
+            f"sampling_rate={self.sampling_rate})"
+        )
+
+    @property
+    def sampling_rate(self) -> int:
+        return self._hed_data.SAMPLING_RATE
+
+    @property
+    def gain(self) -> int:
+        return self._hed_data.GAIN
+
+    @property
+    def n_frames(self) -> int:
+        return self._memmap.n_frames
+
+    @property
+    def duration(self) -> float:
+        """記録の長さ (s)"""
+        return self.n_frames / self.sampling_rate
+
+    @property
+    def cache_stats(self) -> RecordingCacheStats:
+        with self._lock:
+            return RecordingCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                blocks=len(self._blocks),
+                nbytes=self._nbytes,
+                max_bytes=self._max_bytes,
+            )
+
+    def clear_cache(self) -> None:
+        """復号済みブロックを手放す (統計はそのまま)"""
+        with self._lock:
+            self._blocks.clear()
+            self._nbytes = 0
+
+    def close(self) -> None:
+        """キャッシュと .bio の memmap を手放す。以降 read はできない"""
+        self.clear_cache()
+        self._memmap = None
+
+    @time_validator
+    def read(self, start: float, end: float, chs: list[int] | None = None) -> PyMEA:
+        """
+        [start, end) (s) の区間を読み出す
+        ----------
+        Args:
+            start: 読み込み開始時間 (s)
+            end: 読み込み終了時間 (s)。記録の末尾を超えた分は読まない
+            chs: 読み込む電極番号 (None なら64電極すべて)
+
+        Returns:
+            PyMEA: read_MEA(hed_path, start, end, ...) と同じ内容
+        """
+        if self._memmap is None:
+            raise ValueError("閉じた Recording からは読み込めません")
+        if chs is not None and not all(1 <= ch <= NUM_ELECTRODES for ch in chs):
+            raise ValueError("chは1-64の整数で入力してください")
+        start_frame = min(int(start * self.sampling_rate), self.n_frames)
+        end_frame = min(int(end * self.sampling_rate), self.n_frames)
+        voltages = self._read_frames(start_frame, max(start_frame, end_frame))
+
+        if chs is None:
+            array = VoltageBlock(voltages, start, self.sampling_rate)
+        else:
+            rows = voltages[[ch - 1 for ch in chs]]
+            rows.setflags(write=False)
+            array = ChannelSubsetArray(rows, chs, start, self.sampling_rate)
+        result = MEAReadResult(
+            hed_path=self._hed_path,
+            array=array,
+            sampling_rate=self.sampling_rate,
+            gain=self.gain,
+            start=start,
+            end=end,
+            source=self._source,
+        )
+        return _build_pymea(_to_mea(result), self._electrode_distance)
+
+    def _read_frames(self, start_frame: int, end_frame: int) -> NDArray[float32]:
+        first = start_frame // self._block_frames
+        last = max(first, (end_frame - 1) // self._block_frames)
+        if first == last:
+            # 1ブロックに収まる区間はキャッシュのビューを返す (読み取り専用)
+            offset = first * self._block_frames
+            return self._block(first)[:, start_frame - offset : end_frame - offset]
+
+        out = np.empty((NUM_ELECTRODES, end_frame - start_frame), dtype=float32)
+        for index in range(first, last + 1):
+            offset = index * self._block_frames
+            block = self._block(index)
+            a = max(start_frame, offset)
+            b = min(end_frame, offset + block.shape[1])
+            out[:, a - start_frame : b - start_frame] = block[:, a - offset : b - offset]
+        out.setflags(write=False)
+        return out
+
+    def _block(self, index: int) -> NDArray[float32]:
+        with self._lock:
+            block = self._blocks.get(index)
+            if block is not None:
+                self._blocks.move_to_end(index)
+                self._hits += 1
+                return block
+            self._misses += 1
+
+        block_start = index * self._block_frames
+        block_end = min(block_start + self._block_frames, self.n_frames)
+        block = self._memmap.read_voltages(block_start, block_end)
+        block.setflags(write=False)
+
+        with self._lock:
+            if index not in self._blocks:
+                self._blocks[index] = block
+                self._nbytes += block.nbytes
+            # 上限を超えたら最後に使ってから長いブロックから手放す (今読んだものは残す)
+            while self._nbytes > self._max_bytes and len(self._blocks) > 1:
+                _, evicted = self._blocks.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self._evictions += 1
+        return block
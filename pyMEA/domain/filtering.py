@@ -0,0 +1,373 @@
+"""多電極の電位 (電極数, N) に同じフィルタを axis=-1 でまとめてかけるエンジン。
+
+電極ごとに Python のループで1次元のフィルタを呼ぶ代わりに、電極をブロックにまとめて
+scipy のフィルタを1回の呼び出し (axis=-1) で適用し、事前に確保した float32 の出力へ
+直接書き込む。float64 の中間配列はブロックの分しか確保しない。
+scipy のフィルタ本体は GIL を手放すため、長い記録ではブロックをスレッドで並列に処理する。
+
+カットオフが極端に低い・Q の高いフィルタは IIR の縦続では遅く数値的にも不安定になるため、
+線形位相 FIR (fir_taps) を FFT の overlap-save (fft_fir_filter) でかける経路も持つ。
+
+共通中央値リファレンス (common_median_reference_block) は時間チャンクごとに
+中央値を求め、事前に確保した出力へ直接書き込む。
+
+フィルタの設計 (butter_sos / notch_ba / fir_taps) は LRU でキャッシュし、同じ
+サンプリングレート・カットオフ・次数の係数は設計し直さずに共有する。
+"""
+
+import math
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from numpy import float32, float64
+from numpy._typing import DTypeLike, NDArray
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.signal import butter, firwin, iirnotch, kaiserord
+
+from pyMEA.domain.model.VoltageArray import VoltageArray
+
+# 1ブロックで処理するサンプル数の目安 (float64 で約 8 MiB)
+BLOCK_SAMPLES = 2**20
+# これより小さい入力はスレッドを使わない (起動コストのほうが大きい)
+PARALLEL_MIN_SAMPLES = 2**22
+# FIR 設計の阻止域の減衰量 [dB] と overlap-save の最小 FFT 長
+FIR_ATTENUATION_DB = 60.0
+FFT_MIN_SIZE = 2**16
+# ゼロ位相フィルタの実装: Butterworth (IIR) の順逆2回がけか、線形位相 FIR の FFT 畳み込み
+FILTER_METHODS = ("iir", "fir")
+# 設計したフィルタ係数を保持する数 (短い区間を繰り返しフィルタするときに再設計しない)
+FILTER_DESIGN_CACHE_SIZE = 256
+
+
+def filter_block(
+    array: VoltageArray,
+    chs: list[int],
+    func: Callable[[NDArray], NDArray],
+    dtype: DTypeLike = float64,
+    workers: int | None = None,
+    channels_per_block: int | None = None,
+) -> NDArray[float32]:
+    """
+    電極 chs の電位を電極ブロックごとに func (axis=-1 で処理する関数) にかける
+    ----------
+    Args:
+        array: 電位データ (MEA.array)。遅延バックエンドはブロックごとに復号する
+        chs: 対象の電極番号 (出力の行の順)
+        func: (電極数, n) の dtype 配列を受け取り同じ形の結果を返す関数
+        dtype: func に渡す配列の精度
+        workers: 並列に処理するスレッド数 (None なら CPU 数)
+        channels_per_block: 1ブロックの電極数 (None なら BLOCK_SAMPLES から決める)
+
+    Returns:
+        読み取り専用の float32 (len(chs), N) 配列
+    """
+    n_frames = array.n_frames
+    out = np.empty((len(chs), n_frames), dtype=float32)
+    workers = workers or os.cpu_count() or 1
+    parallel = workers > 1 and len(chs) * n_frames >= PARALLEL_MIN_SAMPLES
+
+    # 並列時はスレッド数以上のブロックに分け、1ブロックの中間配列は BLOCK_SAMPLES 程度に抑える
+    per_block = channels_per_block or max(1, BLOCK_SAMPLES // max(1, n_frames))
+    if parallel:
+        per_block = min(per_block, math.ceil(len(chs) / workers))
+    blocks = [slice(i, i + per_block) for i in range(0, len(chs), per_block)]
+
+    def run(rows: slice) -> None:
+        block_chs = chs[rows]
+        x = np.empty((len(block_chs), n_frames), dtype=dtype)
+        if x.dtype == float32:
+            array.read_voltages(0, n_frames, out=x, chs=block_chs)
+        else:
+            x[:] = array.read_voltages(0, n_frames, chs=block_chs)
+        out[rows] = func(x)
+
+    if parallel and len(blocks) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(blocks))) as pool:
+            # 例外を呼び出し側に伝えるため結果を取り出す
+            list(pool.map(run, blocks))
+    else:
+        for rows in blocks:
+            run(rows)
+    out.setflags(write=False)
+    return out
+
+
+def fir_filter_block(
+    array: VoltageArray,
+    chs: list[int],
+    taps: NDArray[float64],
+    dtype: DTypeLike = float64,
+) -> NDArray[float32]:
+    """電極 chs の電位に線形位相 FIR を FFT でかけた (len(chs), N) を返す (ゼロ位相)
+
+    scipy.fft は複数電極の変換をまとめて並列に計算するため、CPU 数ぶんの電極を
+    1ブロックにしてスレッドは使わない。
+    """
+    cpus = os.cpu_count() or 1
+    return filter_block(
+        array,
+        chs,
+        lambda x: fft_fir_filter(x, taps, workers=cpus),
+        dtype,
+        workers=1,
+        channels_per_block=cpus,
+    )
+
+
+def common_median_reference_block(
+    array: VoltageArray,
+    chs: list[int],
+    exclude: Iterable[int] = (),
+    chunk_frames: int | None = None,
+    out: NDArray[float32] | None = None,
+) -> NDArray[float32]:
+    """
+    電極 chs の電位から各時刻の電極間の中央値を引く (時間チャンクごとに処理する)
+    ----------
+    Args:
+        array: 電位データ (MEA.array)。遅延バックエンドはチャンクごとに復号する
+        chs: 対象の電極番号 (出力の行の順)
+        exclude: 中央値の計算から除く電極番号 (断線・飽和した電極など)。
+            除いた電極の電位からも中央値は引く。chs にない番号は無視する
+        chunk_frames: 1チャンクのフレーム数 (None なら BLOCK_SAMPLES から決める)
+        out: 書き込み先の (len(chs), N) の float32 配列。None なら確保して読み取り専用にする
+
+    Returns:
+        (len(chs), N) の float32 配列。np.median を使う計算と一致する
+    """
+    n_frames = array.n_frames
+    rows = reference_rows(chs, exclude)
+    owned = out is None
+    if owned:
+        out = np.empty((len(chs), n_frames), dtype=float32)
+    chunk = chunk_frames or max(1, BLOCK_SAMPLES // max(1, len(chs)))
+    for start in range(0, n_frames, chunk):
+        stop = min(start + chunk, n_frames)
+        x = array.read_voltages(start, stop, chs=chs)
+        subtract_median(x, rows, out=out[:, start:stop])
+    if owned:
+        out.setflags(write=False)
+    return out
+
+
+def reference_rows(chs: list[int], exclude: Iterable[int] = ()) -> NDArray | None:
+    """中央値の計算に使う行 (chs の中の位置)。除く電極がなければ None (全行)"""
+    excluded = set(exclude)
+    if not excluded & set(chs):
+        return None
+    rows = np.array([i for i, ch in enumerate(chs) if ch not in excluded], dtype=np.intp)
+    if len(rows) == 0:
+        raise ValueError("中央値の計算に使う電極が残っていません")
+    return rows
+
+
+def subtract_median(
+    x: NDArray, rows: NDArray | None = None, out: NDArray | None = None
+) -> NDArray:
+    """
+    (電極数, n) の各時刻から rows の行の中央値を引く
+    ----------
+    np.median (axis=0) は電極方向に飛び飛びのメモリを選択するため遅い。ここでは
+    参照する行を (n, 電極数) の連続配列に転置してから時刻ごとに電極方向へ並べ替える。
+    電極数は高々 64 なので、numpy の SIMD ソートが np.partition の選択より速い。
+    x は変更しない。
+    """
+    ref = np.ascontiguousarray((x if rows is None else x[rows]).T)
+    k = ref.shape[1]
+    if k == 0:
+        raise ValueError("中央値の計算に使う電極が残っていません")
+    ref.sort(axis=-1)
+    half = k // 2
+    if k % 2:
+        median = ref[:, half]
+    else:
+        # np.median と同じく中央の2つの平均をとる
+        median = ref[:, half - 1] + ref[:, half]
+        median /= 2
+    return np.subtract(x, median, out=out)
+
+
+def method_step(method: str) -> tuple:
+    """由来に記録するフィルタの実装。既定の "iir" は従来の由来 (キャッシュキー) と同じにする"""
+    if method not in FILTER_METHODS:
+        raise ValueError(f"methodは{FILTER_METHODS}のいずれかで指定してください")
+    return () if method == "iir" else (method,)
+
+
+def fir_taps(
+    sampling_rate: int,
+    btype: str,
+    cutoff: float | list[float],
+    transition_hz: float | None = None,
+    attenuation_db: float = FIR_ATTENUATION_DB,
+) -> NDArray[float64]:
+    """
+    線形位相 FIR フィルタ (Kaiser 窓) の係数を設計する (設計済みなら再利用する)
+    ----------
+    Args:
+        sampling_rate: サンプリング周波数 [Hz]
+        btype: "highpass" / "bandpass" / "bandstop"
+        cutoff: カットオフ周波数 [Hz]。highpass はスカラ、それ以外は [low, high]
+        transition_hz: 遷移帯域の幅 [Hz]。None なら通過域を削らない範囲で最も広くとる
+            (highpass は cutoff、bandpass/bandstop は帯域の端から 0 Hz・ナイキスト
+            周波数・帯域幅の半分までのうち最も狭いもの)
+        attenuation_db: 阻止域の減衰量 [dB]
+
+    Returns:
+        奇数長の対称な係数 (群遅延は (len - 1) / 2 フレーム)。読み取り専用
+    """
+    return _design(
+        "fir", sampling_rate, (btype, _key(cutoff), transition_hz, attenuation_db)
+    )[0]
+
+
+def butter_sos(sampling_rate: int, Wn: float | list[float], btype: str, order: int):
+    """Butterworth フィルタの SOS 係数 (読み取り専用、設計済みなら再利用する)"""
+    return _design("butter", sampling_rate, (_key(Wn), btype, order))[0]
+
+
+def notch_ba(
+    sampling_rate: int, f0: float, Q: float
+) -> tuple[NDArray[float64], NDArray[float64]]:
+    """IIR ノッチフィルタの (b, a) 係数 (読み取り専用、設計済みなら再利用する)"""
+    return _design("notch", sampling_rate, (f0, Q))
+
+
+@dataclass(frozen=True)
+class FilterDesignCacheStats:
+    """フィルタ設計のキャッシュ (LRU) の利用状況"""
+
+    hits: int
+    misses: int
+    # キャッシュしている設計の数と上限
+    designs: int
+    max_designs: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def filter_design_cache_stats() -> FilterDesignCacheStats:
+    """butter_sos / notch_ba / fir_taps が共有する設計キャッシュの利用状況"""
+    info = _design.cache_info()
+    return FilterDesignCacheStats(
+        hits=info.hits,
+        misses=info.misses,
+        designs=info.currsize,
+        max_designs=info.maxsize,
+    )
+
+
+def clear_filter_design_cache() -> None:
+    """設計キャッシュと統計を消す"""
+    _design.cache_clear()
+
+
+def _key(value) -> float | tuple[float, ...]:
+    """カットオフ周波数をキーにできる形 (スカラか float のタプル) にそろえる"""
+    values = np.atleast_1d(np.asarray(value, dtype=float64))
+    return float(values[0]) if np.ndim(value) == 0 else tuple(map(float, values))
+
+
+@lru_cache(maxsize=FILTER_DESIGN_CACHE_SIZE)
+def _design(kind: str, sampling_rate: int, params: tuple) -> tuple[NDArray, ...]:
+    """フィルタを設計する。係数は共有するため読み取り専用にして返す"""
+    if kind == "butter":
+        Wn, btype, order = params
+        coeffs = (butter(order, Wn, btype=btype, fs=sampling_rate, output="sos"),)
+    elif kind == "notch":
+        f0, Q = params
+        coeffs = iirnotch(f0, Q, sampling_rate)
+    else:
+        coeffs = (_design_fir(sampling_rate, *params),)
+    for c in coeffs:
+        c.setflags(write=False)
+    return tuple(coeffs)
+
+
+def _design_fir(
+    sampling_rate: int,
+    btype: str,
+    cutoff: float | tuple[float, ...],
+    transition_hz: float | None,
+    attenuation_db: float,
+) -> NDArray[float64]:
+    nyquist = sampling_rate / 2
+    if transition_hz is None:
+        if btype == "highpass":
+            transition_hz = cutoff
+        else:
+            low, high = cutoff
+            transition_hz = min(low, nyquist - high, (high - low) / 2)
+    if transition_hz <= 0:
+        raise ValueError("遷移帯域の幅は正の値で指定してください")
+    numtaps, beta = kaiserord(attenuation_db, transition_hz / nyquist)
+    # 高域を通すフィルタは奇数長 (Type I) でなければならない
+    numtaps |= 1
+    return firwin(
+        numtaps,
+        cutoff,
+        window=("kaiser", beta),
+        pass_zero=btype,
+        fs=sampling_rate,
+    )
+
+
+def fft_fir_filter(
+    x: NDArray, taps: NDArray[float64], workers: int | None = None
+) -> NDArray:
+    """
+    線形位相 FIR を FFT の overlap-save で (電極数, n) に axis=-1 で適用する (ゼロ位相)
+    ----------
+    Args:
+        x: (電極数, n) または (n,) の信号
+        taps: 奇数長の対称な係数 (fir_taps)
+        workers: scipy.fft の並列数 (None なら CPU 数)
+
+    群遅延を補正した "same" 出力を返す。両端は奇関数拡張 (filtfilt と同じ) で
+    のりしろを作るため、端点の過渡応答が小さい。係数長が信号より長くてもよい。
+    """
+    x = np.asarray(x)
+    dtype = np.result_type(x.dtype, float32)
+    taps = np.asarray(taps, dtype=dtype)
+    half = (len(taps) - 1) // 2
+    n = x.shape[-1]
+    if n == 0:
+        return np.empty(x.shape, dtype=dtype)
+    xp = _odd_extend(x.astype(dtype, copy=False), half)
+
+    workers = workers or os.cpu_count() or 1
+    nfft = next_fast_len(max(4 * len(taps), FFT_MIN_SIZE), real=True)
+    valid = nfft - len(taps) + 1
+    spectrum = rfft(taps, nfft, workers=workers)
+    out = np.empty(x.shape, dtype=dtype)
+    for start in range(0, n, valid):
+        stop = min(start + valid, n)
+        segment = xp[..., start : start + nfft]
+        y = rfft(segment, nfft, axis=-1, workers=workers)
+        y = irfft(y * spectrum, nfft, axis=-1, workers=workers)
+        # 循環畳み込みの先頭 len(taps) - 1 は折り返しを含むため捨てる
+        out[..., start:stop] = y[..., len(taps) - 1 : len(taps) - 1 + stop - start]
+    return out
+
+
+def _odd_extend(x: NDArray, pad: int) -> NDArray:
+    """両端を奇関数拡張 (2 * 端の値 - 反転) で pad だけ伸ばす。信号より長い分は端の値で埋める"""
+    n = x.shape[-1]
+    inner = min(pad, n - 1)
+    left = 2 * x[..., :1] - x[..., inner:0:-1]
+    right = 2 * x[..., -1:] - x[..., -2 : -inner - 2 : -1]
+    parts = [
+        np.repeat(left[..., :1] if inner else x[..., :1], pad - inner, axis=-1),
+        left,
+        x,
+        right,
+        np.repeat(right[..., -1:] if inner else x[..., -1:], pad - inner, axis=-1),
+    ]
+    return np.concatenate(parts, axis=-1)
@@ -0,0 +1,162 @@
+"""ブロックを順に流し込める因果 (片方向) フィルタ。
+
+zero_phase_butter / iirnotch_filter_single_ch は順逆2回がけのため信号全体が必要になる。
+CausalFilter は sosfilt の内部状態 (zi) を全電極ぶん保持し、続きのブロックを渡すと
+前のブロックの最後の状態から計算を再開する。長時間記録をブロックごとに処理しても
+1回の因果フィルタと同じ結果 (ビット単位で一致) になり、メモリは1ブロック分で済む。
+位相遅延があるため、ピーク時刻を厳密に扱う解析にはゼロ位相のフィルタを使うこと。
+"""
+
+import numpy as np
+from numpy import float32, float64
+from numpy._typing import DTypeLike, NDArray
+from scipy.signal import sosfilt, sosfilt_zi, tf2sos
+
+from pyMEA.constants import NUM_ELECTRODES
+from pyMEA.domain.filtering import butter_sos, notch_ba
+from pyMEA.domain.model.MEA import MEA
+from pyMEA.domain.model.VoltageArray import VoltageArray
+
+_INITIAL_STATES = ("zeros", "steady")
+
+
+class CausalFilter:
+    """
+    全電極の sosfilt の状態を持ち、ブロックを順に処理する因果フィルタ
+    ----------
+    Args:
+        sos: フィルタ係数 (セクション数, 6)
+        design: 由来に記録する設計 (処理名とパラメータの列)
+        n_channels: 同時に処理する電極数
+        initial: 最初のブロックの初期状態。"zeros" (0 から開始) か
+            "steady" (最初のサンプルで定常状態にして立ち上がりの過渡応答を抑える)
+        dtype: 計算精度
+
+    Examples
+    --------
+    >>> causal = CausalFilter.highpass(mea.SAMPLING_RATE, 1).then(
+    ...     CausalFilter.iirnotch(mea.SAMPLING_RATE, 50)
+    ... )
+    >>> for block in iter_windows(hed_path, 1.0):
+    ...     filtered = causal.process(block)  # (64, n) を前のブロックの続きとして返す
+    """
+
+    def __init__(
+        self,
+        sos: NDArray,
+        design: tuple = (),
+        n_channels: int = NUM_ELECTRODES,
+        initial: str = "zeros",
+        dtype: DTypeLike = float64,
+    ):
+        if initial not in _INITIAL_STATES:
+            raise ValueError(f"initialは{_INITIAL_STATES}のいずれかで指定してください")
+        self.dtype = np.dtype(dtype)
+        # 設計キャッシュの係数は読み取り専用で、sosfilt は書き込み可能な配列を要求するため複製する
+        self.sos = np.atleast_2d(np.array(sos, dtype=self.dtype))
+        self.design = design
+        self.n_channels = n_channels
+        self.initial = initial
+        self._zi: NDArray | None = None
+        self.frames = 0
+
+    @classmethod
+    def highpass(
+        cls, sampling_rate: int, cutoff=1, order=4, **kwargs
+    ) -> "CausalFilter":
+        sos = butter_sos(sampling_rate, cutoff, "highpass", order)
+        return cls(sos, (("highpass", cutoff, order),), **kwargs)
+
+    @classmethod
+    def bandpass(
+        cls, sampling_rate: int, low, high, order=4, **kwargs
+    ) -> "CausalFilter":
+        sos = butter_sos(sampling_rate, [low, high], "bandpass", order)
+        return cls(sos, (("bandpass", low, high, order),), **kwargs)
+
+    @classmethod
+    def iirnotch(
+        cls, sampling_rate: int, filter_hz=50, Q=30, **kwargs
+    ) -> "CausalFilter":
+        sos = tf2sos(*notch_ba(sampling_rate, filter_hz, Q))
+        return cls(sos, (("iirnotch", filter_hz, Q),), **kwargs)
+
+    def then(self, other: "CausalFilter") -> "CausalFilter":
+        """self の後に other をかける1つのフィルタ (セクションを連結する) を返す"""
+        return CausalFilter(
+            np.vstack([self.sos, other.sos]),
+            self.design + other.design,
+            self.n_channels,
+            self.initial,
+            self.dtype,
+        )
+
+    def clone(self, n_channels: int | None = None) -> "CausalFilter":
+        """同じ設計で状態を初期化したフィルタを返す (n_channels で電極数を変えられる)"""
+        return CausalFilter(
+            self.sos,
+            self.design,
+            self.n_channels if n_channels is None else n_channels,
+            self.initial,
+            self.dtype,
+        )
+
+    def reset(self) -> None:
+        """状態を初期化する (次のブロックを記録の先頭として扱う)"""
+        self._zi = None
+        self.frames = 0
+
+    @property
+    def zi(self) -> NDArray | None:
+        """現在の状態 (セクション数, 電極数, 2)。まだ何も処理していなければ None"""
+        return None if self._zi is None else self._zi.copy()
+
+    def step(self) -> tuple:
+        """由来に記録する処理名とパラメータ"""
+        return ("causal", self.design, self.initial, self.dtype.name)
+
+    def process(self, block: "MEA | VoltageArray | NDArray") -> NDArray:
+        """
+        前のブロックの続きとして block を処理する
+        ----------
+        Args:
+            block: (電極数, n) の電位。MEA / VoltageArray なら保持している全電極の電位
+
+        Returns:
+            (電極数, n) のフィルタ後の電位 (dtype は計算精度)
+        """
+        x = self._voltages(block)
+        if x.shape[0] != self.n_channels:
+            raise ValueError(
+                f"電極数が一致しません (フィルタ: {self.n_channels}, 入力: {x.shape[0]})"
+            )
+        if x.shape[1] == 0:
+            return x
+        if self._zi is None:
+            self._zi = self._initial_state(x)
+        y, self._zi = sosfilt(self.sos, x, axis=-1, zi=self._zi)
+        self.frames += x.shape[1]
+        return y
+
+    def _voltages(self, block) -> NDArray:
+        if isinstance(block, MEA):
+            block = block.array
+        if isinstance(block, VoltageArray):
+            n_frames = block.n_frames
+            chs = block.channels
+            x = np.empty((len(chs), n_frames), dtype=self.dtype)
+            # 64電極すべてなら一括で読む (VoltageBlock はコピー1回で済む)
+            chs = None if chs == list(range(1, NUM_ELECTRODES + 1)) else chs
+            if self.dtype == float32:
+                return block.read_voltages(0, n_frames, out=x, chs=chs)
+            x[:] = block.read_voltages(0, n_frames, chs=chs)
+            return x
+        return np.asarray(block, dtype=self.dtype)
+
+    def _initial_state(self, x: NDArray) -> NDArray:
+        shape = (len(self.sos), self.n_channels, 2)
+        if self.initial == "zeros":
+            return np.zeros(shape, dtype=self.dtype)
+        # 最初のサンプルが続いていた場合の定常状態から始める
+        zi = sosfilt_zi(self.sos).astype(self.dtype)
+        return zi[:, np.newaxis, :] * x[np.newaxis, :, :1]
@@ -0,0 +1,77 @@
+"""一部の電極だけを保持する (65, N) 互換の電位配列。"""
+
+import numpy as np
+from numpy import float32
+from numpy._typing import NDArray
+
+from pyMEA.domain.model.VoltageArray import VoltageArray, is_read_only
+
+
+class ChannelSubsetArray(VoltageArray):
+    """
+    指定した電極だけを保持する電位配列
+    ----------
+    Args:
+        voltages: (len(chs), N) の電位データ。chs と同じ順に並べる
+        chs: 保持する電極番号 (1〜64)
+        start: 先頭フレームの時刻 (s)
+        sampling_rate: サンプリングレート (Hz)
+
+    電極番号と行の対応 (チャンネルマップ) を持つため、``array[ch]`` は元の電極番号で
+    引ける。保持していない電極は 0 として読める (必要な電極ぶんのメモリしか使わない)。
+    """
+
+    def __init__(
+        self,
+        voltages: NDArray[float32],
+        chs: list[int],
+        start: int | float,
+        sampling_rate: int,
+    ):
+        super().__init__(start, sampling_rate)
+        if len(voltages) != len(chs):
+            raise ValueError("電位データの行数と電極数が一致しません")
+        arr = np.asarray(voltages, dtype=float32)
+        if not is_read_only(arr):
+            # 呼び出し側の配列 (書き込み可能な配列のビューを含む) はコピーして守る
+            # (dtype 変換で新たに確保した配列はそのまま使う)
+            if isinstance(voltages, np.ndarray) and np.shares_memory(arr, voltages):
+                arr = arr.copy()
+            arr.setflags(write=False)
+        voltages = arr
+        self._voltages = voltages
+        self._rows = {int(ch): i for i, ch in enumerate(chs)}
+
+    @property
+    def n_frames(self) -> int:
+        return self._voltages.shape[1]
+
+    @property
+    def channels(self) -> list[int]:
+        return list(self._rows)
+
+    @property
+    def voltages(self) -> NDArray[float32]:
+        """保持している電極の (len(channels), N) 電位データ (読み取り専用)"""
+        return self._voltages
+
+    @property
+    def held_nbytes(self) -> int:
+        return self._voltages.nbytes
+
+    def _read_channel(
+        self, ch: int, start_frame: int, end_frame: int, out: NDArray[float32]
+    ) -> None:
+        row = self._rows.get(ch)
+        if row is None:
+            out[:] = 0
+        else:
+            out[:] = self._voltages[row, start_frame:end_frame]
+
+    def _window(self, start_frame: int, end_frame: int) -> "ChannelSubsetArray":
+        return ChannelSubsetArray(
+            self._voltages[:, start_frame:end_frame],
+            self.channels,
+            self.start + start_frame / self.sampling_rate,
+            self.sampling_rate,
+        )
@@ -0,0 +1,529 @@
+"""複数のフィルタを時間チャンクごとにまとめて適用する宣言的なパイプライン。
+
+MEA のメソッドチェーン (``mea.highpass(1).common_median_reference()``) は段ごとに
+記録全体の長さの電位を確保する。FilterPipeline は同じ処理を宣言しておき、記録を
+前後にのりしろ (margin) をつけた時間チャンクに分けて、チャンクごとに全段を続けて
+適用する。出力 (float32) 以外に確保するのは処理中のチャンクの分だけで、遅延バックエンド
+(memmap 等) からはチャンクの区間だけを復号する。
+
+のりしろは各段のインパルス応答が IMPULSE_TOL (float32 の丸め誤差) まで減衰する長さから
+求めるため、結果はチェーンで記録全体にかけた場合と float32 の丸め誤差の範囲で一致する
+(記録の両端はチェーンと同じ端点処理になる)。
+
+チャンクは float32 のバッファに読み出し、電極ごとに独立な段 (IIR/FIR/ウェーブレット) は
+電極ブロックごとに float64 へ変換して計算し、時刻ごとに独立な段 (共通中央値リファレンス) は
+時間方向に区切って計算する。同時に確保する作業領域は max_bytes 以下に収める。
+"""
+
+import math
+import os
+import warnings
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pywt
+from numpy import float32, float64
+from numpy._typing import NDArray
+from scipy.signal import sos2zpk, tf2zpk
+
+from pyMEA.domain.filtering import (
+    BLOCK_SAMPLES,
+    butter_sos,
+    fft_fir_filter,
+    fir_taps,
+    method_step,
+    notch_ba,
+    reference_rows,
+    subtract_median,
+)
+from pyMEA.domain.model.FilterType import FilterType
+from pyMEA.domain.model.MEA import (
+    iirnotch_filter_single_ch,
+    wavelet_denoise_single_ch,
+    zero_phase_butter,
+)
+from pyMEA.domain.model.VoltageArray import VoltageArray
+
+# のりしろの基準: インパルス応答がこの比率まで減衰したら打ち切る。出力は float32 なので、
+# それより細かい打ち切り誤差は丸め誤差に埋もれる
+IMPULSE_TOL = float(np.finfo(float32).eps)
+DEFAULT_CHUNK_SECONDS = 10.0
+# chunk_s を省略したときのチャンク長の下限 (のりしろの倍数)。のりしろを読む無駄を出力の 1/2 以下にする
+MIN_CHUNK_MARGINS = 4
+# 同時に処理するチャンクの作業領域の合計の上限
+DEFAULT_MAX_CHUNK_BYTES = 512 * 1024**2
+# 電極ブロックの計算中に同時に存在する float64 配列の数 (入力と sosfiltfilt の延長・往復の結果)
+_BLOCK_COPIES = 4
+
+
+class FilterStage(ABC):
+    """パイプラインの1段。(電極数, n) の float64 をまとめて axis=-1 で処理する"""
+
+    # 電極ごとに独立な段は電極ブロックに分けて計算する。False の段は時刻ごとに独立で、
+    # float32 のまま時間方向に区切って計算する
+    per_channel = True
+
+    @abstractmethod
+    def step(self) -> tuple:
+        """由来 (lineage) に記録する処理名とパラメータ (MEA の同名メソッドと同じ)"""
+
+    @abstractmethod
+    def margin(self, sampling_rate: int) -> int:
+        """チャンクの前後に必要なのりしろ (フレーム数)"""
+
+    @abstractmethod
+    def apply(self, x: NDArray[float64], sampling_rate: int) -> NDArray[float64]:
+        """(電極数, n) の電位にこの段を適用する"""
+
+    def alignment(self) -> int:
+        """チャンクの開始フレームをこの倍数に揃える必要がある場合の値"""
+        return 1
+
+    def resolve(self, n_frames: int, chs: list[int]) -> "FilterStage":
+        """記録全体の長さ・対象の電極で決まるパラメータを確定させた段を返す"""
+        return self
+
+
+class _ZeroPhaseStage(FilterStage):
+    """
+    Butterworth (method="iir") か線形位相 FIR (method="fir") のゼロ位相フィルタの段
+    ----------
+    FIR は係数長の半分がのりしろになり、チャンクに分けても記録全体にかけた結果と
+    (浮動小数点の丸めを除いて) 一致する。transition_hz は FIR の遷移帯域の幅。
+    """
+
+    method: str
+    transition_hz: float | None
+
+    @abstractmethod
+    def _iir_poles(self, sampling_rate: int) -> NDArray:
+        """IIR の極 (のりしろの計算用)"""
+
+    @abstractmethod
+    def _apply_iir(self, x: NDArray[float64], sampling_rate: int) -> NDArray[float64]:
+        """IIR を順逆2回がけする"""
+
+    @abstractmethod
+    def _fir_band(self) -> tuple[str, float | list[float]]:
+        """FIR の (btype, カットオフ)"""
+
+    def _method_step(self) -> tuple:
+        step = method_step(self.method)
+        return step if self.transition_hz is None else (*step, self.transition_hz)
+
+    def _taps(self, sampling_rate: int) -> NDArray[float64]:
+        btype, cutoff = self._fir_band()
+        return fir_taps(sampling_rate, btype, cutoff, self.transition_hz)
+
+    def margin(self, sampling_rate: int) -> int:
+        if self.method == "fir":
+            return (len(self._taps(sampling_rate)) - 1) // 2
+        return _decay_frames(self._iir_poles(sampling_rate))
+
+    def apply(self, x: NDArray[float64], sampling_rate: int) -> NDArray[float64]:
+        if self.method == "fir":
+            # チャンクをスレッドで並列に処理するため FFT 自体は1スレッドで計算する
+            return fft_fir_filter(x, self._taps(sampling_rate), workers=1)
+        return self._apply_iir(x, sampling_rate)
+
+
+@dataclass(frozen=True)
+class HighpassStage(_ZeroPhaseStage):
+    cutoff: float = 1
+    order: int = 4
+    method: str = "iir"
+    transition_hz: float | None = None
+
+    def step(self) -> tuple:
+        return ("highpass", self.cutoff, self.order, *self._method_step())
+
+    def _iir_poles(self, sampling_rate: int) -> NDArray:
+        sos = butter_sos(sampling_rate, self.cutoff, "highpass", self.order)
+        return sos2zpk(sos)[1]
+
+    def _apply_iir(self, x: NDArray[float64], sampling_rate: int) -> NDArray[float64]:
+        return zero_phase_butter(x, sampling_rate, self.cutoff, "highpass", self.order)
+
+    def _fir_band(self) -> tuple[str, float | list[float]]:
+        return "highpass", self.cutoff
+
+
+@dataclass(frozen=True)
+class BandpassStage(_ZeroPhaseStage):
+    low: float
+    high: float
+    order: int = 4
+    method: str = "iir"
+    transition_hz: float | None = None
+
+    def step(self) -> tuple:
+        return ("bandpass", self.low, self.high, self.order, *self._method_step())
+
+    def _iir_poles(self, sampling_rate: int) -> NDArray:
+        sos = butter_sos(sampling_rate, [self.low, self.high], "bandpass", self.order)
+        return sos2zpk(sos)[1]
+
+    def _apply_iir(self, x: NDArray[float64], sampling_rate: int) -> NDArray[float64]:
+        return zero_phase_butter(
+            x, sampling_rate, [self.low, self.high], "bandpass", self.order
+        )
+
+    def _fir_band(self) -> tuple[str, float | list[float]]:
+        return "bandpass", [self.low, self.high]
+
+
+@dataclass(frozen=True)
+class NotchStage(_ZeroPhaseStage):
+    """
+    ノッチフィルタ
+    ----------
+    method="fir" では filter_hz を中心とする幅 filter_hz / Q の帯域阻止 FIR になる。
+    """
+
+    filter_hz: float = 50
+    Q: float = 30
+    method: str = "iir"
+    transition_hz: float | None = None
+
+    def step(self) -> tuple:
+        return ("iirnotch", self.filter_hz, self.Q, *self._method_step())
+
+    def _iir_poles(self, sampling_rate: int) -> NDArray:
+        _, p, _ = tf2zpk(*notch_ba(sampling_rate, self.filter_hz, self.Q))
+        return p
+
+    def _apply_iir(self, x: NDArray[float64], sampling_rate: int) -> NDArray[float64]:
+        return iirnotch_filter_single_ch(x, sampling_rate, self.filter_hz, self.Q)
+
+    def _fir_band(self) -> tuple[str, float | list[float]]:
+        half_width = self.filter_hz / self.Q / 2
+        return "bandstop", [self.filter_hz - half_width, self.filter_hz + half_width]
+
+
+@dataclass(frozen=True)
+class CommonMedianReferenceStage(FilterStage):
+    """
+    各時刻の電極間の中央値を引く (時刻ごとに独立なのでのりしろは不要)
+    ----------
+    exclude は中央値の計算から除く電極番号。rows は resolve で決まる参照する行。
+    """
+
+    exclude: tuple[int, ...] = ()
+    rows: NDArray | None = field(default=None, compare=False, repr=False)
+
+    per_channel = False
+
+    def step(self) -> tuple:
+        return ("common_median_reference", *((self.exclude,) if self.exclude else ()))
+
+    def resolve(self, n_frames: int, chs: list[int]) -> "CommonMedianReferenceStage":
+        return replace(self, rows=reference_rows(chs, self.exclude))
+
+    def margin(self, sampling_rate: int) -> int:
+        return 0
+
+    def apply(self, x: NDArray, sampling_rate: int) -> NDArray:
+        return subtract_median(x, self.rows)
+
+
+@dataclass(frozen=True)
+class WaveletDenoiseStage(FilterStage):
+    """
+    ウェーブレット縮退
+    ----------
+    閾値のノイズ推定はチャンクごとに行うため、記録全体で推定する
+    MEA.wavelet_denoise とは閾値がわずかに異なる。分解レベルは記録全体の長さで決める。
+    """
+
+    wavelet: str = "db4"
+    level: int | None = None
+
+    def step(self) -> tuple:
+        return ("wavelet_denoise", self.wavelet, self.level)
+
+    def resolve(self, n_frames: int, chs: list[int]) -> "WaveletDenoiseStage":
+        if self.level is not None:
+            return self
+        dec_len = pywt.Wavelet(self.wavelet).dec_len
+        return replace(self, level=min(pywt.dwt_max_level(n_frames, dec_len), 6))
+
+    def margin(self, sampling_rate: int) -> int:
+        # 最も粗いレベルの係数1つが影響する範囲
+        return pywt.Wavelet(self.wavelet).dec_len * 2 ** (self.level or 0)
+
+    def alignment(self) -> int:
+        # 間引きの位相を記録全体と揃える
+        return 2 ** (self.level or 0)
+
+    def apply(self, x: NDArray[float64], sampling_rate: int) -> NDArray[float64]:
+        return np.stack(
+            [wavelet_denoise_single_ch(row, self.wavelet, self.level) for row in x]
+        )
+
+
+@dataclass(frozen=True)
+class FilterPipeline:
+    """
+    チャンク単位でまとめて適用するフィルタの列
+    ----------
+    Args:
+        stages: 適用する段 (先頭から順に適用)
+        chunk_s: 1チャンクの長さ (s)。None なら DEFAULT_CHUNK_SECONDS とのりしろの
+            MIN_CHUNK_MARGINS 倍の長いほう (max_bytes に収まらなければ下限まで短くする)。
+            指定した長さはそのまま使う (のりしろの MIN_CHUNK_MARGINS 倍より短いと警告する)
+
+    Examples
+    --------
+    >>> pipeline = FilterPipeline().highpass(1).common_median_reference()
+    >>> filtered = mea.apply_pipeline(pipeline)
+    """
+
+    stages: tuple[FilterStage, ...] = ()
+    chunk_s: float | None = None
+
+    def __post_init__(self):
+        if self.chunk_s is not None and self.chunk_s <= 0:
+            raise ValueError("chunk_sは正の値で入力してください")
+
+    def highpass(
+        self, cutoff=1, order=4, method="iir", transition_hz=None
+    ) -> "FilterPipeline":
+        return self._then(HighpassStage(cutoff, order, method, transition_hz))
+
+    def bandpass(
+        self, low, high, order=4, method="iir", transition_hz=None
+    ) -> "FilterPipeline":
+        return self._then(BandpassStage(low, high, order, method, transition_hz))
+
+    def iirnotch_filter(
+        self, filter_hz=50, Q=30, method="iir", transition_hz=None
+    ) -> "FilterPipeline":
+        return self._then(NotchStage(filter_hz, Q, method, transition_hz))
+
+    def common_median_reference(self, exclude=()) -> "FilterPipeline":
+        exclude = tuple(sorted(set(exclude)))
+        return self._then(CommonMedianReferenceStage(exclude))
+
+    def wavelet_denoise(self, wavelet="db4", level=None) -> "FilterPipeline":
+        return self._then(WaveletDenoiseStage(wavelet, level))
+
+    def _then(self, stage: FilterStage) -> "FilterPipeline":
+        # 実装の指定ミスはパイプラインを組み立てた時点で知らせる
+        stage.step()
+        return replace(self, stages=(*self.stages, stage))
+
+    def step(self) -> tuple:
+        """由来に記録する処理名とパラメータ"""
+        return ("pipeline", tuple(s.step() for s in self.stages), self.chunk_s)
+
+    def run(
+        self,
+        array: VoltageArray,
+        chs: list[int],
+        sampling_rate: int,
+        workers: int | None = None,
+        out: NDArray[float32] | None = None,
+        max_bytes: int | None = None,
+    ) -> NDArray[float32]:
+        """
+        電極 chs の電位に全段を適用した float32 (len(chs), N) を返す
+        ----------
+        Args:
+            array: 電位データ (MEA.array)。チャンクの区間だけを読み出す
+            chs: 対象の電極番号 (出力の行の順)
+            sampling_rate: サンプリングレート
+            workers: 並列に処理するチャンク数の上限 (None なら CPU 数)
+            out: 書き込み先の (len(chs), N) の float32 配列 (np.memmap 等)。
+                None なら確保して読み取り専用にして返す。memmap を渡せば
+                メモリに載らない長さの記録も処理できる (書き込み後に flush する)
+            max_bytes: 同時に処理するチャンクの作業領域の合計の上限 (None なら
+                DEFAULT_MAX_CHUNK_BYTES)。出力 (out) は含まない。1チャンクの作業領域
+                (plan().chunk_bytes) が収まらなければ ValueError を送出する
+
+        出力以外に確保するのは、並列に処理しているチャンクごとの float32 バッファ
+        (電極数 × (チャンク長 + 2 × のりしろ)) と、1電極ブロック分の float64 の作業領域だけ。
+        """
+        n_frames = array.n_frames
+        stages = self._resolve(n_frames, chs)
+        plan = self.plan(n_frames, chs, sampling_rate, workers, max_bytes)
+        min_chunk = MIN_CHUNK_MARGINS * plan.margin
+        if self.chunk_s is not None and plan.chunk_frames < min_chunk:
+            warnings.warn(
+                f"chunk_s={self.chunk_s} はのりしろ ({plan.margin / sampling_rate:.2f} s) の"
+                f"{MIN_CHUNK_MARGINS}倍より短く、のりしろの読み直しが多くなります",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+        owned = out is None
+        if owned:
+            out = np.empty((len(chs), n_frames), dtype=float32)
+        elif out.shape != (len(chs), n_frames) or out.dtype != float32:
+            raise ValueError(
+                f"outは float32 の {(len(chs), n_frames)} で指定してください"
+            )
+
+        def run_chunk(start: int) -> None:
+            end = min(start + plan.chunk_frames, n_frames)
+            lo = max(0, start - plan.margin)
+            lo -= lo % plan.alignment
+            hi = min(n_frames, end + plan.margin)
+            # チャンクは float32 で保持し、段ごとに MEA のメソッドと同じく float32 に丸める
+            y = np.empty((len(chs), hi - lo), dtype=float32)
+            array.read_voltages(lo, hi, out=y, chs=chs)
+            for stage in stages:
+                if stage.per_channel:
+                    for a in range(0, len(chs), plan.channels_per_block):
+                        rows = slice(a, a + plan.channels_per_block)
+                        y[rows] = stage.apply(y[rows].astype(float64), sampling_rate)
+                else:
+                    for a in range(0, hi - lo, plan.frames_per_slice):
+                        cols = slice(a, a + plan.frames_per_slice)
+                        y[:, cols] = stage.apply(y[:, cols], sampling_rate)
+            out[:, start:end] = y[:, start - lo : end - lo]
+
+        starts = range(0, n_frames, plan.chunk_frames)
+        if plan.workers > 1:
+            with ThreadPoolExecutor(max_workers=plan.workers) as pool:
+                # 例外を呼び出し側に伝えるため結果を取り出す
+                list(pool.map(run_chunk, starts))
+        else:
+            for start in starts:
+                run_chunk(start)
+        if owned:
+            out.setflags(write=False)
+        elif isinstance(out, np.memmap):
+            out.flush()
+        return out
+
+    def plan(
+        self,
+        n_frames: int,
+        chs: list[int],
+        sampling_rate: int,
+        workers: int | None = None,
+        max_bytes: int | None = None,
+    ) -> "ChunkPlan":
+        """
+        run がどの長さのチャンクをいくつ並列に処理するか (と1チャンクの作業領域) を求める
+        ----------
+        max_bytes に1チャンクも収まらない場合は ValueError を送出する。
+        """
+        max_bytes = DEFAULT_MAX_CHUNK_BYTES if max_bytes is None else max_bytes
+        if max_bytes <= 0:
+            raise ValueError("max_bytesは正の値で入力してください")
+        stages = self._resolve(n_frames, chs)
+        margin = sum(stage.margin(sampling_rate) for stage in stages)
+        align = math.lcm(1, *(stage.alignment() for stage in stages))
+        min_chunk = max(MIN_CHUNK_MARGINS * margin, 1)
+        if self.chunk_s is None:
+            chunk = max(int(DEFAULT_CHUNK_SECONDS * sampling_rate), min_chunk)
+            *_, nbytes = _layout(
+                stages, len(chs), n_frames, chunk, margin, align, max_bytes
+            )
+            if nbytes > max_bytes:
+                # 上限に収まらなければのりしろの下限まで短くする
+                chunk = min_chunk
+        else:
+            chunk = max(int(self.chunk_s * sampling_rate), 1)
+        rows, cols, chunk_bytes = _layout(
+            stages, len(chs), n_frames, chunk, margin, align, max_bytes
+        )
+        if chunk_bytes > max_bytes:
+            raise ValueError(
+                f"1チャンクの作業領域 ({chunk_bytes} バイト) が max_bytes ({max_bytes} "
+                f"バイト) を超えます。max_bytes を増やすか、chunk_s を短くしてください"
+            )
+        n_chunks = math.ceil(n_frames / chunk) if n_frames else 0
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, n_chunks, max_bytes // chunk_bytes)
+        return ChunkPlan(
+            chunk_frames=chunk,
+            margin=margin,
+            alignment=align,
+            channels_per_block=rows,
+            frames_per_slice=cols,
+            chunk_bytes=chunk_bytes,
+            workers=max(workers, 1),
+        )
+
+    def _resolve(self, n_frames: int, chs: list[int]) -> list[FilterStage]:
+        return [stage.resolve(n_frames, chs) for stage in self.stages]
+
+
+@dataclass(frozen=True)
+class ChunkPlan:
+    """
+    FilterPipeline.run の分割の仕方
+    ----------
+    Args:
+        chunk_frames: 1チャンクの出力のフレーム数
+        margin: チャンクの前後に読むのりしろ (フレーム数)
+        alignment: チャンクの読み出し開始フレームを揃える倍数
+        channels_per_block: 電極ごとの段を float64 で計算する電極ブロックの電極数
+        frames_per_slice: 時刻ごとの段を計算する時間方向の区切りのフレーム数
+        chunk_bytes: 1チャンクの処理中に確保する作業領域のバイト数 (見積もり)
+        workers: 並列に処理するチャンク数
+    """
+
+    chunk_frames: int
+    margin: int
+    alignment: int
+    channels_per_block: int
+    frames_per_slice: int
+    chunk_bytes: int
+    workers: int
+
+
+def _layout(
+    stages: list[FilterStage],
+    n_channels: int,
+    n_frames: int,
+    chunk: int,
+    margin: int,
+    align: int,
+    max_bytes: int,
+) -> tuple[int, int, int]:
+    """
+    1チャンクの電極ブロックの電極数・時間方向の区切りのフレーム数・作業領域のバイト数
+    ----------
+    作業領域は float32 のバッファ (のりしろを含む全電極) に、電極ブロックの float64 の
+    作業配列 (_BLOCK_COPIES 個) と時間方向の区切りの作業配列を足したもの。電極ブロックは
+    BLOCK_SAMPLES 程度を目安に、max_bytes の残りに収まるまで小さくする (最小1電極)。
+    """
+    length = max(min(chunk + 2 * margin + align - 1, n_frames), 1)
+    nbytes = n_channels * length * np.dtype(float32).itemsize
+    cols = max(1, min(length, BLOCK_SAMPLES // max(n_channels, 1)))
+    if not all(stage.per_channel for stage in stages):
+        # 中央値は区切りの転置コピーと結果を作る
+        nbytes += 2 * n_channels * cols * np.dtype(float32).itemsize
+    rows = max(n_channels, 1)
+    if any(stage.per_channel for stage in stages):
+        row_bytes = length * np.dtype(float64).itemsize * _BLOCK_COPIES
+        rows = min(rows, BLOCK_SAMPLES // length, (max_bytes - nbytes) // row_bytes)
+        rows = max(rows, 1)
+        nbytes += rows * row_bytes
+    return rows, cols, nbytes
+
+
+def _decay_frames(poles) -> int:
+    """最も遅い極のインパルス応答が IMPULSE_TOL まで減衰するフレーム数"""
+    radius = float(np.max(np.abs(poles)))
+    if radius <= 0:
+        return 0
+    return int(math.ceil(math.log(IMPULSE_TOL) / math.log(radius)))
+
+
+# read_MEA の FilterType プリセットと同じ処理のパイプライン (filter_to_npy 等、記録全体を
+# メモリに載せずに処理するときに使う。read_MEA はメモリ上の電位にメソッドチェーンでかける)
+PRESET_PIPELINES: dict[FilterType, FilterPipeline] = {
+    # 心筋(強〜中信号): ドリフト除去 + 共通モードノイズ除去
+    FilterType.CARDIO_DENOISE: FilterPipeline().highpass(1).common_median_reference(),
+    # 微弱心筋: 帯域通過(広帯域ノイズ除去) + 共通モードノイズ除去
+    FilterType.CARDIO_DENOISE_WEAK: FilterPipeline()
+    .bandpass(1, 1000)
+    .common_median_reference(),
+    # 神経: スパイク帯のみ通過
+    FilterType.NEURO_DENOISE: FilterPipeline().bandpass(100, 3000),
+}
@@ -1,15 +1,41 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from functools import cached_property
+from typing import TYPE_CHECKING
 
 import numpy as np
 import pywt
-from numpy import append, empty, float64, linspace, median, ndarray, pad
+from numpy import empty, float64, linspace, ndarray, pad
 from numpy._typing import NDArray
-from scipy.signal import butter, filtfilt, iirnotch, sosfiltfilt
+from scipy.signal import filtfilt, sosfiltfilt
 
 from pyMEA.constants import NUM_ELECTRODES
 from pyMEA.domain.model.peak_model import Peaks64
 from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.ChannelSubsetArray import ChannelSubsetArray
+from pyMEA.domain.model.QuantizedArray import QuantizedArray
+from pyMEA.domain.model.SharedMEA import (
+    SharedMEA,
+    SharedMEAHandle,
+    attach_shared_voltages,
+    create_shared_voltages,
+)
+from pyMEA.domain.model.TimeAxis import TimeAxis
+from pyMEA.domain.model.VoltageArray import VoltageArray, is_read_only
+from pyMEA.domain.model.VoltageBlock import VoltageBlock
+from pyMEA.domain.filtering import (
+    butter_sos,
+    common_median_reference_block,
+    filter_block,
+    fir_filter_block,
+    fir_taps,
+    method_step,
+    notch_ba,
+)
+from pyMEA.domain.result_cache import cached_arrays
+
+if TYPE_CHECKING:
+    from pyMEA.domain.model.CausalFilter import CausalFilter
+    from pyMEA.domain.model.FilterPipeline import FilterPipeline
 
 
 @dataclass(frozen=True)
@@ -29,11 +55,34 @@ class MEA:
         返る dtype が異なる:
 
         - 正確な時刻 (float64) が必要なとき   : ``mea[0]`` または ``mea.times`` を使う
+          (ピーク位置の時刻だけが必要なら、全長の配列を作らない ``mea.time_axis`` を使う)
         - 電位データ (float32)                : ``mea[ch]`` (ch>=1) / ``mea.array[ch]``
         - 複数行スライス (``mea[0:3]``,
           ``mea[:, a:b]``, ``np.array(mea)``) : 生の float32 配列を返す。
           時刻行も float32 精度になる (常用域では誤差 ~1e-7 s で無害だが、start が大きい
           長時間記録では劣化する)。時刻を正確に扱う場合は上記 ``mea[0]`` / ``mea.times`` を使うこと。
+
+    内部表現:
+        (65, N) の ndarray を渡すと、電位の (64, N) ブロックだけを VoltageBlock として保持する。
+        時刻行は start/SAMPLING_RATE から導出するため保持せず、各変換 (フィルタ・
+        init_time・down_sampling) も時刻行を組み立て直さない。``mea.array[ch]`` /
+        ``mea.array[1:]`` はこのブロックのビューを返し、``mea.shape`` は (65, N) のまま。
+
+    由来 (lineage) とキャッシュ:
+        read_MEA 等で読み込んだ MEA は元ファイルの指紋と読込区間を由来として持ち、
+        切り出し・フィルタのたびに処理とパラメータが由来に追記される。
+        set_result_cache でキャッシュを登録すると、フィルタ結果は由来をキーに保存され、
+        同じ記録に同じ処理をかけたときは再計算せずに読み込む (由来が不明な MEA は常に計算する)。
+
+    遅延バックエンド:
+        array に VoltageArray (例: .bio の memmap) を渡すとコピーせずに保持し、
+        ``mea[ch]`` や ``from_slice``・各フィルタは触れた電極・区間だけを復号する。
+        ``quantize()`` は電位を int16 + scale (QuantizedArray) で保持し直し、メモリを
+        float32 のさらに半分にする (アクセス時に電極ごとに float32 へ戻す)。
+
+    複数プロセスでの共有:
+        ``to_shared()`` は電位を共有メモリに1度だけコピーし、小さなハンドルを返す。
+        ワーカーは ``MEA.from_shared(handle)`` でコピーせずに同じ電位を参照する。
     """
 
     hed_path: HedPath
@@ -41,14 +90,27 @@ class MEA:
     end: int | float
     SAMPLING_RATE: int
     GAIN: int
-    array: NDArray[float64]
+    # (65, N) の ndarray を渡すと VoltageBlock として保持する (ndarray の属性はそのまま使える)
+    array: NDArray[np.float32] | VoltageArray
+    # 電位データの由来 (元ファイルの指紋・読込区間・適用した処理の列)。不明なら None
+    lineage: tuple | None = field(default=None, compare=False, repr=False)
 
     def __post_init__(self):
+        # 遅延バックエンド (memmap 等) はアクセス時に float32 へ復号するためそのまま保持する
+        if isinstance(self.array, VoltageArray):
+            return
         # 電位データは float32 で保持しメモリを半減する（情報量は元々16bitで実質無損失）。
-        # 時刻行(array[0])は float32 だと長時間記録で精度不足になるため、
-        # 正確な時刻は times プロパティ(float64)で別途再生成して配信する。
-        arr = np.array(self.array, dtype=np.float32)
-        arr.setflags(write=False)
+        # 時刻行(array[0])は保持せず、正確な時刻は times プロパティ(float64)で再生成する。
+        # 元の配列まで読み取り専用の float32 配列は変更されるおそれがないため、
+        # 電位行のビューをコピーせずにそのまま共有する (それ以外はコピーする)。
+        arr = self.array
+        if isinstance(arr, ndarray) and arr.ndim == 2 and len(arr) == NUM_ELECTRODES + 1:
+            block = VoltageBlock(arr[1:], self.start, self.SAMPLING_RATE)
+            object.__setattr__(self, "array", block)
+            return
+        if not (isinstance(arr, ndarray) and arr.dtype == np.float32 and is_read_only(arr)):
+            arr = np.array(arr, dtype=np.float32)
+            arr.setflags(write=False)
         object.__setattr__(self, "array", arr)
 
     @cached_property
@@ -61,17 +123,25 @@ class MEA:
 
         メモリ冗長を避けるため常駐させず(キャッシュしない)、アクセス時に都度生成する。
         時刻は start/SAMPLING_RATE/列数から復元できるので保持は不要。
+        全長の配列を確保せずに一部の時刻だけが必要なときは time_axis を使う。
         """
-        t = np.arange(self.array.shape[1], dtype=np.float64) / self.SAMPLING_RATE
-        t = t + self.start
+        t = np.asarray(self.time_axis)
         t.setflags(write=False)
         return t
 
+    @property
+    def time_axis(self) -> TimeAxis:
+        """times と同じ値を持つ、配列を確保しない時刻軸 (TimeAxis)。
+
+        ``mea.time_axis[peaks]`` はピーク数ぶんだけ、``mea.time_axis[a:b]`` は O(1) で求まる。
+        """
+        return TimeAxis(self.array.shape[1], self.start, self.SAMPLING_RATE)
+
     def __repr__(self):
         return repr(self.array)
 
     def __getitem__(self, index: int) -> ndarray:
-        # 時刻行は float64 の正確な時刻軸(times)を返す。電位行は float32 のまま。
+        # 時刻行は float64 の正確な時刻(times)を返す。電位行は float32 のまま。
         if isinstance(index, (int, np.integer)) and index == 0:
             return self.times
         return self.array[index]
@@ -113,7 +183,149 @@ class MEA:
     def shape(self) -> tuple[int, ...]:
         return self.array.shape
 
+    @property
+    def channels(self) -> list[int]:
+        """保持している電極番号 (チャンネルマップ)。通常は 1〜64 のすべて"""
+        if isinstance(self.array, VoltageArray):
+            return self.array.channels
+        return list(range(1, NUM_ELECTRODES + 1))
+
+    def with_lineage(self, lineage: tuple | None) -> "MEA":
+        """由来を付け替えた MEA を返す (電位データは共有する)"""
+        return replace(self, lineage=None if lineage is None else tuple(lineage))
+
+    def _derived_lineage(self, step: tuple) -> tuple | None:
+        # 由来がわかっていれば、処理 step を追記した由来を派生した MEA に引き継ぐ
+        return None if self.lineage is None else (*self.lineage, step)
+
+    def to_shared(self) -> SharedMEA:
+        """電位データを共有メモリにコピーし、別プロセスで開くためのハンドルを返す。
+
+        Returns
+        -------
+        SharedMEA
+            ``handle`` (SharedMEAHandle) をワーカーに渡し、ワーカー側で
+            ``MEA.from_shared(handle)`` を呼ぶ。pickle されるのはハンドルだけなので、
+            タスクごとに電位データを転送しない。共有メモリは with 文を抜けるか
+            ``unlink()`` / ``close()`` を呼んで明示的に解放する
+
+        Examples
+        --------
+        >>> with mea.to_shared() as shared:
+        ...     with ProcessPoolExecutor() as pool:
+        ...         results = list(pool.map(work, repeat(shared.handle), range(1, 65)))
+        """
+        if not isinstance(self.array, VoltageArray):
+            raise ValueError("共有メモリに置けるのは (65, N) の電位データだけです")
+        chs = self.channels
+        shm, voltages = create_shared_voltages((len(chs), self.array.shape[1]))
+        # 遅延バックエンド・量子化データも共有メモリへ直接復号する (中間配列なし)
+        self.array.read_voltages(0, self.array.shape[1], out=voltages, chs=chs)
+        del voltages
+        handle = SharedMEAHandle(
+            name=shm.name,
+            shape=(len(chs), self.array.shape[1]),
+            channels=tuple(chs),
+            hed_path=self.hed_path,
+            start=self.start,
+            end=self.end,
+            sampling_rate=self.SAMPLING_RATE,
+            gain=self.GAIN,
+            lineage=self.lineage,
+        )
+        return SharedMEA(shm, handle)
+
+    @classmethod
+    def from_shared(cls, handle: SharedMEAHandle) -> "MEA":
+        """to_shared() で共有メモリに置いた MEA を開く (電位データはコピーしない)。
+
+        Parameters
+        ----------
+        handle : SharedMEAHandle
+            ``MEA.to_shared().handle``
+
+        Returns
+        -------
+        MEA
+            共有メモリ上の電位を読み取り専用で参照する MEA。共有メモリへの参照は
+            この MEA (と電位のビュー) が破棄されたときに手放す
+        """
+        shm, voltages = attach_shared_voltages(handle)
+        if handle.channels == tuple(range(1, NUM_ELECTRODES + 1)):
+            array = VoltageBlock(voltages, handle.start, handle.sampling_rate)
+        else:
+            array = ChannelSubsetArray(
+                voltages, list(handle.channels), handle.start, handle.sampling_rate
+            )
+        mea = cls(
+            handle.hed_path,
+            handle.start,
+            handle.end,
+            handle.sampling_rate,
+            handle.gain,
+            array,
+            handle.lineage,
+        )
+        # 共有メモリは MEA が生きている間は開いたままにする
+        object.__setattr__(mea, "_shared_memory", shm)
+        return mea
+
+    def quantize(self, scale: float | None = None) -> "MEA":
+        """電位を int16 + scale で保持した MEA を返す (メモリは float32 の半分)。
+
+        Parameters
+        ----------
+        scale : float | None
+            int16 → 電位 (μV) の換算係数。None なら max(|V|)/32767
+
+        Returns
+        -------
+        MEA
+            array が QuantizedArray の新しいインスタンス。``mea[ch]``・フィルタ・
+            ピーク検出はそのまま使え、電極1本ずつ float32 に戻して計算する
+            (フィルタ結果は float32 の MEA になる)
+        """
+        if isinstance(self.array, QuantizedArray) and scale is None:
+            return self
+        quantized = QuantizedArray.from_channels(
+            self.array, self.channels, self.start, self.SAMPLING_RATE, scale
+        )
+        return MEA(
+            self.hed_path,
+            self.start,
+            self.end,
+            self.SAMPLING_RATE,
+            self.GAIN,
+            quantized,
+            self._derived_lineage(("quantize", quantized.scale)),
+        )
+
+    def window(self, t0: float, t1: float) -> "MEA":
+        """時刻 [t0, t1) (s) の区間を切り出した MEA を返す。
+
+        Parameters
+        ----------
+        t0 : float
+            切り出し開始時刻 (s)。記録全体の時刻 (start 基準ではない)
+        t1 : float
+            切り出し終了時刻 (s)
+
+        Returns
+        -------
+        MEA
+            元の電位データを共有するビュー (電位データはコピーしない)。
+            遅延バックエンド・量子化データでも O(1) で切り出せる
+        """
+        start_frame = int(round((t0 - self.start) * self.SAMPLING_RATE))
+        end_frame = int(round((t1 - self.start) * self.SAMPLING_RATE))
+        if start_frame < 0 or end_frame > self.array.shape[1]:
+            raise ValueError("切り出し区間が読み込み区間の外です")
+        if start_frame > end_frame:
+            raise ValueError("start < endになるように入力してください")
+        return self.from_slice(start_frame, end_frame)
+
     def from_slice(self, start_frame: int | float, end_frame: int | float):
+        """フレーム番号 [start_frame, end_frame) を切り出した MEA を返す (電位データは共有)"""
         return MEA(
             self.hed_path,
             start_frame / self.SAMPLING_RATE + self.start,
@@ -121,6 +333,7 @@ class MEA:
             self.SAMPLING_RATE,
             self.GAIN,
             self.array[:, int(start_frame) : int(end_frame)],
+            self._derived_lineage(("slice", int(start_frame), int(end_frame))),
         )
 
     def from_beat_cycles(
@@ -136,7 +349,8 @@ class MEA:
 
         Returns list[MEA]
         -------
-
+        各拍動周期は元の電位データを共有するビューなので、拍動数によらず追加の
+        電位メモリは使わない。
         """
         result: list[MEA] = []
         half_window = int(margin_time * self.SAMPLING_RATE)
@@ -153,8 +367,12 @@ class MEA:
     def init_time(self):
         """時刻データを0 (s)からにしたMEAインスタンスを返却"""
         n = self.array.shape[1]
-        t = (np.arange(n, dtype=float64) / self.SAMPLING_RATE).reshape(1, n)
-        new_array = append(t, self.array[1:], axis=0)
+        # 時刻行は start から導出するため、電位データは共有したまま start だけ差し替える
+        if isinstance(self.array, VoltageArray):
+            new_array = self.array[:, :]
+            new_array.start = 0
+        else:
+            new_array = self.array
 
         return MEA(
             self.hed_path,
@@ -163,27 +381,24 @@ class MEA:
             SAMPLING_RATE=self.SAMPLING_RATE,
             GAIN=self.GAIN,
             array=new_array,
+            lineage=self._derived_lineage(("init_time",)),
         )
 
     def down_sampling(self, down_sampling_rate=100):
+        # 一部の電極だけを持つ場合は、同じチャンネルマップのまま間引く
         new_voltages = [
-            downsample_max_min(self.array[i], down_sampling_rate * 2)
-            for i in range(1, NUM_ELECTRODES + 1)
+            downsample_max_min(self.array[ch], down_sampling_rate * 2)
+            for ch in self.channels
         ]
         new_sampling_rate = int(self.SAMPLING_RATE / down_sampling_rate)
         n = len(new_voltages[0])
         end = n / new_sampling_rate + self.start
 
-        t = (np.arange(n, dtype=float64) / new_sampling_rate + self.start).reshape(1, n)
-        new_array = append(t, new_voltages, axis=0)
-
-        return MEA(
-            self.hed_path,
-            self.start,
-            end,
+        return self._rebuild_voltages(
+            _stack_voltages(new_voltages),
+            ("down_sampling", down_sampling_rate),
             new_sampling_rate,
-            self.GAIN,
-            new_array,
+            end,
         )
 
     def iirnotch_filter(self, filter_hz=50, Q=30):
@@ -202,13 +417,14 @@ class MEA:
         filtered : MEA
             フィルタ後の信号
         """
-        new_voltages = [
-            iirnotch_filter_single_ch(self.array[ch], self.SAMPLING_RATE, filter_hz, Q)
-            for ch in range(1, NUM_ELECTRODES + 1)
-        ]
-        return self._rebuild_voltages(new_voltages)
+        return self._transform(
+            ("iirnotch", filter_hz, Q),
+            lambda: self._filter_voltages(
+                lambda x: iirnotch_filter_single_ch(x, self.SAMPLING_RATE, filter_hz, Q)
+            ),
+        )
 
-    def highpass(self, cutoff=1, order=4):
+    def highpass(self, cutoff=1, order=4, dtype=float64, method="iir"):
         """
         ハイパスフィルタ（ゼロ位相 Butterworth）でベースラインドリフトを除去する。
 
@@ -218,19 +434,25 @@ class MEA:
             下限カットオフ周波数 [Hz]（デフォルト 1 Hz）
         order : int, optional
             フィルタ次数（デフォルト 4）
+        dtype : numpy.dtype, optional
+            計算精度（デフォルト float64）。float32 にすると計算が速く、中間配列も半分になる。
+            ただしカットオフがサンプリング周波数に比べて極端に低い (1/1000 程度以下) と
+            係数の丸めで誤差が大きくなるため、その場合は float64 を使う
+        method : str, optional
+            "iir"（デフォルト）は Butterworth の順逆2回がけ。"fir" は線形位相 FIR
+            (Kaiser 窓, 遷移幅 = cutoff) を FFT でかける。0.1 Hz など極端に低い
+            カットオフでも安定して速い (order は使わない)
 
         Returns
         -------
         MEA
             フィルタ後の新しいインスタンス（ピークタイミングは不変）
         """
-        new_voltages = [
-            zero_phase_butter(self.array[ch], self.SAMPLING_RATE, cutoff, "highpass", order)
-            for ch in range(1, NUM_ELECTRODES + 1)
-        ]
-        return self._rebuild_voltages(new_voltages)
+        return self._zero_phase(
+            ("highpass", cutoff, order), "highpass", cutoff, order, dtype, method
+        )
 
-    def bandpass(self, low, high, order=4):
+    def bandpass(self, low, high, order=4, dtype=float64, method="iir"):
         """
         バンドパスフィルタ（ゼロ位相 Butterworth）で指定帯域のみ通す。
 
@@ -242,32 +464,75 @@ class MEA:
             上限カットオフ周波数 [Hz]
         order : int, optional
             フィルタ次数（デフォルト 4）
+        dtype : numpy.dtype, optional
+            計算精度（デフォルト float64）。float32 にすると計算が速く、中間配列も半分になる。
+            ただしカットオフがサンプリング周波数に比べて極端に低い (1/1000 程度以下) と
+            係数の丸めで誤差が大きくなるため、その場合は float64 を使う
+        method : str, optional
+            "iir"（デフォルト）は Butterworth の順逆2回がけ。"fir" は線形位相 FIR
+            (Kaiser 窓) を FFT でかける (order は使わない)
 
         Returns
         -------
         MEA
             フィルタ後の新しいインスタンス（ピークタイミングは不変）
         """
-        new_voltages = [
-            zero_phase_butter(self.array[ch], self.SAMPLING_RATE, [low, high], "bandpass", order)
-            for ch in range(1, NUM_ELECTRODES + 1)
-        ]
-        return self._rebuild_voltages(new_voltages)
+        return self._zero_phase(
+            ("bandpass", low, high, order), "bandpass", [low, high], order, dtype, method
+        )
 
-    def common_median_reference(self):
+    def _zero_phase(self, step: tuple, btype: str, Wn, order, dtype, method) -> "MEA":
+        """Butterworth (IIR) か線形位相 FIR (FFT) のゼロ位相フィルタをかける"""
+        step = (*step, *_precision_step(dtype), *method_step(method))
+        if method == "fir":
+            return self._transform(
+                step,
+                lambda: fir_filter_block(
+                    self._voltage_source(),
+                    self.channels,
+                    fir_taps(self.SAMPLING_RATE, btype, Wn),
+                    dtype,
+                ),
+            )
+        return self._transform(
+            step,
+            lambda: self._filter_voltages(
+                lambda x: zero_phase_butter(
+                    x, self.SAMPLING_RATE, Wn, btype, order, dtype
+                ),
+                dtype,
+            ),
+        )
+
+    def common_median_reference(self, exclude=()):
         """
         各時刻で全電極の中央値を減算し、電極間で共通するノイズ（電源・参照ドリフト等）を除去する。
 
+        Parameters
+        ----------
+        exclude : Iterable[int], optional
+            中央値の計算から除く電極番号（断線・飽和した電極など）。
+            除いた電極の電位からも中央値は減算する
+
         Returns
         -------
         MEA
             ノイズ除去後の新しいインスタンス
+
+        Notes
+        -----
+        時間チャンクごとに中央値を求めて出力へ直接書き込むため、
+        計算時間は記録長に比例し、中間配列はチャンク数個分で済む。
+        一部の電極だけを持つ場合は、保持している電極の中央値を参照にする。
         """
-        ref = median(self.array[1 : NUM_ELECTRODES + 1], axis=0)
-        new_voltages = [
-            self.array[ch] - ref for ch in range(1, NUM_ELECTRODES + 1)
-        ]
-        return self._rebuild_voltages(new_voltages)
+        exclude = tuple(sorted(set(exclude)))
+        step = ("common_median_reference", *((exclude,) if exclude else ()))
+        return self._transform(
+            step,
+            lambda: common_median_reference_block(
+                self._voltage_source(), self.channels, exclude
+            ),
+        )
 
     def wavelet_denoise(self, wavelet="db4", level=None):
         """
@@ -289,34 +554,181 @@ class MEA:
         -----
         微弱信号では弱いスパイクごと削るおそれがあるため、検出率を確認すること。
         """
-        new_voltages = [
-            wavelet_denoise_single_ch(self.array[ch], wavelet, level)
-            for ch in range(1, NUM_ELECTRODES + 1)
-        ]
-        return self._rebuild_voltages(new_voltages)
+        return self._transform(
+            ("wavelet_denoise", wavelet, level),
+            lambda: [
+                wavelet_denoise_single_ch(self.array[ch], wavelet, level)
+                for ch in self.channels
+            ],
+        )
 
-    def _rebuild_voltages(self, new_voltages) -> "MEA":
-        """時刻行を保持したまま電位データを差し替えた新しい MEA を返す。"""
-        t = self.array[0].reshape(1, len(self.array[0]))
-        new_array = append(t, new_voltages, axis=0)
+    def apply_pipeline(
+        self,
+        pipeline: "FilterPipeline",
+        out: NDArray[np.float32] | None = None,
+        workers: int | None = None,
+        max_bytes: int | None = None,
+    ) -> "MEA":
+        """
+        FilterPipeline の全段を時間チャンクごとにまとめて適用する。
+
+        Parameters
+        ----------
+        pipeline : FilterPipeline
+            適用するフィルタの列 (例: ``FilterPipeline().highpass(1).common_median_reference()``)
+        out : ndarray | None, optional
+            結果の書き込み先 (電極数, N) の float32 配列。np.memmap を渡すと結果を
+            ディスクに書き、返す MEA もその memmap を参照する (結果キャッシュは使わない)。
+            書き込み後の out は読み取り専用になる (out が書き込み可能な配列のビューなら
+            MEA は結果をコピーして保持する)
+        workers : int | None, optional
+            並列に処理するチャンク数の上限 (None なら CPU 数)
+        max_bytes : int | None, optional
+            同時に処理するチャンクの作業領域の合計の上限 (None なら 512 MiB)。
+            1チャンクも収まらなければ ValueError を送出する
+
+        Returns
+        -------
+        MEA
+            フィルタ後の新しいインスタンス。メソッドチェーンで1段ずつかけた結果と
+            許容誤差内で一致し、途中の段の電位 (記録全体の長さ) を確保しない
+        """
+
+        def compute() -> NDArray[np.float32]:
+            return pipeline.run(
+                self._voltage_source(),
+                self.channels,
+                self.SAMPLING_RATE,
+                workers=workers,
+                out=out,
+                max_bytes=max_bytes,
+            )
+
+        if out is None:
+            return self._transform(pipeline.step(), compute)
+        # 書き込み先を読み取り専用にして MEA に引き渡す (コピーしない)
+        voltages = compute()
+        voltages.setflags(write=False)
+        return self._rebuild_voltages(voltages, pipeline.step())
+
+    def causal_filter(self, causal: "CausalFilter", block_s: float = 1.0) -> "MEA":
+        """
+        因果フィルタを先頭から block_s 秒ずつ、状態を引き継ぎながら適用する。
+
+        Parameters
+        ----------
+        causal : CausalFilter
+            適用するフィルタ (例: ``CausalFilter.highpass(mea.SAMPLING_RATE, 1)``)。
+            渡したフィルタの状態は変更せず、初期状態から計算する
+        block_s : float, optional
+            1ブロックの長さ [s]。結果はブロック長によらずビット単位で同じになる
+
+        Returns
+        -------
+        MEA
+            フィルタ後の新しいインスタンス (片方向のためピークは遅れる)
+        """
+        if block_s <= 0:
+            raise ValueError("block_sは正の値で入力してください")
+
+        def compute() -> NDArray[np.float32]:
+            source = self._voltage_source()
+            n_frames = source.n_frames
+            block = max(1, int(block_s * self.SAMPLING_RATE))
+            filt = causal.clone(n_channels=len(self.channels))
+            out = np.empty((len(self.channels), n_frames), dtype=np.float32)
+            for a in range(0, n_frames, block):
+                b = min(a + block, n_frames)
+                out[:, a:b] = filt.process(source[:, a:b])
+            out.setflags(write=False)
+            return out
+
+        return self._transform(causal.step(), compute)
+
+    def _voltage_source(self) -> VoltageArray:
+        """電位を VoltageArray として返す (ndarray で保持している場合は包む)"""
+        if isinstance(self.array, VoltageArray):
+            return self.array
+        voltages = np.asarray(self.array)[1 : NUM_ELECTRODES + 1]
+        return VoltageBlock(voltages, self.start, self.SAMPLING_RATE)
+
+    def _filter_voltages(self, func, dtype=float64) -> NDArray[np.float32]:
+        """保持している全電極の電位に func を axis=-1 でまとめて適用する (電極数, N)"""
+        return filter_block(self._voltage_source(), self.channels, func, dtype)
+
+    def _transform(self, step: tuple, compute) -> "MEA":
+        """compute() が返す電極ごとの電位で差し替えた MEA を返す。
+
+        由来がわかっていれば (由来, step) をキーに結果キャッシュを引き、
+        ヒットすれば compute() を呼ばずに保存済みの電位 (memmap) を使う。
+        """
+        lineage = self.lineage
+        arrays = cached_arrays(
+            None if lineage is None else ("MEA", lineage, step),
+            lambda: {"voltages": _stack_voltages(compute())},
+        )
+        return self._rebuild_voltages(arrays["voltages"], step)
+
+    def _rebuild_voltages(
+        self,
+        voltages: NDArray[np.float32],
+        step: tuple,
+        sampling_rate: int | None = None,
+        end: int | float | None = None,
+    ) -> "MEA":
+        """時刻の範囲を保ったまま電位データを差し替えた新しい MEA を返す。
+
+        voltages は self.channels と同じ順に並んだ (電極数, N) の電位で、
+        由来には差し替えた処理 step を追記する。
+        一部の電極だけを持つ場合は、同じチャンネルマップのまま差し替える。
+        間引いた場合は新しい sampling_rate と end を渡す。
+        """
+        sampling_rate = self.SAMPLING_RATE if sampling_rate is None else sampling_rate
+        end = self.time_axis[-1] if end is None else end
+        if len(self.channels) != NUM_ELECTRODES:
+            new_array = ChannelSubsetArray(
+                voltages, self.channels, self.start, sampling_rate
+            )
+        else:
+            new_array = VoltageBlock(voltages, self.start, sampling_rate)
         return MEA(
             self.hed_path,
             self.start,
-            self.times[-1],
-            self.SAMPLING_RATE,
+            end,
+            sampling_rate,
             self.GAIN,
             new_array,
+            self._derived_lineage(step),
         )
 
 
-def zero_phase_butter(signal, fs, Wn, btype, order=4):
+def _stack_voltages(voltages) -> NDArray[np.float32]:
+    """電極ごとの電位を1つの読み取り専用 float32 (電極数, N) 配列にまとめる。
+
+    出力を1回だけ確保して各行を直接書き込むため、float64 の中間配列や
+    時刻行を足し直すコピーが発生しない。既にまとまった float32 配列はそのまま使う。
+    """
+    if isinstance(voltages, ndarray) and voltages.ndim == 2:
+        if voltages.dtype == np.float32 and not voltages.flags.writeable:
+            return voltages
+        out = voltages.astype(np.float32)
+        out.setflags(write=False)
+        return out
+    out = np.empty((len(voltages), len(voltages[0]) if voltages else 0), dtype=np.float32)
+    for i, v in enumerate(voltages):
+        out[i] = v
+    out.setflags(write=False)
+    return out
+
+
+def zero_phase_butter(signal, fs, Wn, btype, order=4, dtype=float64):
     """
     Butterworth フィルタを順逆2回がけ（ゼロ位相）で適用する。
 
     Parameters
     ----------
     signal : array_like
-        入力信号（1次元配列）
+        入力信号。(電極数, N) の2次元配列なら各行を axis=-1 でまとめて処理する
     fs : float
         サンプリング周波数 [Hz]
     Wn : float | list[float]
@@ -325,14 +737,18 @@ def zero_phase_butter(signal, fs, Wn, btype, order=4):
         "highpass" または "bandpass"
     order : int, optional
         フィルタ次数（デフォルト 4）
+    dtype : numpy.dtype, optional
+        計算精度（デフォルト float64）。float32 の入力でも既定では float64 で計算する。
+        float32 を指定すると信号・係数とも float32 のまま計算する (速いが誤差が大きい)
 
     Returns
     -------
     filtered : ndarray
-        フィルタ後の信号（位相遅延なし）
+        フィルタ後の信号（位相遅延なし）。dtype の配列
     """
-    sos = butter(order, Wn, btype=btype, fs=fs, output="sos")
-    return sosfiltfilt(sos, signal)
+    sos = butter_sos(fs, Wn, btype, order)
+    dtype = _compute_dtype(dtype)
+    return sosfiltfilt(sos.astype(dtype), np.asarray(signal, dtype=dtype), axis=-1)
 
 
 def wavelet_denoise_single_ch(signal, wavelet="db4", level=None, max_level=6):
@@ -370,35 +786,53 @@ def wavelet_denoise_single_ch(signal, wavelet="db4", level=None, max_level=6):
     return pywt.waverec(coeffs, wavelet)[: len(signal)]
 
 
-def iirnotch_filter_single_ch(signal, fs, f0=50, Q=30):
+def iirnotch_filter_single_ch(signal, fs, f0=50, Q=30, dtype=float64):
     """
     IIRノッチフィルタで特定周波数のノイズを除去する関数
 
     Parameters
     ----------
     signal : array_like
-        入力信号（1次元配列）
+        入力信号。(電極数, N) の2次元配列なら各行を axis=-1 でまとめて処理する
     fs : float
         サンプリング周波数 [Hz]
     f0 : float, optional
         除去したい周波数（デフォルト 50 Hz）
     Q : float, optional
         Q値（ノッチの鋭さ、デフォルト 30）
+    dtype : numpy.dtype, optional
+        計算精度（デフォルト float64）。float32 を指定すると float32 のまま計算する
 
     Returns
     -------
     filtered : ndarray
-        フィルタ後の信号
+        フィルタ後の信号。dtype の配列
     """
     # ノッチフィルタ設計
-    b, a = iirnotch(f0, Q, fs)
+    b, a = notch_ba(fs, f0, Q)
+    dtype = _compute_dtype(dtype)
 
     # 前後方向フィルタ（位相歪み補正）
-    filtered = filtfilt(b, a, signal)
+    signal = np.asarray(signal, dtype=dtype)
+    filtered = filtfilt(b.astype(dtype), a.astype(dtype), signal, axis=-1)
 
     return filtered
 
 
+def _compute_dtype(dtype) -> np.dtype:
+    """計算精度を float32 か float64 の dtype にする"""
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("dtypeはfloat32かfloat64で指定してください")
+    return dtype
+
+
+def _precision_step(dtype) -> tuple:
+    """由来に記録する計算精度。既定の float64 は従来の由来 (キャッシュキー) と同じにする"""
+    dtype = _compute_dtype(dtype)
+    return () if dtype == float64 else (dtype.name,)
+
+
 def downsample_max_min(arr: NDArray[float64], factor: int) -> NDArray[float64]:
     """
     Max-min ダウンサンプリング（NumPyベース）
@@ -0,0 +1,129 @@
+"""int16 + scale で電位を保持する (65, N) 互換の電位配列。"""
+
+import numpy as np
+from numpy import float32, int16
+from numpy._typing import NDArray
+
+from pyMEA.constants import NUM_ELECTRODES
+from pyMEA.domain.model.VoltageArray import VoltageArray, is_read_only
+
+_INT16_MAX = 32767
+
+
+class QuantizedArray(VoltageArray):
+    """
+    int16 に量子化した電位を保持し、アクセス時に float32 へ戻す電位配列
+    ----------
+    Args:
+        samples: (len(chs), N) の int16 電位データ。chs と同じ順に並べる
+        scale: int16 → 電位 (μV) の換算係数 (電位 = samples * scale)
+        start: 先頭フレームの時刻 (s)
+        sampling_rate: サンプリングレート (Hz)
+        chs: 保持する電極番号 (None なら 1〜64 すべて)
+
+    float32 の半分のメモリで保持できる。``array[ch]`` やフィルタは電極1本ずつ
+    float32 に戻すため、全体を float32 に展開することはない。保持していない電極は 0 として読める。
+    """
+
+    def __init__(
+        self,
+        samples: NDArray[int16],
+        scale: float,
+        start: int | float,
+        sampling_rate: int,
+        chs: list[int] | None = None,
+    ):
+        super().__init__(start, sampling_rate)
+        chs = list(range(1, NUM_ELECTRODES + 1)) if chs is None else list(chs)
+        if len(samples) != len(chs):
+            raise ValueError("電位データの行数と電極数が一致しません")
+        samples = np.asarray(samples)
+        if samples.dtype != int16:
+            raise ValueError("samplesはint16の配列を入力してください")
+        if not is_read_only(samples):
+            samples = samples.copy()
+            samples.setflags(write=False)
+        self._samples = samples
+        self._scale = float(scale)
+        self._rows = {int(ch): i for i, ch in enumerate(chs)}
+
+    @classmethod
+    def from_channels(
+        cls,
+        array,
+        chs: list[int],
+        start: int | float,
+        sampling_rate: int,
+        scale: float | None = None,
+    ) -> "QuantizedArray":
+        """
+        (65, N) 互換の配列 (ndarray / VoltageArray) の電極 chs を量子化する
+        ----------
+        Args:
+            scale: int16 → 電位の換算係数。None なら max(|V|)/32767 (save_mea_npz の
+                int16 と同じ)
+
+        電極1本ずつ読み出して量子化するため、float の中間配列は1電極分で済む
+        (遅延バックエンドでも全体を float32 に展開しない)。
+        """
+        if scale is None:
+            max_abs = max(
+                (float(np.max(np.abs(array[ch]))) for ch in chs if array.shape[1]),
+                default=0.0,
+            )
+            scale = max_abs / _INT16_MAX if max_abs > 0 else 1.0
+        samples = np.empty((len(chs), array.shape[1]), dtype=int16)
+        for row, ch in enumerate(chs):
+            q = np.rint(np.asarray(array[ch], dtype=float32) / float32(scale))
+            np.clip(q, -_INT16_MAX - 1, _INT16_MAX, out=q)
+            samples[row] = q
+        return cls(samples, scale, start, sampling_rate, chs)
+
+    @property
+    def n_frames(self) -> int:
+        return self._samples.shape[1]
+
+    @property
+    def channels(self) -> list[int]:
+        return list(self._rows)
+
+    @property
+    def samples(self) -> NDArray[int16]:
+        """量子化した (len(channels), N) の int16 電位データ (読み取り専用)"""
+        return self._samples
+
+    @property
+    def scale(self) -> float:
+        return self._scale
+
+    @property
+    def nbytes(self) -> int:
+        return self._samples.nbytes
+
+    @property
+    def held_nbytes(self) -> int:
+        return self._samples.nbytes
+
+    def _read_channel(
+        self, ch: int, start_frame: int, end_frame: int, out: NDArray[float32]
+    ) -> None:
+        row = self._rows.get(ch)
+        if row is None:
+            out[:] = 0
+        else:
+            # 換算は float64 で行い float32 に丸める (.bio の復号と同じ値になる)
+            np.multiply(
+                self._samples[row, start_frame:end_frame],
+                self._scale,
+                out=out,
+                casting="unsafe",
+            )
+
+    def _window(self, start_frame: int, end_frame: int) -> "QuantizedArray":
+        return QuantizedArray(
+            self._samples[:, start_frame:end_frame],
+            self._scale,
+            self.start + start_frame / self.sampling_rate,
+            self.sampling_rate,
+            self.channels,
+        )
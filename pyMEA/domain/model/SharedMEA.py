@@ -0,0 +1,105 @@
+"""複数プロセスで電位データを共有するための共有メモリ (multiprocessing.shared_memory)。"""
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+from numpy import float32
+from numpy._typing import NDArray
+
+from pyMEA.domain.model.HedPath import HedPath
+
+
+@dataclass(frozen=True)
+class SharedMEAHandle:
+    """
+    共有メモリ上の MEA を別プロセスで開くための情報
+    ----------
+    電位データを含まないため pickle しても数百バイトで済む。
+    MEA.from_shared(handle) で同じ電位バッファをコピーせずに参照する MEA になる。
+    """
+
+    name: str
+    shape: tuple[int, int]
+    channels: tuple[int, ...]
+    hed_path: HedPath
+    start: int | float
+    end: int | float
+    sampling_rate: int
+    gain: int
+    lineage: tuple | None = None
+
+
+class SharedMEA:
+    """
+    MEA.to_shared() が確保した共有メモリの持ち主
+    ----------
+    handle をワーカーに渡し、ワーカー側は MEA.from_shared(handle) で開く。
+    共有メモリは明示的に解放する: with 文を抜けるか unlink() を呼ぶと共有メモリの名前を
+    消し (新たに開けなくなる)、close() でこのプロセスの参照を手放す。
+    既に開いているワーカーの MEA はそれぞれが手放すまで読める。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, handle: SharedMEAHandle):
+        self._shm = shm
+        self.handle = handle
+
+    def __enter__(self) -> "SharedMEA":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.unlink()
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"SharedMEA(name={self.handle.name!r}, shape={self.handle.shape})"
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.handle.shape)) * np.dtype(float32).itemsize
+
+    def close(self) -> None:
+        """このプロセスの共有メモリへの参照を手放す"""
+        _close_quietly(self._shm)
+
+    def unlink(self) -> None:
+        """共有メモリを削除する (2回目以降は何もしない)"""
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class _QuietSharedMemory(shared_memory.SharedMemory):
+    """電位のビューが残っていれば、破棄時に閉じずに手放す共有メモリ"""
+
+    def __del__(self):
+        _close_quietly(self)
+
+
+def _close_quietly(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # 共有メモリ上の配列 (ビュー) がまだ使われている。ビューがすべて消えた時点で
+        # マッピングが解放されるため、ここでは何もしない
+        pass
+
+
+def create_shared_voltages(
+    shape: tuple[int, int],
+) -> tuple[shared_memory.SharedMemory, NDArray[float32]]:
+    """(電極数, N) の float32 を置く共有メモリを確保し、書き込み用のビューとともに返す"""
+    nbytes = max(1, int(np.prod(shape)) * np.dtype(float32).itemsize)
+    shm = _QuietSharedMemory(create=True, size=nbytes)
+    return shm, np.ndarray(shape, dtype=float32, buffer=shm.buf)
+
+
+def attach_shared_voltages(
+    handle: SharedMEAHandle,
+) -> tuple[shared_memory.SharedMemory, NDArray[float32]]:
+    """handle の共有メモリを開き、読み取り専用の (電極数, N) 電位ビューとともに返す"""
+    shm = _QuietSharedMemory(name=handle.name)
+    voltages = np.ndarray(handle.shape, dtype=float32, buffer=shm.buf)
+    voltages.setflags(write=False)
+    return shm, voltages
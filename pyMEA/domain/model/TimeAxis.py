@@ -0,0 +1,152 @@
+"""start/sampling_rate から都度計算する遅延評価の時刻軸。"""
+
+import numpy as np
+from numpy import float64
+from numpy._typing import NDArray
+from numpy.lib.mixins import NDArrayOperatorsMixin
+
+
+class TimeAxis(NDArrayOperatorsMixin):
+    """
+    等間隔サンプリングの float64 時刻軸 [s]
+    ----------
+    Args:
+        n_frames: 要素数
+        start: 記録の先頭フレームの時刻 (s)
+        sampling_rate: サンプリングレート (Hz)
+        first_frame: 先頭要素のフレーム番号 (切り出したときのオフセット)
+        step: 要素間のフレーム数 (間引いたときの間隔)
+
+    k 番目の時刻は ``(first_frame + k * step) / sampling_rate + start`` で、
+    ``np.arange(N) / sampling_rate + start`` と同じ値になる。配列は確保せずに保持し、
+
+    - ``axis[i]``                  : その時刻 (float64 のスカラ)
+    - ``axis[peaks]`` / ``axis[mask]``: 選んだ要素だけを計算した float64 配列 (O(len(peaks)))
+    - ``axis[a:b]``                : 切り出した TimeAxis (O(1))
+    - ``axis.searchsorted(t)``     : 時刻 → フレーム番号を二分探索せずに算出
+    - ``np.asarray(axis)``         : 全体を float64 配列に展開する
+
+    ピーク位置 (フレーム番号) を時刻に直すときに全長の時刻配列を作らずに済む。
+    """
+
+    dtype = np.dtype(float64)
+    ndim = 1
+
+    def __init__(
+        self,
+        n_frames: int,
+        start: int | float,
+        sampling_rate: int | float,
+        first_frame: int = 0,
+        step: int = 1,
+    ):
+        self._n_frames = int(n_frames)
+        self.start = start
+        self.sampling_rate = sampling_rate
+        self._first_frame = int(first_frame)
+        self._step = int(step)
+
+    @property
+    def shape(self) -> tuple[int]:
+        return (self._n_frames,)
+
+    @property
+    def size(self) -> int:
+        return self._n_frames
+
+    def __len__(self) -> int:
+        return self._n_frames
+
+    def __iter__(self):
+        return iter(np.asarray(self))
+
+    def __repr__(self) -> str:
+        return (
+            f"TimeAxis(n_frames={self._n_frames}, start={self.start}, "
+            f"sampling_rate={self.sampling_rate})"
+        )
+
+    def __array__(self, dtype=None, copy=None):
+        t = self._frames_to_times(np.arange(self._n_frames))
+        return t if dtype is None else t.astype(dtype, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(np.asarray(x) if isinstance(x, TimeAxis) else x for x in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def copy(self) -> NDArray[float64]:
+        return np.asarray(self)
+
+    def astype(self, dtype, copy=True):
+        return np.asarray(self).astype(dtype, copy=copy)
+
+    def tolist(self) -> list[float]:
+        return np.asarray(self).tolist()
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple) and len(index) == 1:
+            index = index[0]
+        if isinstance(index, tuple) or index is None or index is Ellipsis:
+            # 次元の追加などは展開した配列で扱う
+            return np.asarray(self)[index]
+        if isinstance(index, (int, np.integer)):
+            k = range(self._n_frames)[index]
+            return self._frames_to_times(np.int64(k))
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._n_frames)
+            if step > 0:
+                return TimeAxis(
+                    len(range(start, stop, step)),
+                    self.start,
+                    self.sampling_rate,
+                    self._first_frame + start * self._step,
+                    self._step * step,
+                )
+            return self._frames_to_times(np.arange(self._n_frames)[index])
+        index = np.asarray(index)
+        if index.dtype == bool:
+            if index.shape != self.shape:
+                raise IndexError("真偽値インデックスの長さが時刻軸と一致しません")
+            index = np.flatnonzero(index)
+        elif index.size == 0:
+            index = index.astype(np.int64)
+        elif not np.issubdtype(index.dtype, np.integer):
+            raise IndexError("時刻軸のインデックスは整数で入力してください")
+        if index.size and (
+            index.max() >= self._n_frames or index.min() < -self._n_frames
+        ):
+            raise IndexError("インデックスが時刻軸の範囲外です")
+        return self._frames_to_times(np.where(index < 0, index + self._n_frames, index))
+
+    def searchsorted(self, v, side: str = "left", sorter=None):
+        """
+        時刻 v を挿入する位置 (np.searchsorted と同じ結果) を算出する
+        ----------
+        等間隔なので二分探索せず ``(v - start) * sampling_rate`` から直接求め、
+        丸め誤差の分だけ前後の要素と比べて補正する。
+        """
+        if side not in ("left", "right"):
+            raise ValueError("sideは'left'か'right'を入力してください")
+        values = np.asarray(v, dtype=float64)
+        frames = (values - self.start) * self.sampling_rate
+        k = np.ceil((frames - self._first_frame) / self._step)
+        k = np.clip(np.nan_to_num(k, nan=self._n_frames), 0, self._n_frames).astype(np.int64)
+
+        def before(i):
+            # 位置 i の直前の要素が v より前にあるか (left: t < v, right: t <= v)
+            t = self._frames_to_times(i - 1)
+            return (i > 0) & ((t < values) if side == "left" else (t <= values))
+
+        def at(i):
+            # 位置 i の要素が v より前にあるか
+            t = self._frames_to_times(i)
+            return (i < self._n_frames) & ((t < values) if side == "left" else (t <= values))
+
+        # 推定は最大でも1要素ずれるだけなので、前後1回ずつの補正で確定する
+        k = np.where(before(k), k, k - 1).clip(0)
+        k = np.where(at(k), k + 1, k)
+        return k if k.ndim else int(k)
+
+    def _frames_to_times(self, k) -> NDArray[float64]:
+        frames = self._first_frame + np.asarray(k, dtype=np.int64) * self._step
+        return frames / float64(self.sampling_rate) + self.start
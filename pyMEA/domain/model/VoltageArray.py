@@ -0,0 +1,268 @@
+"""(65, N) の ndarray と互換な行アクセスを提供する電位データの基底クラス。
+
+MEA.array は電位 (64, N) だけを持つ VoltageBlock か、必要な行・列だけを都度復号する
+遅延バックエンド (memmap 等) で、いずれもこのクラスを継承するため MEA にそのまま渡せる。
+array[0] は時刻行 (start/sampling_rate から再生成)、array[1]〜array[64] が電位行。
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+from numpy import float32
+from numpy._typing import NDArray
+from numpy.lib.mixins import NDArrayOperatorsMixin
+
+from pyMEA.constants import NUM_ELECTRODES
+
+# 時刻ごとの集計 (axis=0) で1回に読み出すサンプル数 (行数 × フレーム数)
+_REDUCE_BLOCK_SAMPLES = 1 << 22
+
+
+class VoltageArray(NDArrayOperatorsMixin, ABC):
+    """
+    遅延評価される (65, N) 電位配列
+    ----------
+    継承クラスは n_frames / _read_channel / _window を実装する。
+
+    - ``array[ch]``          : 1電極ぶんだけ復号して float32 の1次元配列を返す
+    - ``array[:, a:b]``      : 復号せずに時間窓を切り出した VoltageArray を返す (O(1))
+    - ``np.asarray(array)``  : 全体を復号した (65, N) の float32 配列を返す
+    - ``array.max()`` / ``min`` / ``sum`` / ``mean`` : 行 (axis=0 は時間ブロック) ごとに
+      復号して集計する。全体を展開した配列は作らない
+    - ``array.T`` / ``reshape`` / ``ravel`` / ``tolist`` : 全体を復号した読み取り専用の
+      (65, N) 配列から作る (結果自体が全体の大きさになるもの)。その他の ndarray の
+      属性は持たないので、必要なら ``np.asarray(array)`` で明示的に展開する
+    """
+
+    dtype = np.dtype(float32)
+    ndim = 2
+
+    def __init__(self, start: int | float, sampling_rate: int):
+        self.start = start
+        self.sampling_rate = sampling_rate
+
+    @property
+    @abstractmethod
+    def n_frames(self) -> int:
+        """時間方向のフレーム数"""
+
+    @abstractmethod
+    def _read_channel(
+        self, ch: int, start_frame: int, end_frame: int, out: NDArray[float32]
+    ) -> None:
+        """電極 ch (1〜64) の [start_frame, end_frame) を復号して out (1次元) に書き込む"""
+
+    @abstractmethod
+    def _window(self, start_frame: int, end_frame: int) -> "VoltageArray":
+        """[start_frame, end_frame) を切り出した同種の VoltageArray を返す"""
+
+    @property
+    @abstractmethod
+    def held_nbytes(self) -> int:
+        """メモリ上に保持している電位データのバイト数 (遅延バックエンドは 0)。
+
+        nbytes は float32 に展開したときの大きさなので、保持量とは異なる。
+        """
+
+    @property
+    def channels(self) -> list[int]:
+        """保持している電極番号。一部の電極だけを持つ継承クラスは上書きする"""
+        return list(range(1, NUM_ELECTRODES + 1))
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return NUM_ELECTRODES + 1, self.n_frames
+
+    @property
+    def size(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """(65, N) の float32 配列として展開したときのバイト数"""
+        return self.size * self.dtype.itemsize
+
+    @property
+    def T(self) -> NDArray[float32]:
+        return self._materialize().T
+
+    @property
+    def flags(self):
+        """常に読み取り専用 (長さ0の窓のフラグを返し、電位は復号しない)"""
+        empty = self._read_rows(list(range(len(self))), 0, 0)
+        empty.setflags(write=False)
+        return empty.flags
+
+    def reshape(self, *shape, **kwargs) -> NDArray[float32]:
+        return self._materialize().reshape(*shape, **kwargs)
+
+    def ravel(self, order="C") -> NDArray[float32]:
+        return self._materialize().ravel(order)
+
+    def tolist(self) -> list[list[float]]:
+        return self._materialize().tolist()
+
+    def max(self, axis: int | None = None):
+        return self._reduce(np.max, axis)
+
+    def min(self, axis: int | None = None):
+        return self._reduce(np.min, axis)
+
+    def sum(self, axis: int | None = None):
+        return self._reduce(np.sum, axis)
+
+    def mean(self, axis: int | None = None):
+        # 全行の長さが同じなので、全体の平均は行ごとの平均の平均になる
+        return self._reduce(np.mean, axis)
+
+    def _reduce(self, func, axis: int | None):
+        """全体を展開せずに func (np.max 等) で集計する"""
+        rows = list(range(len(self)))
+        n_frames = self.n_frames
+        if axis in (0, -2):
+            # 時刻ごとの集計は時間ブロックごとに全行を読み出す
+            step = max(1, _REDUCE_BLOCK_SAMPLES // len(rows))
+            blocks = [
+                func(self._read_rows(rows, a, min(a + step, n_frames)), axis=0)
+                for a in range(0, max(n_frames, 1), step)
+            ]
+            return np.concatenate(blocks)
+        if axis not in (None, 1, -1):
+            raise ValueError("axisは None, 0, 1 のいずれかで指定してください")
+        # 電極ごとの集計は1行ずつ読み出す (メモリは1行分)
+        per_row = np.array(
+            [func(self._read_rows([row], 0, n_frames)[0]) for row in rows],
+            dtype=float32,
+        )
+        return per_row if axis is not None else func(per_row)
+
+    def _materialize(self) -> NDArray[float32]:
+        arr = np.asarray(self)
+        arr.setflags(write=False)
+        return arr
+
+    def __len__(self) -> int:
+        return NUM_ELECTRODES + 1
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(shape={self.shape}, start={self.start}, "
+            f"sampling_rate={self.sampling_rate})"
+        )
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self._read_rows(list(range(len(self))), 0, self.n_frames)
+        return arr if dtype is None else arr.astype(dtype, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(np.asarray(x) if isinstance(x, VoltageArray) else x for x in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def copy(self) -> NDArray[float32]:
+        return np.asarray(self)
+
+    def astype(self, dtype, copy=True):
+        return np.asarray(self).astype(dtype, copy=copy)
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            row_index, col_index = index
+        else:
+            row_index, col_index = index, slice(None)
+
+        # 全行 × 連続区間 は復号せずに窓を切り出す
+        if (
+            isinstance(row_index, slice)
+            and row_index == slice(None)
+            and isinstance(col_index, slice)
+            and col_index.step in (None, 1)
+        ):
+            start_frame, end_frame, _ = col_index.indices(self.n_frames)
+            return self._window(start_frame, max(start_frame, end_frame))
+
+        all_rows = range(len(self))
+        if isinstance(row_index, (int, np.integer)):
+            rows = [all_rows[row_index]]
+        elif isinstance(row_index, slice):
+            rows = list(all_rows[row_index])
+        else:
+            rows = [all_rows[r] for r in np.asarray(row_index).ravel()]
+
+        # 列は連続区間だけ復号してから (ステップ・ファンシーインデックスを) 適用する
+        if isinstance(col_index, slice):
+            start_frame, end_frame, step = col_index.indices(self.n_frames)
+            if step > 0:
+                arr = self._read_rows(rows, start_frame, max(start_frame, end_frame))
+                arr = arr[:, ::step]
+            else:
+                arr = self._read_rows(rows, 0, self.n_frames)[:, col_index]
+        else:
+            arr = self._read_rows(rows, 0, self.n_frames)[:, col_index]
+
+        if isinstance(row_index, (int, np.integer)):
+            arr = arr[0]
+        if isinstance(arr, np.ndarray):
+            arr.setflags(write=False)
+        return arr
+
+    def read_voltages(
+        self,
+        start_frame: int = 0,
+        end_frame: int | None = None,
+        out: NDArray | None = None,
+        chs: list[int] | None = None,
+    ) -> NDArray:
+        """
+        電極 chs の [start_frame, end_frame) を復号して (len(chs), n) の配列で返す
+        ----------
+        Args:
+            start_frame: 開始フレーム
+            end_frame: 終了フレーム (None なら末尾)
+            out: 書き込み先 (None なら float32 で確保)。確保済みのバッファに直接書き込める
+            chs: 電極番号のリスト (None なら 1〜64 すべて)
+        """
+        end_frame = self.n_frames if end_frame is None else end_frame
+        chs = list(range(1, NUM_ELECTRODES + 1)) if chs is None else chs
+        if out is None:
+            out = np.empty((len(chs), end_frame - start_frame), dtype=float32)
+        for i, ch in enumerate(chs):
+            self._read_channel(ch, start_frame, end_frame, out[i])
+        return out
+
+    def _read_rows(
+        self, rows: list[int], start_frame: int, end_frame: int
+    ) -> NDArray[float32]:
+        # 出力を先に確保し、各行を直接書き込む (中間配列を作らない)
+        out = np.empty((len(rows), end_frame - start_frame), dtype=float32)
+        all_chs = list(range(1, NUM_ELECTRODES + 1))
+        if rows[-NUM_ELECTRODES:] == all_chs:
+            # 全電極がそろっていれば一括復号 (継承クラスが高速化できる) を使う
+            self.read_voltages(start_frame, end_frame, out=out[-NUM_ELECTRODES:])
+            rows = rows[:-NUM_ELECTRODES]
+        for i, row in enumerate(rows):
+            if row == 0:
+                out[i] = self._time_row(start_frame, end_frame)
+            else:
+                self._read_channel(row, start_frame, end_frame, out[i])
+        return out
+
+    def _time_row(self, start_frame: int, end_frame: int) -> NDArray[float32]:
+        t = np.arange(start_frame, end_frame, dtype=np.float64) / self.sampling_rate
+        return (t + self.start).astype(float32)
+
+
+def is_read_only(arr: NDArray) -> bool:
+    """arr とその元の配列 (base) がすべて読み取り専用か。
+
+    書き込み可能な配列の読み取り専用ビューは、元の配列を通じて書き換えられるため
+    読み取り専用とはみなさない (コピーせずに共有してよいのは True のときだけ)。
+    """
+    while isinstance(arr, np.ndarray):
+        if arr.flags.writeable:
+            return False
+        arr = arr.base
+    return True
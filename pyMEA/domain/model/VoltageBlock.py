@@ -0,0 +1,73 @@
+"""64電極の電位だけを (64, N) で保持し、時刻行を導出する (65, N) 互換の電位配列。"""
+
+import numpy as np
+from numpy import float32
+from numpy._typing import NDArray
+
+from pyMEA.constants import NUM_ELECTRODES
+from pyMEA.domain.model.ChannelSubsetArray import ChannelSubsetArray
+
+
+class VoltageBlock(ChannelSubsetArray):
+    """
+    64電極の (64, N) 電位ブロック
+    ----------
+    Args:
+        voltages: (64, N) の電位データ。i 行目が電極 i+1
+        start: 先頭フレームの時刻 (s)
+        sampling_rate: サンプリングレート (Hz)
+
+    時刻行は start/sampling_rate から導出するため保持しない (変換のたびに時刻行を
+    組み立て直すコピーが要らない)。電位行へのアクセスはコピーせずにビューを返す:
+
+    - ``array[ch]`` / ``array[ch, a:b]``  : voltages[ch - 1] のビュー
+    - ``array[1:]`` / ``array[1:65, a:b]`` : voltages のビュー
+    - ``array[:, a:b]``                    : 時間窓を切り出した VoltageBlock (O(1))
+    - ``array[0]``                         : 導出した float32 の時刻行 (正確な時刻は mea[0])
+    """
+
+    def __init__(
+        self, voltages: NDArray[float32], start: int | float, sampling_rate: int
+    ):
+        if len(voltages) != NUM_ELECTRODES:
+            raise ValueError("電位データは64電極分の行を入力してください")
+        super().__init__(
+            voltages, list(range(1, NUM_ELECTRODES + 1)), start, sampling_rate
+        )
+
+    def __getitem__(self, index):
+        row_index, col_index = index if isinstance(index, tuple) else (index, slice(None))
+        if isinstance(col_index, slice):
+            # 電位行だけを指す行指定はビューで返す (時刻行を含む場合は基底クラスで組み立てる)
+            if isinstance(row_index, (int, np.integer)):
+                row = range(NUM_ELECTRODES + 1)[row_index]
+                if row >= 1:
+                    return self.voltages[row - 1, col_index]
+            elif isinstance(row_index, slice) and row_index != slice(None):
+                rows = range(NUM_ELECTRODES + 1)[row_index]
+                if rows.step > 0 and (len(rows) == 0 or rows.start >= 1):
+                    start = max(rows.start - 1, 0)
+                    return self.voltages[start : max(rows.stop - 1, start) : rows.step, col_index]
+        return super().__getitem__(index)
+
+    def read_voltages(
+        self,
+        start_frame: int = 0,
+        end_frame: int | None = None,
+        out: NDArray | None = None,
+        chs: list[int] | None = None,
+    ) -> NDArray:
+        if chs is not None:
+            return super().read_voltages(start_frame, end_frame, out, chs)
+        block = self.voltages[:, start_frame:end_frame]
+        if out is None:
+            return block.copy()
+        out[:] = block
+        return out
+
+    def _window(self, start_frame: int, end_frame: int) -> "VoltageBlock":
+        return VoltageBlock(
+            self.voltages[:, start_frame:end_frame],
+            self.start + start_frame / self.sampling_rate,
+            self.sampling_rate,
+        )
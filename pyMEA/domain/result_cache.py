@@ -0,0 +1,80 @@
+"""派生結果 (フィルタ後の電位・ピーク・勾配) の永続キャッシュへの入口。
+
+ドメイン層はキャッシュの置き場所を知らない。set_result_cache で ResultStore
+(例: pyMEA.infrastructure.result_cache.DiskResultCache) を登録したときだけ、
+cached_arrays が計算結果を保存・再利用する。登録しなければ常にその場で計算する。
+
+キーは由来 (元ファイルの指紋・読込区間・適用した処理とそのパラメータの列) から
+作るため、同じ記録に同じ処理をかけた結果はプロセスをまたいで再利用できる。
+"""
+
+import hashlib
+from collections.abc import Callable
+from typing import Protocol
+
+import numpy as np
+from numpy._typing import NDArray
+
+
+class ResultStore(Protocol):
+    def load(self, key: str) -> dict[str, NDArray] | None: ...
+
+    def save(self, key: str, arrays: dict[str, NDArray]) -> None: ...
+
+
+_store: ResultStore | None = None
+
+
+def set_result_cache(store: ResultStore | None) -> ResultStore | None:
+    """キャッシュを登録し、それまで登録されていたものを返す (None で無効化)"""
+    global _store
+    previous, _store = _store, store
+    return previous
+
+
+def get_result_cache() -> ResultStore | None:
+    return _store
+
+
+def result_key(*parts) -> str:
+    """由来・処理名・パラメータから内容に依存しないキャッシュキー (sha256) を作る"""
+    digest = hashlib.sha256()
+    digest.update(repr(_normalize(parts)).encode())
+    return digest.hexdigest()
+
+
+def cached_arrays(
+    key_parts: tuple | None, compute: Callable[[], dict[str, NDArray]]
+) -> dict[str, NDArray]:
+    """
+    key_parts に対応する結果をキャッシュから返す。なければ compute() して保存する
+    ----------
+    Args:
+        key_parts: キーの材料。None (由来が分からない) ならキャッシュを使わない
+        compute: 結果を名前つきの配列で返す関数
+
+    キャッシュから返す配列は読み取り専用 (ストアによっては memmap) になる。
+    """
+    store = _store
+    if store is None or key_parts is None:
+        return compute()
+    key = result_key(*key_parts)
+    arrays = store.load(key)
+    if arrays is None:
+        arrays = compute()
+        store.save(key, arrays)
+    return arrays
+
+
+def _normalize(value):
+    if isinstance(value, np.ndarray):
+        # 配列は中身のハッシュに置き換える (ピーク時刻行列など小さい入力用)
+        data = np.ascontiguousarray(value)
+        return ("ndarray", str(data.dtype), data.shape, hashlib.sha256(data).hexdigest())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return tuple((k, _normalize(v)) for k, v in sorted(value.items()))
+    return value
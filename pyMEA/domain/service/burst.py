@@ -7,8 +7,6 @@ Matsuda, N., et al.
 Biochemical and biophysical research communications 497.2 (2018): 612-618.
 """
 
-import itertools
-
 import numpy as np
 from numpy import ndarray
 
@@ -19,10 +17,11 @@ from pyMEA.domain.model.MEA import MEA
 
 # 64電極のpeak_indexを一次元の配列にまとめる。
 def peak_flatten(data: MEA, peak_index: Peaks64) -> ndarray:
-    detect_time = [data[0][peak_index[i]] for i in range(1, NUM_ELECTRODES + 1)]
-    detect_time = list(itertools.chain.from_iterable(detect_time))
-
-    return np.array(detect_time)
+    # 全長の時刻配列を作らず、ピーク位置の分だけ時刻を計算する
+    times = data.time_axis
+    return np.concatenate(
+        [times[peak_index[i]] for i in range(1, NUM_ELECTRODES + 1)]
+    )
 
 
 # 同期バースト発火検出
@@ -77,7 +76,7 @@ def sbf_single(
     min_ibi=0.8,
     spikes_threshold=9,
 ):
-    spikes = data[0][peak_index[ch]]
+    spikes = data.time_axis[peak_index[ch]]
     spikes_length = len(spikes)
 
     sbfs = []
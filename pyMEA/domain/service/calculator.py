@@ -115,7 +115,7 @@ class Calculator:
         stroke_frame = int(stroke_time * self.data.SAMPLING_RATE)
         data = self.data.array.copy()
         # 時刻はfloat32保持の電位配列ではなくfloat64のtimesから取得する(FPDは時刻差分のため精度が重要)
-        times = self.data.times
+        times = self.data.time_axis
         # 1st peak付近のデータを0に変換
         for p in neg_peak_index[ch]:
             data[ch][p - stroke_frame : p + stroke_frame] = 0
@@ -2,12 +2,14 @@ from dataclasses import dataclass, field
 from functools import cached_property
 from typing import TYPE_CHECKING
 
+import numpy as np
 from numpy import float64
 from numpy._typing import NDArray
 
 from pyMEA.constants import DEFAULT_ELECTRODE_DISTANCE
 from pyMEA.domain.model.MEA import MEA
 from pyMEA.domain.model.peak_model import Peaks64
+from pyMEA.domain.result_cache import cached_arrays
 from pyMEA.domain.service.gradient.Gradient import Gradient
 from pyMEA.domain.service.gradient.Solver import Solver
 from pyMEA.domain.service.peak_times import remove_undetected_ch_from64ch
@@ -32,11 +34,29 @@ class Gradients:
 
     @cached_property
     def gradients(self) -> list[Gradient]:
-        # 全拍動周期について勾配を計算していく
+        # 全拍動周期について勾配を計算していく。フィットの係数はピーク時刻行列の
+        # 内容をキーにキャッシュする (結果キャッシュ登録時のみ)
+        fits = cached_arrays(
+            ("gradients", self.times, self.remove_ch, self.ele_dis), self._fit_all
+        )
         return [
-            Gradient(Solver(time, self.remove_ch, self.ele_dis, self.mesh_num))
+            Gradient(
+                Solver.from_fit(
+                    time, self.remove_ch, self.ele_dis, self.mesh_num, popt, r2
+                )
+            )
+            for time, popt, r2 in zip(self.times, fits["popt"], fits["r2"])
+        ]
+
+    def _fit_all(self) -> dict[str, NDArray[float64]]:
+        solvers = [
+            Solver(time, self.remove_ch, self.ele_dis, self.mesh_num)
             for time in self.times
         ]
+        return {
+            "popt": np.array([s.popt for s in solvers]).reshape(len(solvers), -1),
+            "r2": np.array([s.r2 for s in solvers], dtype=float64),
+        }
 
     def __repr__(self) -> list[Gradient]:
         return repr(self.gradients)
@@ -31,7 +31,28 @@ class Solver:
     yy: NDArray[float64] = field(init=False)
 
     def __post_init__(self):
-        popt, r2 = self.fit_data()
+        self._set_fit(*self.fit_data())
+
+    @classmethod
+    def from_fit(
+        cls,
+        time: list[float64],
+        remove_ch: list[int],
+        ele_dis: int,
+        mesh_num: int,
+        popt: NDArray[float64],
+        r2: Union[int, Any],
+    ) -> "Solver":
+        """フィット済みの係数から Solver を組み立てる (curve_fit をやり直さない)"""
+        solver = cls.__new__(cls)
+        object.__setattr__(solver, "time", time)
+        object.__setattr__(solver, "remove_ch", remove_ch)
+        object.__setattr__(solver, "ele_dis", ele_dis)
+        object.__setattr__(solver, "mesh_num", mesh_num)
+        solver._set_fit(np.array(popt), r2)
+        return solver
+
+    def _set_fit(self, popt: NDArray[float64], r2: Union[int, Any]) -> None:
         xx, yy = get_mesh(self.ele_dis, self.mesh_num)
         object.__setattr__(self, "popt", self.freeze_array(popt))
         object.__setattr__(self, "r2", r2)
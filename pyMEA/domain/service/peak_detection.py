@@ -12,6 +12,7 @@ from pyMEA.domain.model.peak_model import (
     PosPeaks64,
 )
 from pyMEA.domain.model.MEA import MEA
+from pyMEA.domain.result_cache import cached_arrays
 
 
 def _detect_peaks_by_ch(
@@ -26,13 +27,14 @@ def _detect_peaks_by_ch(
     """全電極に対して片側 (上または下) のピーク検出を行う共通処理"""
     peak_dict: dict[int, ndarray] = {}
     for i in range(1, len(MEA_data)):
+        # 電極1本ずつ取り出す (量子化・遅延バックエンドでもここで1回だけ float32 に戻す)
+        data = np.array(MEA_data.array[i])
         # ピーク抽出の閾値を設定
-        height = np.std(MEA_data[i]) * threshold
+        height = np.std(data) * threshold
         # 閾値が最低閾値を下回っていた場合は最低閾値の値を閾値の値に設定する
         if height < min_amp:
             height = min_amp
 
-        data = MEA_data.array[i].copy()
         if is_positive:
             data[data < 0] = 0
         else:
@@ -50,6 +52,35 @@ def _detect_peaks_by_ch(
     return peak_dict
 
 
+def _cached_peaks(MEA_data: MEA, step: tuple, compute) -> dict[int, ndarray]:
+    """由来がわかる MEA なら (由来, step) をキーにピーク検出の結果をキャッシュする"""
+    lineage = getattr(MEA_data, "lineage", None)
+    arrays = cached_arrays(
+        None if lineage is None else ("peaks", lineage, step),
+        lambda: _pack_peaks(compute()),
+    )
+    # 電極ごとのピーク位置は1本につないだ配列のビュー (キャッシュなら memmap のまま)
+    indices = np.asarray(arrays["indices"])
+    offsets = arrays["offsets"]
+    return {
+        int(ch): indices[offsets[i] : offsets[i + 1]]
+        for i, ch in enumerate(arrays["channels"])
+    }
+
+
+def _pack_peaks(peak_dict: dict[int, ndarray]) -> dict[str, ndarray]:
+    chs = list(peak_dict)
+    lengths = [len(peak_dict[ch]) for ch in chs]
+    return {
+        "channels": np.array(chs, dtype=np.int64),
+        "offsets": np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))),
+        "indices": np.concatenate(
+            [np.asarray(peak_dict[ch], dtype=np.int64) for ch in chs]
+            or [np.empty(0, dtype=np.int64)]
+        ),
+    }
+
+
 # 64電極すべての下ピークを取得
 def detect_peak_neg(
     MEA_data: MEA,
@@ -70,14 +101,18 @@ def detect_peak_neg(
         prominence: 突起度
         width: ピークの幅
     """
-    peak_dict = _detect_peaks_by_ch(
+    peak_dict = _cached_peaks(
         MEA_data,
-        is_positive=False,
-        distance=distance,
-        threshold=threshold,
-        min_amp=min_amp,
-        prominence=prominence,
-        width=width,
+        ("detect_peak_neg", distance, threshold, min_amp, prominence, width),
+        lambda: _detect_peaks_by_ch(
+            MEA_data,
+            is_positive=False,
+            distance=distance,
+            threshold=threshold,
+            min_amp=min_amp,
+            prominence=prominence,
+            width=width,
+        ),
     )
     return NegPeaks64({ch: NegPeaks(peaks) for ch, peaks in peak_dict.items()})
 
@@ -102,14 +137,18 @@ def detect_peak_pos(
         prominence: 突起度
         width: ピークの幅
     """
-    peak_dict = _detect_peaks_by_ch(
+    peak_dict = _cached_peaks(
         MEA_data,
-        is_positive=True,
-        distance=distance,
-        threshold=threshold,
-        min_amp=min_amp,
-        prominence=prominence,
-        width=width,
+        ("detect_peak_pos", distance, threshold, min_amp, prominence, width),
+        lambda: _detect_peaks_by_ch(
+            MEA_data,
+            is_positive=True,
+            distance=distance,
+            threshold=threshold,
+            min_amp=min_amp,
+            prominence=prominence,
+            width=width,
+        ),
     )
     return PosPeaks64({ch: PosPeaks(peaks) for ch, peaks in peak_dict.items()})
 
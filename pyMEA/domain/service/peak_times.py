@@ -23,8 +23,9 @@ def remove_undetected_ch(
         times: 拍動周期ごとのピーク時刻行列 (s)
         remove_ch_index: 除去した電極のchsにおけるインデックス
     """
-    # ピークの時刻 (s)を取得
-    time = [data[0][peak_index[ch]] for ch in chs]
+    # ピークの時刻 (s)を取得 (時刻軸はピーク位置の分だけ計算する)
+    times_axis = data.time_axis
+    time = [times_axis[peak_index[ch]] for ch in chs]
 
     # 各電極の取得ピーク数の最頻値以外の電極は削除
     peaks = [len(peak_index[ch]) for ch in chs]
@@ -36,9 +37,8 @@ def remove_undetected_ch(
         time.pop(ch)
     print("弾いた電極番号: ", np.array(remove_ch_index))
 
-    times = np.array(
-        [[time[i][j] for i in range(len(time))] for j in range(len(time[0]))]
-    )
+    # (拍動周期, 電極) の行列にする
+    times = np.array(time).T
 
     return times, remove_ch_index
 
@@ -0,0 +1,270 @@
+""".bio ファイルの memmap バックエンド。
+
+.bio は 1フレーム = 68ch (先頭4chは補助チャンネル + 64電極) の int16 (<h) が
+フレーム順に並んだインターリーブ形式。np.memmap で開くだけなので記録長に関わらず
+O(1) で開け、実際に触れた電極・区間のページだけが読み込まれて float32 に復号される。
+
+長時間計測は <stem>0001.bio, <stem>0002.bio, ... に分割されるため、
+BioSegmentIndex で記録全体のフレーム番号を (ファイル, ファイル内位置) に対応付け、
+複数ファイルを連結せずに1本の時間軸として扱う。
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from numpy import float32
+from numpy._typing import NDArray
+
+from pyMEA.constants import NUM_ELECTRODES, REFERENCE_GAIN
+from pyMEA.domain.model.BioPath import BioPath
+from pyMEA.domain.model.VoltageArray import VoltageArray
+
+# 1フレーム先頭の補助チャンネル数 (電極データの前に並ぶ)
+BIO_AUX_CHANNELS = 4
+
+# 1フレームあたりのチャンネル数
+BIO_FRAME_CHANNELS = NUM_ELECTRODES + BIO_AUX_CHANNELS
+
+BIO_DTYPE = np.dtype("<h")
+
+# 一括復号をスレッドに分けるときの1ブロックのフレーム数 (int16 で約8MB)
+DECODE_BLOCK_FRAMES = 1 << 16
+
+
+def bio_voltage_scale(gain: int = REFERENCE_GAIN, volt_range: int = 100) -> float:
+    """int16 の生値を電位 (μV) に換算する係数。電圧レンジとGAIN補正を1つにまとめる。"""
+    scale = (volt_range / (2**16 - 2)) * 4
+    if gain != REFERENCE_GAIN:
+        scale *= REFERENCE_GAIN / gain
+    return scale
+
+
+def bio_frame_count(bio_path: BioPath) -> int:
+    """ファイルサイズから .bio のフレーム数を求める (データは読まない)"""
+    return os.path.getsize(bio_path.path) // (BIO_FRAME_CHANNELS * BIO_DTYPE.itemsize)
+
+
+class BioSegmentIndex:
+    """
+    分割された .bio を1本の時間軸として扱うための索引
+    ----------
+    Args:
+        bio_paths: 時間順に並んだ .bio のパス
+        frame_counts: 各ファイルのフレーム数
+    """
+
+    def __init__(self, bio_paths: list[BioPath], frame_counts: list[int]):
+        self.bio_paths = list(bio_paths)
+        self.frame_counts = list(frame_counts)
+        # bounds[i] が i 番目のファイルの先頭フレーム (記録全体での位置)
+        self._bounds = np.concatenate(([0], np.cumsum(frame_counts, dtype=np.int64)))
+
+    @classmethod
+    def from_paths(cls, bio_paths: list[BioPath]) -> "BioSegmentIndex":
+        return cls(bio_paths, [bio_frame_count(p) for p in bio_paths])
+
+    @property
+    def n_frames(self) -> int:
+        return int(self._bounds[-1])
+
+    def __len__(self) -> int:
+        return len(self.bio_paths)
+
+    def locate(self, start_frame: int, end_frame: int) -> list[tuple[int, int, int]]:
+        """
+        記録全体の [start_frame, end_frame) を各ファイルの区間に分解する
+
+        Returns:
+            [(ファイル番号, ファイル内の開始フレーム, フレーム数), ...] (時間順)
+        """
+        pieces = []
+        segment = int(np.searchsorted(self._bounds, start_frame, side="right")) - 1
+        frame = start_frame
+        while frame < end_frame and segment < len(self.bio_paths):
+            offset = frame - int(self._bounds[segment])
+            count = min(end_frame, int(self._bounds[segment + 1])) - frame
+            if count > 0:
+                pieces.append((segment, offset, count))
+                frame += count
+            segment += 1
+        return pieces
+
+
+class BioMemmap(VoltageArray):
+    """
+    .bio を memmap で参照する遅延 (65, N) 電位配列
+    ----------
+    Args:
+        raws: 各 .bio の (フレーム数, 68) の int16 memmap
+        index: 分割ファイルの索引
+        scale: 生値 → 電位の換算係数
+        start: 先頭フレームの時刻 (s)
+        sampling_rate: サンプリングレート (Hz)
+        frame_offset: 記録全体での先頭フレーム位置
+        n_frames: フレーム数 (None なら記録の末尾まで)
+    """
+
+    def __init__(
+        self,
+        raws: list[np.memmap],
+        index: BioSegmentIndex,
+        scale: float,
+        start: int | float,
+        sampling_rate: int,
+        frame_offset: int = 0,
+        n_frames: int | None = None,
+    ):
+        super().__init__(start, sampling_rate)
+        self._raws = raws
+        self._index = index
+        self._scale = scale
+        self._frame_offset = frame_offset
+        self._n_frames = index.n_frames - frame_offset if n_frames is None else n_frames
+
+    @property
+    def n_frames(self) -> int:
+        return self._n_frames
+
+    @property
+    def scale(self) -> float:
+        return self._scale
+
+    @property
+    def index(self) -> BioSegmentIndex:
+        return self._index
+
+    @property
+    def held_nbytes(self) -> int:
+        # 電位は .bio を memmap で参照するだけで、メモリ上には保持しない
+        return 0
+
+    def _read_channel(
+        self, ch: int, start_frame: int, end_frame: int, out: NDArray[float32]
+    ) -> None:
+        # 1電極ぶんの列をストライドビューで取り出し、換算と型変換を1回の乗算で行う。
+        # ファイル境界をまたぐ区間は各ファイルの該当部分を out の続きに直接書き込む。
+        col = BIO_AUX_CHANNELS + ch - 1
+        written = 0
+        for segment, offset, count in self._index.locate(
+            self._frame_offset + start_frame, self._frame_offset + end_frame
+        ):
+            column = self._raws[segment][offset : offset + count, col]
+            np.multiply(
+                column, self._scale, out=out[written : written + count], casting="unsafe"
+            )
+            written += count
+
+    def read_voltages(
+        self,
+        start_frame: int = 0,
+        end_frame: int | None = None,
+        out: NDArray | None = None,
+        chs: list[int] | None = None,
+        workers: int | None = None,
+    ) -> NDArray:
+        """
+        全64電極の [start_frame, end_frame) を確保済みの (64, n) バッファへ1パスで復号する
+        ----------
+        Args:
+            workers: 復号スレッド数 (None なら CPU 数)。区間をフレーム方向のブロックに
+                分けて並列に復号する (numpy の乗算は GIL を解放する)
+
+        chs を指定した場合は電極ごとのストライドビューから読む (基底クラスの実装)。
+        """
+        if chs is not None:
+            return super().read_voltages(start_frame, end_frame, out, chs)
+        end_frame = self.n_frames if end_frame is None else end_frame
+        n = end_frame - start_frame
+        if out is None:
+            out = np.empty((NUM_ELECTRODES, n), dtype=float32)
+
+        def decode(block_start: int) -> None:
+            block_end = min(block_start + DECODE_BLOCK_FRAMES, n)
+            written = block_start
+            for segment, offset, count in self._index.locate(
+                self._frame_offset + start_frame + block_start,
+                self._frame_offset + start_frame + block_end,
+            ):
+                # 補助チャンネルを除いた (count, 64) のビューを転置して1回の乗算で書き込む
+                raw = self._raws[segment][offset : offset + count, BIO_AUX_CHANNELS:]
+                np.multiply(
+                    raw.T,
+                    self._scale,
+                    out=out[:, written : written + count],
+                    casting="unsafe",
+                )
+                written += count
+
+        blocks = range(0, n, DECODE_BLOCK_FRAMES)
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        if workers > 1 and len(blocks) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(blocks))) as pool:
+                list(pool.map(decode, blocks))
+        else:
+            for block_start in blocks:
+                decode(block_start)
+        return out
+
+    def read_raw(
+        self,
+        start_frame: int = 0,
+        end_frame: int | None = None,
+        chs: list[int] | None = None,
+    ) -> NDArray[np.int16]:
+        """
+        電極 chs の [start_frame, end_frame) の int16 生値を換算せずに (len(chs), n) へ写す
+        ----------
+        フレーム方向のブロックごとに memmap の生データ (フレーム数, 68) から電極の列を
+        転置して書き込む。.bio 全体を電極ごとに読み直さず、float への変換もしない。
+        """
+        end_frame = self.n_frames if end_frame is None else end_frame
+        # 全電極なら補助チャンネルを除く連続した列、指定電極ならその列だけを選ぶ
+        cols = (
+            slice(BIO_AUX_CHANNELS, BIO_FRAME_CHANNELS)
+            if chs is None
+            else [BIO_AUX_CHANNELS + ch - 1 for ch in chs]
+        )
+        n_rows = NUM_ELECTRODES if chs is None else len(chs)
+        out = np.empty((n_rows, end_frame - start_frame), dtype=np.int16)
+        written = 0
+        for segment, offset, count in self._index.locate(
+            self._frame_offset + start_frame, self._frame_offset + end_frame
+        ):
+            raw = self._raws[segment]
+            for block in range(offset, offset + count, DECODE_BLOCK_FRAMES):
+                stop = min(block + DECODE_BLOCK_FRAMES, offset + count)
+                out[:, written : written + stop - block] = raw[block:stop, cols].T
+                written += stop - block
+        return out
+
+    def _window(self, start_frame: int, end_frame: int) -> "BioMemmap":
+        return BioMemmap(
+            self._raws,
+            self._index,
+            self._scale,
+            self.start + start_frame / self.sampling_rate,
+            self.sampling_rate,
+            self._frame_offset + start_frame,
+            end_frame - start_frame,
+        )
+
+
+def open_bio_memmap(
+    bio_paths: BioPath | list[BioPath],
+    sampling_rate: int,
+    gain: int = REFERENCE_GAIN,
+    volt_range: int = 100,
+) -> BioMemmap:
+    """
+    .bio 全体を memmap で開く。データは読み込まず、ファイルサイズからフレーム数を求める。
+    分割ファイルのリストを渡すと、時間順に連結した1本の記録として開く。
+    """
+    if isinstance(bio_paths, BioPath):
+        bio_paths = [bio_paths]
+    index = BioSegmentIndex.from_paths(bio_paths)
+    raws = [
+        np.memmap(path.path, dtype=BIO_DTYPE, mode="r", shape=(count, BIO_FRAME_CHANNELS))
+        for path, count in zip(index.bio_paths, index.frame_counts)
+    ]
+    return BioMemmap(raws, index, bio_voltage_scale(gain, volt_range), 0, sampling_rate)
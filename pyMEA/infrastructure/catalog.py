@@ -0,0 +1,222 @@
+"""計測データ (.hed/.bio) のカタログ。
+
+ディレクトリ以下の記録を走査し、ヘッダー情報 (HedData)・.bio のサイズ (=記録長)・
+分割ファイル・更新時刻を SQLite に保存する。バッチ処理で「20 kHz で10分以上の記録」
+などを探すときに、数百の .hed を開き直さずに済む。
+
+再走査では .hed/.bio の更新時刻とサイズを比べ、変わった記録だけを読み直す。
+消えた記録はカタログからも削除する。
+"""
+
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from pyMEA.domain.model.BioPath import BioPath
+from pyMEA.domain.model.HedData import HedData
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.infrastructure import read_bio
+from pyMEA.infrastructure.bio_memmap import bio_frame_count
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    hed_path TEXT PRIMARY KEY,
+    sampling_rate INTEGER NOT NULL,
+    gain INTEGER NOT NULL,
+    n_frames INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    mtime REAL NOT NULL,
+    bio_paths TEXT NOT NULL,
+    bio_sizes TEXT NOT NULL,
+    signature TEXT NOT NULL
+)
+"""
+
+_COLUMNS = (
+    "hed_path, sampling_rate, gain, n_frames, duration, mtime, bio_paths, bio_sizes"
+)
+
+
+@dataclass(frozen=True)
+class RecordingEntry:
+    """カタログに登録された1記録の情報"""
+
+    hed_path: str
+    sampling_rate: int
+    gain: int
+    n_frames: int
+    # 記録長 (s)
+    duration: float
+    # .hed/.bio のうち最も新しい更新時刻 (UNIX 時刻)
+    mtime: float
+    bio_paths: tuple[str, ...]
+    bio_sizes: tuple[int, ...]
+
+    @property
+    def hed_data(self) -> HedData:
+        return HedData(SAMPLING_RATE=self.sampling_rate, GAIN=self.gain)
+
+
+class RecordingCatalog:
+    """
+    計測データのカタログ (SQLite)
+    ----------
+    Args:
+        db_path: カタログを保存する SQLite ファイルのパス (":memory:" も可)
+
+    使い方::
+
+        with RecordingCatalog("catalog.sqlite") as catalog:
+            catalog.scan("/data/mea")
+            long_20k = catalog.query(sampling_rate=20000, min_duration=600)
+    """
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path)
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    def __enter__(self) -> "RecordingCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def scan(self, root: str, workers: int | None = None) -> int:
+        """
+        root 以下の .hed を走査してカタログを更新する
+        ----------
+        Args:
+            root: 走査するディレクトリ
+            workers: ヘッダーの読込・stat を行うスレッド数 (None なら CPU 数)
+
+        Returns:
+            新たに読み込んだ (追加・更新した) 記録の数
+        """
+        root = os.path.abspath(root)
+        hed_paths = sorted(
+            os.path.join(dirpath, name)
+            for dirpath, _, names in os.walk(root)
+            for name in names
+            if name.endswith(".hed")
+        )
+        known = {
+            path: signature
+            for path, signature in self._db.execute(
+                "SELECT hed_path, signature FROM recordings"
+            )
+            if path.startswith(os.path.join(root, ""))
+        }
+
+        def inspect(hed_path: str) -> tuple | None:
+            signature, bio_paths, bio_sizes, mtime = _stat_recording(hed_path)
+            if not bio_paths:
+                return None  # .bio の無い .hed は読めないので登録しない
+            if known.get(hed_path) == signature:
+                return ()  # 変更なし
+            hed_data = read_bio.decode_hed(HedPath(hed_path))
+            n_frames = sum(bio_frame_count(BioPath(p)) for p in bio_paths)
+            return (
+                hed_path,
+                hed_data.SAMPLING_RATE,
+                hed_data.GAIN,
+                n_frames,
+                n_frames / hed_data.SAMPLING_RATE,
+                mtime,
+                json.dumps(bio_paths),
+                json.dumps(bio_sizes),
+                signature,
+            )
+
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            results = list(pool.map(inspect, hed_paths))
+
+        rows = [row for row in results if row]
+        self._db.executemany(
+            "INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        # 消えた記録・.bio が無くなった記録を削除する
+        alive = {path for path, row in zip(hed_paths, results) if row is not None}
+        self._db.executemany(
+            "DELETE FROM recordings WHERE hed_path = ?",
+            [(path,) for path in known if path not in alive],
+        )
+        self._db.commit()
+        return len(rows)
+
+    def get(self, hed_path: str) -> RecordingEntry | None:
+        """hed_path の記録を返す (未登録なら None)"""
+        row = self._db.execute(
+            f"SELECT {_COLUMNS} FROM recordings WHERE hed_path = ?",
+            (os.path.abspath(hed_path),),
+        ).fetchone()
+        return None if row is None else _to_entry(row)
+
+    def query(
+        self,
+        sampling_rate: int | None = None,
+        gain: int | None = None,
+        min_duration: float | None = None,
+        max_duration: float | None = None,
+    ) -> list[RecordingEntry]:
+        """
+        条件に合う記録をパス順に返す (None の条件は問わない)
+        ----------
+        Args:
+            sampling_rate: サンプリングレート (Hz)
+            gain: GAIN
+            min_duration: 記録長の下限 (s, 以上)
+            max_duration: 記録長の上限 (s, 以下)
+        """
+        conditions = []
+        params = []
+        for clause, value in (
+            ("sampling_rate = ?", sampling_rate),
+            ("gain = ?", gain),
+            ("duration >= ?", min_duration),
+            ("duration <= ?", max_duration),
+        ):
+            if value is not None:
+                conditions.append(clause)
+                params.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._db.execute(
+            f"SELECT {_COLUMNS} FROM recordings{where} ORDER BY hed_path", params
+        ).fetchall()
+        return [_to_entry(row) for row in rows]
+
+
+def _stat_recording(hed_path: str) -> tuple[str, list[str], list[int], float]:
+    """.hed と .bio の stat から (変更検知用の署名, .bio パス, .bio サイズ, 更新時刻) を返す"""
+    bio_paths = [
+        p.path
+        for p in read_bio.find_bio_segments(HedPath(hed_path))
+        if os.path.exists(p.path)
+    ]
+    stats = [os.stat(p) for p in [hed_path, *bio_paths]]
+    signature = json.dumps([[s.st_mtime_ns, s.st_size] for s in stats])
+    mtime = max(s.st_mtime for s in stats)
+    return signature, bio_paths, [s.st_size for s in stats[1:]], mtime
+
+
+def _to_entry(row: tuple) -> RecordingEntry:
+    hed_path, sampling_rate, gain, n_frames, duration, mtime, bio_paths, bio_sizes = row
+    return RecordingEntry(
+        hed_path=hed_path,
+        sampling_rate=sampling_rate,
+        gain=gain,
+        n_frames=n_frames,
+        duration=duration,
+        mtime=mtime,
+        bio_paths=tuple(json.loads(bio_paths)),
+        bio_sizes=tuple(json.loads(bio_sizes)),
+    )
@@ -0,0 +1,114 @@
+"""npz 保存時の可逆な前処理 (コーデック)。
+
+MEA の電位は隣り合うサンプルの相関が強いため、deflate の前に値の並びを
+圧縮しやすい形に変換すると圧縮率と展開速度が上がる。
+
+- "delta"         : 時間方向の1階差分 + zigzag 符号化 (int16 のみ)。小さな差分が
+                    0 付近の小さな符号なし整数になり、上位バイトがほぼ 0 になる
+- "shuffle"       : バイトシャッフル。各行を「下位バイト列 + 上位バイト列」に並べ替え、
+                    似たバイトを隣接させる (int16 / float32)
+- "delta_shuffle" : delta の後に shuffle (int16 のみ。最も縮む)
+
+符号化・復号はどちらも行 (電極) 単位・ベクトル化で行い、行ごとに独立に復号できる。
+差分は int16 の桁あふれ込みで計算し、復号の累積和も同じく桁あふれで戻すため完全に可逆。
+"""
+
+import numpy as np
+from numpy._typing import NDArray
+
+CODEC_NONE = "none"
+CODEC_DELTA = "delta"
+CODEC_SHUFFLE = "shuffle"
+CODEC_DELTA_SHUFFLE = "delta_shuffle"
+
+SUPPORTED_CODECS = (CODEC_NONE, CODEC_DELTA, CODEC_SHUFFLE, CODEC_DELTA_SHUFFLE)
+
+# 差分を使うコーデック (整数でしか可逆にならない)
+_DELTA_CODECS = (CODEC_DELTA, CODEC_DELTA_SHUFFLE)
+_SHUFFLE_CODECS = (CODEC_SHUFFLE, CODEC_DELTA_SHUFFLE)
+
+
+def validate_codec(codec: str, dtype) -> None:
+    """codec が dtype で使えるかを確認する"""
+    if codec not in SUPPORTED_CODECS:
+        raise ValueError(f"codecは {SUPPORTED_CODECS} のいずれかを指定してください: {codec}")
+    if codec in _DELTA_CODECS and np.dtype(dtype) != np.int16:
+        raise ValueError(f"codec={codec} は dtype=int16 でのみ使用できます")
+
+
+def encode_voltages(stored: NDArray, codec: str) -> NDArray:
+    """
+    (電極数, n) の電位を codec で符号化する
+    ----------
+    Returns:
+        符号化した2次元配列 (行数は入力と同じ)。codec="none" なら入力をそのまま返す
+    """
+    validate_codec(codec, stored.dtype)
+    encoded = stored
+    if codec in _DELTA_CODECS:
+        encoded = _zigzag(_delta(stored))
+    if codec in _SHUFFLE_CODECS:
+        encoded = _shuffle(encoded)
+    return encoded
+
+
+def decode_voltages(encoded: NDArray, codec: str, dtype) -> NDArray:
+    """
+    encode_voltages の逆変換。encoded は (行数, *) の2次元配列 (バイト列の reshape でもよい)
+    ----------
+    Returns:
+        (行数, n) の dtype の配列
+    """
+    dtype = np.dtype(dtype)
+    if codec == CODEC_NONE:
+        return _as_rows(encoded, dtype)
+    validate_codec(codec, dtype)
+    if codec in _SHUFFLE_CODECS:
+        encoded = _unshuffle(encoded, np.dtype(np.uint16) if codec in _DELTA_CODECS else dtype)
+    if codec in _DELTA_CODECS:
+        encoded = _undelta(_unzigzag(_as_rows(encoded, np.uint16)))
+    return _as_rows(encoded, dtype)
+
+
+def _as_rows(array: NDArray, dtype: np.dtype) -> NDArray:
+    """2次元配列を行数を保ったまま dtype として読み替える (コピーしない)"""
+    array = np.ascontiguousarray(array)
+    if array.dtype == dtype:
+        return array
+    return array.view(np.uint8).view(dtype)
+
+
+def _delta(x: NDArray) -> NDArray:
+    # 先頭は値そのもの、以降は直前との差分 (int16 の桁あふれ込み)
+    d = np.empty_like(x)
+    d[:, :1] = x[:, :1]
+    np.subtract(x[:, 1:], x[:, :-1], out=d[:, 1:])
+    return d
+
+
+def _undelta(d: NDArray) -> NDArray:
+    # int16 の累積和は桁あふれで巡回するため、差分の桁あふれと打ち消し合う
+    return np.cumsum(d.view(np.int16), axis=1, dtype=np.int16)
+
+
+def _zigzag(d: NDArray) -> NDArray:
+    # 0, -1, 1, -2, 2, ... を 0, 1, 2, 3, 4, ... に対応付ける
+    return ((d << 1) ^ (d >> 15)).view(np.uint16)
+
+
+def _unzigzag(z: NDArray) -> NDArray:
+    return ((z >> 1) ^ (-(z & 1)).astype(np.uint16)).view(np.int16)
+
+
+def _shuffle(x: NDArray) -> NDArray:
+    # (行, n, バイト) → (行, バイト, n): 各行を「第0バイト列, 第1バイト列, ...」に並べる
+    rows, n = x.shape
+    planes = np.ascontiguousarray(x).view(np.uint8).reshape(rows, n, x.dtype.itemsize)
+    return np.ascontiguousarray(planes.transpose(0, 2, 1)).reshape(rows, -1)
+
+
+def _unshuffle(encoded: NDArray, dtype: np.dtype) -> NDArray:
+    raw = _as_rows(encoded, np.dtype(np.uint8))
+    rows = raw.shape[0]
+    planes = raw.reshape(rows, dtype.itemsize, -1).transpose(0, 2, 1)
+    return np.ascontiguousarray(planes).view(dtype).reshape(rows, -1)
@@ -2,12 +2,29 @@
 
 電位データを float32(実質無損失) / int16(16bit量子化) で圧縮保存する。
 時刻行は start/SAMPLING_RATE/列数から復元できるため保存しない(冗長排除)。
+
+chunked=True では電位を (電極ブロック × 時間ブロック) のチャンクに分けて個別に
+zlib 圧縮し、無圧縮の .npz に格納する。読込側は必要なチャンクだけを展開できる
+(1電極の2秒だけを見るために全体を展開しなくてよい)。numpy と標準ライブラリのみで読める。
+チャンクは互いに独立なので、書き込み時の圧縮もスレッドで並列に行う (zlib は GIL を解放する)。
+
+codec を指定すると、圧縮の前に差分・バイトシャッフル等の可逆な変換をかける (npz_codec.py)。
 """
 
+import os
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+from numpy._typing import NDArray
 
 from pyMEA.constants import DEFAULT_ELECTRODE_DISTANCE
+from pyMEA.domain.model.HedPath import HedPath
 from pyMEA.domain.model.MEA import MEA
+from pyMEA.infrastructure import read_bio
+from pyMEA.infrastructure.bio_memmap import bio_voltage_scale
+from pyMEA.infrastructure.npz_codec import CODEC_NONE, encode_voltages, validate_codec
 
 # .npz 内のキー(読込側 reader.py と共有)
 KEY_HED_PATH = "hed_path"
@@ -19,14 +36,43 @@ KEY_END = "end"
 KEY_DTYPE = "dtype"
 KEY_SCALE = "scale"
 KEY_ELECTRODE_DISTANCE = "electrode_distance"
+# 圧縮前の変換。キーが無いファイルは変換なし ("none")
+KEY_CODEC = "codec"
+
+# チャンク形式のキー。KEY_LAYOUT が無いファイルは従来の一括形式 (voltages 1配列)
+KEY_LAYOUT = "layout"
+KEY_SHAPE = "shape"
+KEY_CHUNK_FRAMES = "chunk_frames"
+KEY_CHUNK_CHANNELS = "chunk_channels"
+LAYOUT_CHUNKED = "chunked"
 
 SUPPORTED_DTYPES = ("float32", "int16")
 
+# チャンクの既定の電極数 (64電極を8ブロックに分ける)
+DEFAULT_CHUNK_CHANNELS = 8
+
+# チャンクの既定の圧縮レベル (zlib の既定値。np.savez_compressed と同じ)
+DEFAULT_COMPRESS_LEVEL = 6
+
 _INT16_MAX = 32767
 
 
+def chunk_key(channel_block: int, time_block: int) -> str:
+    """(電極ブロック, 時間ブロック) のチャンクを格納するキー"""
+    return f"chunk_{channel_block}_{time_block}"
+
+
 def save_mea_npz(
-    mea: MEA, path: str, dtype: str = "int16", electrode_distance: int = DEFAULT_ELECTRODE_DISTANCE
+    mea: MEA,
+    path: str,
+    dtype: str = "int16",
+    electrode_distance: int = DEFAULT_ELECTRODE_DISTANCE,
+    chunked: bool = False,
+    chunk_frames: int | None = None,
+    chunk_channels: int = DEFAULT_CHUNK_CHANNELS,
+    compresslevel: int = DEFAULT_COMPRESS_LEVEL,
+    workers: int | None = None,
+    codec: str = CODEC_NONE,
 ) -> None:
     """MEA計測データを .npz(圧縮)で保存する。
 
@@ -41,17 +87,35 @@ def save_mea_npz(
         "float32"(ビット完全一致, 約1/2)
     electrode_distance : int
         電極間距離 (μm)。読込時に再指定不要にするためファイルに保存する
+    chunked : bool
+        True なら (電極ブロック × 時間ブロック) ごとに圧縮したチャンク形式で保存する。
+        read_MEA_npz(path, start=, end=, chs=) で必要なチャンクだけを展開できる
+    chunk_frames : int | None
+        チャンクの時間方向のフレーム数 (None なら1秒分)
+    chunk_channels : int
+        チャンクの電極数
+    compresslevel : int
+        チャンクの zlib 圧縮レベル (0〜9)。小さいほど速く、大きいほど小さくなる
+    workers : int | None
+        チャンクを並列に圧縮するスレッド数 (None なら CPU 数)
+    codec : str
+        圧縮前の可逆な変換。"none"(既定) / "delta"(差分+zigzag, int16のみ) /
+        "shuffle"(バイトシャッフル) / "delta_shuffle"(int16のみ, 最も縮む)
 
     Notes
     -----
     時刻行(array[0])は保存しない。読込時に start/SAMPLING_RATE/列数から再生成する。
     int16 は電位を `scale = max(|V|)/32767` で量子化して保存し、復元時に scale を掛ける
     (誤差 < scale の16bit精度で実質無損失)。
+    一括形式 (chunked=False) は np.savez_compressed で1配列を1コアで圧縮するため、
+    長時間記録を速く保存したい場合は chunked=True を使う。compresslevel / workers は
+    チャンク形式でのみ有効。
     """
     if dtype not in SUPPORTED_DTYPES:
         raise ValueError(
             f"dtypeは {SUPPORTED_DTYPES} のいずれかを指定してください: {dtype}"
         )
+    validate_codec(codec, dtype)
 
     # 時刻行(0行目)は保存せず、電位のみ(1〜64行目)を保存する
     voltages = np.asarray(mea.array[1:], dtype=np.float32)
@@ -64,17 +128,245 @@ def save_mea_npz(
         scale = 1.0
         stored = voltages
 
+    meta = {
+        KEY_HED_PATH: str(mea.hed_path.path),
+        KEY_SAMPLING_RATE: np.int64(mea.SAMPLING_RATE),
+        KEY_GAIN: np.int64(mea.GAIN),
+        KEY_START: np.float64(mea.start),
+        KEY_END: np.float64(mea.end),
+        KEY_DTYPE: dtype,
+        KEY_SCALE: np.float64(scale),
+        KEY_ELECTRODE_DISTANCE: np.int64(electrode_distance),
+    }
+
+    if chunked:
+        with ChunkedNpzWriter(
+            path,
+            stored.dtype,
+            chunk_frames if chunk_frames is not None else int(mea.SAMPLING_RATE),
+            chunk_channels,
+            compresslevel=compresslevel,
+            workers=workers,
+            codec=codec,
+        ) as writer:
+            writer.append(stored)
+            writer.close(meta)
+        return
+
     np.savez_compressed(
         path,
-        **{
-            KEY_HED_PATH: str(mea.hed_path.path),
-            KEY_VOLTAGES: stored,
-            KEY_SAMPLING_RATE: np.int64(mea.SAMPLING_RATE),
-            KEY_GAIN: np.int64(mea.GAIN),
-            KEY_START: np.float64(mea.start),
-            KEY_END: np.float64(mea.end),
-            KEY_DTYPE: dtype,
-            KEY_SCALE: np.float64(scale),
-            KEY_ELECTRODE_DISTANCE: np.int64(electrode_distance),
-        },
+        **{KEY_VOLTAGES: encode_voltages(stored, codec), KEY_CODEC: codec},
+        **meta,
     )
+
+
+def save_recording_npz(
+    hed_path: str,
+    path: str,
+    dtype: str = "int16",
+    electrode_distance: int = DEFAULT_ELECTRODE_DISTANCE,
+    window_s: float = 10,
+    compresslevel: int = DEFAULT_COMPRESS_LEVEL,
+    workers: int | None = None,
+    codec: str = CODEC_NONE,
+) -> None:
+    """.hed/.bio の記録全体を、全体をメモリに載せずにチャンク形式の .npz へ変換する。
+
+    Parameters
+    ----------
+    hed_path : str
+        .hedファイルのパス
+    path : str
+        保存先パス(.npz)
+    dtype : str
+        "int16"(既定) / "float32"
+    electrode_distance : int
+        電極間距離 (μm)
+    window_s : float
+        1回に読み込む長さ (s)。メモリ使用量はこの長さ分で頭打ちになる
+    compresslevel : int
+        チャンクの zlib 圧縮レベル (0〜9)
+    workers : int | None
+        チャンクを並列に圧縮するスレッド数 (None なら CPU 数)
+    codec : str
+        圧縮前の可逆な変換 (save_mea_npz と同じ)
+
+    Notes
+    -----
+    記録を iter_windows で window_s ごとに読み、ChunkedNpzWriter に追記する。
+    int16 の scale は全体の max(|V|) ではなく .bio の ADC 分解能 (1LSB の電位) を使う。
+    先に全体を見る必要がなく1パスで書けるうえ、元の int16 の生値をそのまま復元できる
+    (save_mea_npz の int16 より誤差が小さい)。
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(
+            f"dtypeは {SUPPORTED_DTYPES} のいずれかを指定してください: {dtype}"
+        )
+    hed_path = HedPath(hed_path)
+    hed_data = read_bio.decode_hed(hed_path)
+    scale = bio_voltage_scale(hed_data.GAIN) if dtype == "int16" else 1.0
+    inv_scale = np.float32(1 / scale)
+
+    # 読込・追記で例外が起きても with を抜けるときにファイルとスレッドプールを閉じる
+    with ChunkedNpzWriter(
+        path,
+        np.int16 if dtype == "int16" else np.float32,
+        chunk_frames=hed_data.SAMPLING_RATE,
+        compresslevel=compresslevel,
+        workers=workers,
+        codec=codec,
+    ) as writer:
+        end = 0.0
+        for block in read_bio.iter_windows(hed_path, window_s):
+            voltages = np.asarray(block.array[1:])
+            if dtype == "int16":
+                voltages = np.rint(voltages * inv_scale)
+                np.clip(voltages, -_INT16_MAX - 1, _INT16_MAX, out=voltages)
+            writer.append(voltages)
+            end = block.end
+        writer.close(
+            {
+                KEY_HED_PATH: str(hed_path.path),
+                KEY_SAMPLING_RATE: np.int64(hed_data.SAMPLING_RATE),
+                KEY_GAIN: np.int64(hed_data.GAIN),
+                KEY_START: np.float64(0),
+                KEY_END: np.float64(end),
+                KEY_DTYPE: dtype,
+                KEY_SCALE: np.float64(scale),
+                KEY_ELECTRODE_DISTANCE: np.int64(electrode_distance),
+            }
+        )
+
+
+class ChunkedNpzWriter:
+    """
+    チャンク形式の .npz を時間方向に追記しながら書き出す
+    ----------
+    Args:
+        path: 保存先パス。拡張子が無ければ .npz を付与する (np.savez と同じ)
+        dtype: 保存する電位の dtype (int16 / float32)
+        chunk_frames: チャンクの時間方向のフレーム数
+        chunk_channels: チャンクの電極数
+        compresslevel: zlib の圧縮レベル (0〜9)
+        workers: チャンクを並列に圧縮するスレッド数 (None なら CPU 数)
+        codec: 圧縮前の可逆な変換 (チャンクごとに独立にかけるので単独で復号できる)
+
+    append で受け取った電位は chunk_frames 単位でチャンクに分けて逐次書き出すため、
+    長時間記録でも保持するのは append 1回分だけで済む。チャンクの圧縮はスレッドプールで
+    並列に行い、zip への書き込みだけを順に行う。close でメタ情報を書き込む。
+    with 文で使うと、close する前に例外で抜けた場合は abort でファイルと
+    スレッドプールを閉じる (書きかけのファイルは呼び出し側で削除する)。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dtype,
+        chunk_frames: int,
+        chunk_channels: int = DEFAULT_CHUNK_CHANNELS,
+        compresslevel: int = DEFAULT_COMPRESS_LEVEL,
+        workers: int | None = None,
+        codec: str = CODEC_NONE,
+    ):
+        validate_codec(codec, dtype)
+        if chunk_frames <= 0 or chunk_channels <= 0:
+            raise ValueError("chunk_framesとchunk_channelsは正の整数で入力してください")
+        if not (0 <= compresslevel <= 9):
+            raise ValueError("compresslevelは0-9の整数で入力してください")
+        path = str(path)
+        if not path.endswith(".npz"):
+            path += ".npz"
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True)
+        self._dtype = np.dtype(dtype)
+        self._chunk_frames = chunk_frames
+        self._chunk_channels = chunk_channels
+        self._pending: list[NDArray] = []
+        self._pending_frames = 0
+        self._time_block = 0
+        self._n_frames = 0
+        self._n_channels: int | None = None
+        self._compresslevel = compresslevel
+        self._codec = codec
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        self._pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        self._closed = False
+
+    def __enter__(self) -> "ChunkedNpzWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.abort()
+
+    def append(self, voltages: NDArray) -> None:
+        """(電極数, n) の電位を末尾に追記する"""
+        voltages = np.asarray(voltages, dtype=self._dtype)
+        self._n_channels = voltages.shape[0]
+        self._pending.append(voltages)
+        self._pending_frames += voltages.shape[1]
+        if self._pending_frames >= self._chunk_frames:
+            self._flush(final=False)
+
+    def close(self, meta: dict) -> None:
+        """残りのチャンクとメタ情報を書き込んでファイルを閉じる"""
+        try:
+            self._flush(final=True)
+            self._write(KEY_LAYOUT, LAYOUT_CHUNKED)
+            self._write(KEY_SHAPE, np.array([self._n_channels or 0, self._n_frames]))
+            self._write(KEY_CHUNK_FRAMES, np.int64(self._chunk_frames))
+            self._write(KEY_CHUNK_CHANNELS, np.int64(self._chunk_channels))
+            self._write(KEY_CODEC, self._codec)
+            for key, value in meta.items():
+                self._write(key, value)
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        """ファイルとスレッドプールを閉じる (2回目以降は何もしない)。
+
+        close の前に呼ぶとメタ情報を書かずに閉じるため、読めない .npz が残る。
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._zip.close()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+
+    def _flush(self, final: bool) -> None:
+        if not self._pending:
+            return
+        buffered = np.concatenate(self._pending, axis=1)
+        n_full = buffered.shape[1] // self._chunk_frames * self._chunk_frames
+        end = buffered.shape[1] if final else n_full
+        chunks = []
+        for t0 in range(0, end, self._chunk_frames):
+            block = buffered[:, t0 : t0 + self._chunk_frames]
+            for c0 in range(0, block.shape[0], self._chunk_channels):
+                key = chunk_key(c0 // self._chunk_channels, self._time_block)
+                chunks.append((key, block[c0 : c0 + self._chunk_channels]))
+            self._time_block += 1
+            self._n_frames += block.shape[1]
+
+        # 圧縮は並列、zip への書き込みは順に行う (map は投入順に結果を返す)
+        compressed = (
+            map(self._compress, chunks)
+            if self._pool is None
+            else self._pool.map(self._compress, chunks)
+        )
+        for key, payload in compressed:
+            self._write(key, payload)
+
+        rest = buffered[:, end:]
+        self._pending = [rest] if rest.shape[1] else []
+        self._pending_frames = rest.shape[1]
+
+    def _compress(self, item: tuple[str, NDArray]) -> tuple[str, NDArray]:
+        key, chunk = item
+        raw = np.ascontiguousarray(encode_voltages(chunk, self._codec)).tobytes()
+        return key, np.frombuffer(zlib.compress(raw, self._compresslevel), dtype=np.uint8)
+
+    def _write(self, key: str, value) -> None:
+        with self._zip.open(f"{key}.npy", "w", force_zip64=True) as f:
+            np.lib.format.write_array(f, np.asanyarray(value), allow_pickle=False)
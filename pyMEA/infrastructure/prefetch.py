@@ -0,0 +1,136 @@
+"""複数記録を順に解析するバッチ処理向けの先読み Reader。
+
+記録 i を解析している間に、バックグラウンドスレッドで記録 i+1 以降を読み込んでおく。
+ネットワークストレージからの .bio 読込 (I/O 待ち) とフィルタ・ピーク検出 (CPU) が
+重なるため、バッチ全体の時間が短くなる。読込は numpy/ファイル I/O で GIL を解放する。
+"""
+
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+
+from pyMEA.domain.model.VoltageArray import VoltageArray
+from pyMEA.infrastructure.reader import MEAReader, MEAReadResult
+
+# 読込スレッドの終了を知らせる目印
+_DONE = object()
+
+
+class PrefetchReader:
+    """
+    Reader の列を先読みしながら MEAReadResult を順に返すイテレータ
+    ----------
+    Args:
+        readers: 読み込む Reader (create_reader の戻り値など) の列。遅延生成でもよい
+        depth: 先読みして保持しておく最大件数 (1 以上)
+        max_bytes: 先読み済みの電位データの合計バイト数の上限 (None なら無制限)。
+            合計がこれ以上の間は次の読込を始めない (少なくとも1件は先読みする)
+
+    使い方::
+
+        readers = (create_reader(p, start=0, end=60) for p in hed_paths)
+        with PrefetchReader(readers, depth=2) as results:
+            for result in results:
+                analyze(result)  # この間に次の記録を読み込む
+
+    読込で発生した例外は、その記録の順番で呼び出し側に送出する。
+    途中で抜ける場合は close (with 文) で読込スレッドを止める。
+    """
+
+    def __init__(
+        self,
+        readers: Iterable[MEAReader],
+        depth: int = 2,
+        max_bytes: int | None = None,
+    ):
+        if depth < 1:
+            raise ValueError("depthは1以上の整数で入力してください")
+        self._readers = readers
+        self._depth = depth
+        self._max_bytes = max_bytes
+        self._buffer: deque = deque()
+        self._buffered_bytes = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "PrefetchReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[MEAReadResult]:
+        with self._cond:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        while True:
+            with self._cond:
+                # close されたら (別スレッドからでも) 読み残しがあっても終える
+                self._cond.wait_for(lambda: self._buffer or self._stopped)
+                if self._stopped:
+                    return
+                item, nbytes = self._buffer.popleft()
+                self._buffered_bytes -= nbytes
+                self._cond.notify_all()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def close(self) -> None:
+        """読込スレッドを止める (読込中の1件は読み終わるまで待つ)"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            for reader in self._readers:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._stopped or self._has_room())
+                    if self._stopped:
+                        return
+                try:
+                    item = reader.read()
+                except Exception as e:  # 呼び出し側の順番で送出する
+                    item = e
+                self._put(item, _result_nbytes(item))
+        except Exception as e:  # readers の生成自体の失敗
+            self._put(e, 0)
+        finally:
+            # 止められた場合も含め、待っている __iter__ を必ず起こす
+            self._put(_DONE, 0)
+
+    def _has_room(self) -> bool:
+        if len(self._buffer) >= self._depth:
+            return False
+        return (
+            self._max_bytes is None
+            or not self._buffer
+            or self._buffered_bytes < self._max_bytes
+        )
+
+    def _put(self, item, nbytes: int) -> None:
+        with self._cond:
+            self._buffer.append((item, nbytes))
+            self._buffered_bytes += nbytes
+            self._cond.notify_all()
+
+
+def _result_nbytes(item) -> int:
+    """先読み済みの結果が保持している電位データのバイト数 (遅延配列は0)"""
+    if not isinstance(item, MEAReadResult):
+        return 0
+    if isinstance(item.array, np.ndarray):
+        return item.array.nbytes
+    if isinstance(item.array, VoltageArray):
+        # 量子化データは int16 のまま保持しているぶんだけ数える
+        return item.array.held_nbytes
+    return 0
@@ -1,14 +1,20 @@
 import os
+from collections.abc import Iterator
 
 import numpy as np
-from numpy import float64
+from numpy import float32, float64
 from numpy._typing import NDArray
 
 from pyMEA.constants import NUM_ELECTRODES, REFERENCE_GAIN
 from pyMEA.domain.model.BioPath import BioPath
+from pyMEA.domain.model.ChannelSubsetArray import ChannelSubsetArray
 from pyMEA.domain.model.HedData import HedData
 from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.MEA import MEA
+from pyMEA.domain.model.QuantizedArray import QuantizedArray
+from pyMEA.domain.model.VoltageBlock import VoltageBlock
 from pyMEA.domain.validators import time_validator
+from pyMEA.infrastructure.bio_memmap import BioMemmap, open_bio_memmap
 
 
 # hedファイルの解読関数
@@ -42,40 +48,25 @@ def read_bio(
     sampling_rate=10000,
     gain=REFERENCE_GAIN,
     volt_range=100,
+    chs: list[int] | None = None,
 ) -> NDArray[float64]:  # sampling_rate (Hz), volt_range (mV)
-    data_unit_length = NUM_ELECTRODES + 4
-
-    bytesize = np.dtype("<h").itemsize
-    data = (
-        np.fromfile(
-            bio_path.path,
-            dtype="<h",
-            sep="",
-            offset=start * sampling_rate * bytesize * data_unit_length,
-            count=(end - start) * sampling_rate * data_unit_length,
-        )
-        * (volt_range / (2**16 - 2))
-        * 4
+    """
+    bioファイルの [start, end) を (時刻行 + 64電極) の float64 配列で読み込む\n
+    int16 の生データを確保済みの出力へ1パスで復号する (換算は1回の乗算、
+    補助チャンネルはストライドビューで読み飛ばす)。
+    chs (電極番号のリスト) を指定すると、その電極の列だけを復号して
+    (時刻行 + len(chs)) の配列を返す。
+    """
+    return read_bio_segments(
+        [bio_path], start, end, sampling_rate, gain, volt_range, chs=chs
     )
-    data = data.reshape(int(len(data) / data_unit_length), data_unit_length).T
-    data = np.delete(data, range(4), 0)
-
-    # Gainの値に合わせてデータを増幅させる。
-    if gain != REFERENCE_GAIN:
-        amp = REFERENCE_GAIN / gain
-        data *= amp
-
-    t = np.arange(len(data[0])) / sampling_rate
-    t = t.reshape(1, len(t))
-    t = t + start
-    data = np.append(t, data, axis=0)
-
-    return data
 
 
 # hedファイルの情報からbioファイルを一気に読み込む
 @time_validator
-def hed2array(hed_path: HedPath, start: int, end: int) -> NDArray[float64]:
+def hed2array(
+    hed_path: HedPath, start: int, end: int, chs: list[int] | None = None
+) -> NDArray[float64]:
     """
     ヘッダーファイルからサンプリングレートとGainを読み取りbioファイルを読み込む\n
     Parameters
@@ -83,6 +74,8 @@ def hed2array(hed_path: HedPath, start: int, end: int) -> NDArray[float64]:
         hed_path: ヘッダーファイルのパス\n
         start: 読み込み開始時間\n
         end: 読み込み終了時間\n
+        chs: 読み込む電極番号。指定すると [時刻データ, chs[0]の電位, chs[1]の電位, ...]
+            だけを返す (他の電極は復号しない)\n
 
     Returns
     -------
@@ -100,7 +93,248 @@ def hed2array(hed_path: HedPath, start: int, end: int) -> NDArray[float64]:
     # hedファイルからサンプリングレートとゲインを取得
     hed_data = decode_hed(hed_path)
 
-    bio_path = BioPath(os.path.splitext(hed_path.path)[0] + "0001.bio")
+    # 0002.bio 以降に分割された記録はファイル境界をまたいで1本の区間として読む
+    bio_paths = find_bio_segments(hed_path)
+    if len(bio_paths) > 1:
+        return read_bio_segments(
+            bio_paths,
+            start,
+            end,
+            sampling_rate=hed_data.SAMPLING_RATE,
+            gain=hed_data.GAIN,
+            chs=chs,
+        )
+
     return read_bio(
-        bio_path, start, end, sampling_rate=hed_data.SAMPLING_RATE, gain=hed_data.GAIN
+        bio_path_of(hed_path),
+        start,
+        end,
+        sampling_rate=hed_data.SAMPLING_RATE,
+        gain=hed_data.GAIN,
+        chs=chs,
     )
+
+
+def bio_path_of(hed_path: HedPath, segment: int = 1) -> BioPath:
+    """ヘッダーファイルに対応する .bio (<stem>0001.bio, 0002.bio, ...) のパスを返す"""
+    return BioPath(f"{os.path.splitext(hed_path.path)[0]}{segment:04d}.bio")
+
+
+def find_bio_segments(hed_path: HedPath) -> list[BioPath]:
+    """
+    分割記録の .bio を 0001 から連番で探して時間順に返す\n
+    1つも存在しない場合は 0001.bio のパスだけを返す (読込時に FileNotFoundError になる)。
+    """
+    bio_paths = []
+    while os.path.exists((bio_path := bio_path_of(hed_path, len(bio_paths) + 1)).path):
+        bio_paths.append(bio_path)
+    return bio_paths or [bio_path_of(hed_path)]
+
+
+def _validate_chs(chs: list[int] | None) -> None:
+    if chs is not None:
+        for ch in chs:
+            if not (1 <= ch <= NUM_ELECTRODES):
+                raise ValueError("chは1-64の整数で入力してください")
+
+
+def read_bio_segments(
+    bio_paths: list[BioPath],
+    start: int,
+    end: int,
+    sampling_rate=10000,
+    gain=REFERENCE_GAIN,
+    volt_range=100,
+    chs: list[int] | None = None,
+) -> NDArray[float64]:
+    """
+    分割された .bio を1本の記録とみなして [start, end) を読み込む\n
+    全ファイルを連結せず、区間にかかるファイルの該当部分だけを出力に直接書き込む。
+    戻り値の形式は read_bio と同じ (時刻行 + 64電極、chs 指定時は時刻行 + len(chs))。
+    """
+    _validate_chs(chs)
+    recording = open_bio_memmap(bio_paths, sampling_rate, gain, volt_range)
+    start_frame, end_frame = _frame_range(recording, start, end)
+
+    n_rows = NUM_ELECTRODES if chs is None else len(chs)
+    data = np.empty((n_rows + 1, end_frame - start_frame), dtype=float64)
+    data[0] = np.arange(end_frame - start_frame) / sampling_rate + start
+    recording.read_voltages(start_frame, end_frame, out=data[1:], chs=chs)
+    return data
+
+
+def _frame_range(recording: BioMemmap, start: int, end: int) -> tuple[int, int]:
+    start_frame = min(int(start * recording.sampling_rate), recording.n_frames)
+    end_frame = min(int(end * recording.sampling_rate), recording.n_frames)
+    return start_frame, end_frame
+
+
+def _read_bio_voltages(
+    bio_paths: list[BioPath],
+    start: int,
+    end: int,
+    sampling_rate=10000,
+    gain=REFERENCE_GAIN,
+    volt_range=100,
+    chs: list[int] | None = None,
+) -> NDArray[float32]:
+    """
+    MEA の読み込み用に [start, end) の電位だけを読み取り専用の float32 で復号する\n
+    時刻行は作らず (MEA が start から導出する)、int16 の生データを確保済みの
+    (64, N) (chs 指定時は (len(chs), N)) の出力へ1パスで復号する。中間配列を作らないため
+    ピークメモリはほぼ出力サイズになり、MEA はコピーせずにそのまま保持する。
+    """
+    _validate_chs(chs)
+    recording = open_bio_memmap(bio_paths, sampling_rate, gain, volt_range)
+    start_frame, end_frame = _frame_range(recording, start, end)
+
+    n_rows = NUM_ELECTRODES if chs is None else len(chs)
+    voltages = np.empty((n_rows, end_frame - start_frame), dtype=float32)
+    recording.read_voltages(start_frame, end_frame, out=voltages, chs=chs)
+    voltages.setflags(write=False)
+    return voltages
+
+
+@time_validator
+def _hed2voltages(
+    hed_path: HedPath, start: int, end: int, chs: list[int] | None = None
+) -> VoltageBlock | ChannelSubsetArray:
+    """
+    hed2array と同じ区間を MEA に渡す float32 の電位配列として読み込む\n
+    chs を指定すると、その電極だけを持つ ChannelSubsetArray を返す。
+    """
+    hed_data = decode_hed(hed_path)
+    voltages = _read_bio_voltages(
+        find_bio_segments(hed_path),
+        start,
+        end,
+        sampling_rate=hed_data.SAMPLING_RATE,
+        gain=hed_data.GAIN,
+        chs=chs,
+    )
+    if chs is None:
+        return VoltageBlock(voltages, start, hed_data.SAMPLING_RATE)
+    return ChannelSubsetArray(voltages, list(chs), start, hed_data.SAMPLING_RATE)
+
+
+def hed2memmap(hed_path: HedPath) -> BioMemmap:
+    """
+    bioファイル全体を memmap で開き、遅延復号される (65, N) 電位配列を返す\n
+    0002.bio 以降に分割された記録は連結せずに1本の時間軸として開く。
+    記録長に関わらず O(1) で開け、アクセスした電極・区間だけが復号される。
+    MEA の array にそのまま渡せる。
+    """
+    hed_data = decode_hed(hed_path)
+    return open_bio_memmap(
+        find_bio_segments(hed_path), hed_data.SAMPLING_RATE, gain=hed_data.GAIN
+    )
+
+
+@time_validator
+def hed2memmap_range(hed_path: HedPath, start: int, end: int) -> BioMemmap:
+    """
+    hed2memmap の [start, end) の時間窓を返す
+
+    電位は復号せず、アクセスした電極・区間だけが復号される。FilterPipeline で
+    チャンクごとに読みながらフィルタする入力に使う。
+    """
+    recording = hed2memmap(hed_path)
+    start_frame, end_frame = _frame_range(recording, start, end)
+    return recording[:, start_frame:end_frame]
+
+
+@time_validator
+def hed2quantized(
+    hed_path: HedPath, start: int, end: int, chs: list[int] | None = None
+) -> QuantizedArray:
+    """
+    bioファイルの [start, end) を int16 のまま読み込み、QuantizedArray で返す
+
+    scale は .bio の ADC 分解能 (1LSB の電位) なので、元の生値をそのまま保持する (無損失)。
+    生値を memmap からフレームのブロックごとに int16 のまま写すため、float の電位配列は
+    確保せず、ピークメモリは int16 の出力サイズになる。
+    """
+    recording = hed2memmap(hed_path)
+    start_frame, end_frame = _frame_range(recording, start, end)
+    _validate_chs(chs)
+    samples = recording.read_raw(start_frame, end_frame, chs=chs)
+    # 読み取り専用にして QuantizedArray にコピーせずに渡す
+    samples.setflags(write=False)
+    return QuantizedArray(
+        samples,
+        recording.scale,
+        start,
+        recording.sampling_rate,
+        chs,
+    )
+
+
+def iter_windows(
+    hed_path: HedPath,
+    window_s: float,
+    hop_s: float | None = None,
+    start: float = 0,
+    end: float | None = None,
+) -> Iterator[MEA]:
+    """
+    長時間記録を固定長の MEA ブロックに分けて先頭から順に返すジェネレータ\n
+    .hed の解読と .bio のオープン (memmap) は最初の1回だけ行い、各ブロックは
+    その区間だけを復号する。呼び出し側が前のブロックを手放せばメモリは1ブロック分で済む。
+
+    Parameters
+    ----------
+        hed_path: ヘッダーファイルのパス\n
+        window_s: 1ブロックの長さ (s)\n
+        hop_s: ブロック開始位置の間隔 (s)。None なら window_s (重なりなし)。
+            window_s より小さくすると前後のブロックが window_s - hop_s 秒重なる\n
+        start: 読み込み開始時間 (s)\n
+        end: 読み込み終了時間 (s)。None なら記録の末尾まで\n
+
+    Yields
+    -------
+        MEA: [t, t + window_s) のブロック。末尾のブロックのみ短くなることがある
+
+    Notes
+    -----
+    フィルタやピーク検出をブロック境界でつなぐ場合は hop_s < window_s で重なりを持たせ、
+    各ブロックの端 (重なり幅の半分) を捨てて中央部分の結果だけを採用する。
+    ピーク位置はブロックの start を足せば記録全体の時刻に戻せる。
+    """
+    if isinstance(hed_path, str):
+        hed_path = HedPath(hed_path)
+    if hop_s is None:
+        hop_s = window_s
+    if window_s <= 0 or hop_s <= 0:
+        raise ValueError("window_sとhop_sは正の値で入力してください")
+
+    hed_data = decode_hed(hed_path)
+    sampling_rate = hed_data.SAMPLING_RATE
+    recording = open_bio_memmap(
+        find_bio_segments(hed_path), sampling_rate, gain=hed_data.GAIN
+    )
+
+    start_frame = int(round(start * sampling_rate))
+    end_frame = recording.n_frames if end is None else int(round(end * sampling_rate))
+    end_frame = min(end_frame, recording.n_frames)
+    if start_frame < 0 or start_frame >= end_frame:
+        raise ValueError("start < endになるように入力してください")
+    window_frames = max(1, int(round(window_s * sampling_rate)))
+    hop_frames = max(1, int(round(hop_s * sampling_rate)))
+
+    frame = start_frame
+    while True:
+        stop = min(frame + window_frames, end_frame)
+        # 電位行だけを復号する (時刻行は MEA 側で start から導出する)
+        voltages = recording.read_voltages(frame, stop)
+        voltages.setflags(write=False)
+        yield MEA(
+            hed_path,
+            frame / sampling_rate,
+            stop / sampling_rate,
+            sampling_rate,
+            hed_data.GAIN,
+            VoltageBlock(voltages, frame / sampling_rate, sampling_rate),
+        )
+        if stop >= end_frame:
+            break
+        frame += hop_frames
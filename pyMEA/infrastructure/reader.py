@@ -5,6 +5,8 @@ MEAReadResult を返す。新形式追加時は Reader を1つ足して create_r
 1行追加するだけでよい(開放閉鎖原則)。
 """
 
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Protocol
@@ -13,18 +15,31 @@ import numpy as np
 from numpy import float64
 from numpy._typing import NDArray
 
+from pyMEA.domain.model.ChannelSubsetArray import ChannelSubsetArray
 from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.QuantizedArray import QuantizedArray
+from pyMEA.domain.model.VoltageArray import VoltageArray
+from pyMEA.domain.model.VoltageBlock import VoltageBlock
 from pyMEA.infrastructure import read_bio
+from pyMEA.infrastructure.npz_codec import CODEC_NONE, decode_voltages
+from pyMEA.infrastructure.result_cache import source_fingerprint
 from pyMEA.infrastructure.npz_io import (
+    KEY_CHUNK_CHANNELS,
+    KEY_CODEC,
+    KEY_CHUNK_FRAMES,
     KEY_DTYPE,
     KEY_ELECTRODE_DISTANCE,
     KEY_END,
     KEY_GAIN,
     KEY_HED_PATH,
+    KEY_LAYOUT,
     KEY_SAMPLING_RATE,
     KEY_SCALE,
+    KEY_SHAPE,
     KEY_START,
     KEY_VOLTAGES,
+    LAYOUT_CHUNKED,
+    chunk_key,
 )
 
 
@@ -33,31 +48,59 @@ class MEAReadResult:
     """形式差を吸収した読込結果。array は時刻行+電位の (65, N)。"""
 
     hed_path: HedPath
-    array: NDArray[float64]
+    array: NDArray[float64] | VoltageArray
     sampling_rate: int
     gain: int
     start: float
     end: float
     # 電極間距離 (μm)。.npz は保存値を持つ。.hed/.bio は持たない(read_MEAが引数で受ける)
     electrode_distance: int | None = None
+    # 元ファイルの指紋 (派生結果のキャッシュキーに使う)。ファイルがなければ None
+    source: str | None = None
 
 
 class MEAReader(Protocol):
     def read(self) -> MEAReadResult: ...
 
 
+def hed_fingerprint(hed_path: HedPath) -> str | None:
+    """.hed と分割された .bio すべての指紋 (どれかが書き換わればキャッシュを使わない)"""
+    bio_paths = [p.path for p in read_bio.find_bio_segments(hed_path)]
+    return source_fingerprint([hed_path.path, *bio_paths])
+
+
 class HedBioReader:
-    """.hed/.bio を読み込む Reader。サンプリングレート・GAINはヘッダーから取得する。"""
+    """.hed/.bio を読み込む Reader。サンプリングレート・GAINはヘッダーから取得する。
+
+    quantized=True なら電位を int16 (.bio の生値) + scale の QuantizedArray で保持する。
+    """
 
-    def __init__(self, hed_path: str, start: int, end: int):
+    def __init__(
+        self,
+        hed_path: str,
+        start: int,
+        end: int,
+        chs: list[int] | None = None,
+        quantized: bool = False,
+    ):
         self._hed_path = HedPath(hed_path)
         self._start = start
         self._end = end
+        self._chs = chs
+        self._quantized = quantized
 
     def read(self) -> MEAReadResult:
         # フィクスチャ差し替えが効くようモジュール経由で呼ぶ
         hed_data = read_bio.decode_hed(self._hed_path)
-        array = read_bio.hed2array(self._hed_path, self._start, self._end)
+        if self._quantized:
+            array = read_bio.hed2quantized(
+                self._hed_path, self._start, self._end, self._chs
+            )
+        else:
+            # 電位だけを読み取り専用の float32 で読む (MEA はコピーせずに保持する)
+            array = read_bio._hed2voltages(
+                self._hed_path, self._start, self._end, self._chs
+            )
         return MEAReadResult(
             hed_path=self._hed_path,
             array=array,
@@ -65,24 +108,76 @@ class HedBioReader:
             gain=hed_data.GAIN,
             start=self._start,
             end=self._end,
+            source=hed_fingerprint(self._hed_path),
+        )
+
+
+class HedBioMemmapReader:
+    """.hed/.bio を memmap で開く Reader。電位は読み込まず、アクセス時に遅延復号する。
+
+    start/end (s) を両方指定するとその区間の時間窓を開く (省略時は記録全体)。
+    """
+
+    def __init__(self, hed_path: str, start: int | None = None, end: int | None = None):
+        self._hed_path = HedPath(hed_path)
+        self._start = start
+        self._end = end
+
+    def read(self) -> MEAReadResult:
+        hed_data = read_bio.decode_hed(self._hed_path)
+        if self._start is None and self._end is None:
+            array = read_bio.hed2memmap(self._hed_path)
+            start, end = 0, array.n_frames / hed_data.SAMPLING_RATE
+        else:
+            start, end = self._start, self._end
+            array = read_bio.hed2memmap_range(self._hed_path, start, end)
+        return MEAReadResult(
+            hed_path=self._hed_path,
+            array=array,
+            sampling_rate=hed_data.SAMPLING_RATE,
+            gain=hed_data.GAIN,
+            start=start,
+            end=end,
+            source=hed_fingerprint(self._hed_path),
         )
 
 
 class NpzReader:
-    """.npz を読み込む Reader。時刻行はメタ情報から再生成する。"""
+    """
+    .npz を読み込む Reader。時刻行はメタ情報から再生成する。
 
-    def __init__(self, path: str):
+    start/end (s) と chs (電極番号) を指定すると、その区間・電極だけを読み込む。
+    チャンク形式 (save_mea_npz(chunked=True)) なら必要なチャンクだけをスレッド並列で
+    展開する。一括形式は全体を展開してから切り出す。電極指定時は指定電極だけを
+    チャンネルマップ付きで保持し、指定外の電極は0として読める。
+    quantized=True なら int16 で保存された電位を float32 に展開せず、
+    int16 + scale のまま QuantizedArray として保持する (メモリは float32 の半分)。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        start: float | None = None,
+        end: float | None = None,
+        chs: list[int] | None = None,
+        workers: int | None = None,
+        quantized: bool = False,
+    ):
         self._path = path
+        self._start = start
+        self._end = end
+        self._chs = chs
+        self._workers = workers
+        self._quantized = quantized
 
     def read(self) -> MEAReadResult:
         with np.load(self._path) as data:
-            stored = data[KEY_VOLTAGES]
             dtype = str(data[KEY_DTYPE])
             scale = float(data[KEY_SCALE])
             sampling_rate = int(data[KEY_SAMPLING_RATE])
             gain = int(data[KEY_GAIN])
-            start = float(data[KEY_START])
-            end = float(data[KEY_END])
+            file_start = float(data[KEY_START])
+            file_end = float(data[KEY_END])
             hed_path = str(data[KEY_HED_PATH])
             # 旧形式(電極間距離なし)との後方互換のため存在チェックする
             electrode_distance = (
@@ -90,17 +185,66 @@ class NpzReader:
                 if KEY_ELECTRODE_DISTANCE in data.files
                 else None
             )
+            # 換算は float64 で行ってから float32 に丸める (.bio の復号・QuantizedArray と同じ)
+            factor = np.float64(scale if dtype == "int16" else 1)
+            # 旧形式 (コーデックなし) との後方互換のため存在チェックする
+            codec = str(data[KEY_CODEC]) if KEY_CODEC in data.files else CODEC_NONE
+            stored_dtype = np.dtype(np.int16 if dtype == "int16" else np.float32)
+            chunked = (
+                KEY_LAYOUT in data.files and str(data[KEY_LAYOUT]) == LAYOUT_CHUNKED
+            )
+            stored = (
+                None
+                if chunked
+                else decode_voltages(data[KEY_VOLTAGES], codec, stored_dtype)
+            )
+            n_channels, n_frames = (
+                (int(v) for v in data[KEY_SHAPE]) if chunked else stored.shape
+            )
+            start_frame, end_frame = self._frame_range(file_start, sampling_rate, n_frames)
+            chs = self._selected_chs(n_channels)
+            n = end_frame - start_frame
+            quantized = self._quantized and dtype == "int16"
 
-        if dtype == "int16":
-            voltages = stored.astype(np.float32) * np.float32(scale)
-        else:
-            voltages = stored.astype(np.float32)
+            if quantized:
+                # int16 のまま取り出し、換算は QuantizedArray がアクセス時に行う
+                array = np.empty((len(chs), n), dtype=np.int16)
+                voltages = array
+            else:
+                # 電位行だけを確保する (時刻行は MEA 側で start から導出する)
+                array = np.empty((len(chs), n), dtype=np.float32)
+                voltages = array
+            if chunked:
+                self._read_chunks(
+                    data,
+                    None if quantized else factor,
+                    codec,
+                    chs,
+                    start_frame,
+                    end_frame,
+                    voltages,
+                )
+            else:
+                for row, ch in enumerate(chs):
+                    source = stored[ch - 1, start_frame:end_frame]
+                    if quantized:
+                        voltages[row] = source
+                    else:
+                        np.multiply(
+                            source, factor, out=voltages[row], casting="unsafe"
+                        )
 
-        n = voltages.shape[1]
-        # (65, N) を float32 で組み立てる。時刻行は捨て駒(MEA側で float64 再生成)。
-        array = np.empty((voltages.shape[0] + 1, n), dtype=np.float32)
-        array[0] = np.arange(n) / sampling_rate + start
-        array[1:] = voltages
+        start = file_start + start_frame / sampling_rate
+        end = file_end if self._end is None else file_start + end_frame / sampling_rate
+        if quantized:
+            array = QuantizedArray(array, scale, start, sampling_rate, chs)
+        else:
+            array.setflags(write=False)
+            array = (
+                VoltageBlock(array, start, sampling_rate)
+                if self._chs is None
+                else ChannelSubsetArray(array, chs, start, sampling_rate)
+            )
 
         return MEAReadResult(
             hed_path=HedPath(hed_path),
@@ -110,16 +254,102 @@ class NpzReader:
             start=start,
             end=end,
             electrode_distance=electrode_distance,
+            source=source_fingerprint([self._path]),
+        )
+
+    def _frame_range(
+        self, file_start: float, sampling_rate: int, n_frames: int
+    ) -> tuple[int, int]:
+        start_frame = (
+            0
+            if self._start is None
+            else int(round((self._start - file_start) * sampling_rate))
         )
+        end_frame = (
+            n_frames
+            if self._end is None
+            else int(round((self._end - file_start) * sampling_rate))
+        )
+        if start_frame < 0 or end_frame > n_frames:
+            raise ValueError("読み込み区間が保存されている区間の外です")
+        if start_frame > end_frame:
+            raise ValueError("start < endになるように入力してください")
+        return start_frame, end_frame
+
+    def _selected_chs(self, n_channels: int) -> list[int]:
+        if self._chs is None:
+            return list(range(1, n_channels + 1))
+        for ch in self._chs:
+            if not (1 <= ch <= n_channels):
+                raise ValueError("chは1-64の整数で入力してください")
+        return list(self._chs)
+
+    def _read_chunks(
+        self,
+        data,
+        factor: np.float64 | None,
+        codec: str,
+        chs: list[int],
+        start_frame: int,
+        end_frame: int,
+        out,
+    ) -> None:
+        """区間・電極にかかるチャンクだけを展開して out (len(chs), n) に書き込む
+
+        factor が None なら換算せず、保存されている値 (int16) のまま書き込む。
+        """
+        chunk_frames = int(data[KEY_CHUNK_FRAMES])
+        chunk_channels = int(data[KEY_CHUNK_CHANNELS])
+        stored_dtype = np.dtype(np.int16 if str(data[KEY_DTYPE]) == "int16" else np.float32)
+        n_channels = int(data[KEY_SHAPE][0])
+        if end_frame <= start_frame or not chs:
+            return
+
+        tasks = []
+        first_block = start_frame // chunk_frames
+        last_block = (end_frame - 1) // chunk_frames
+        for channel_block in sorted({(ch - 1) // chunk_channels for ch in chs}):
+            for time_block in range(first_block, last_block + 1):
+                # zip からの取り出し (I/O) は逐次、展開 (zlib は GIL を解放) は並列に行う
+                payload = data[chunk_key(channel_block, time_block)]
+                tasks.append((channel_block, time_block, payload))
+
+        def inflate(task) -> None:
+            channel_block, time_block, payload = task
+            c0 = channel_block * chunk_channels
+            t0 = time_block * chunk_frames
+            chunk = np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+            chunk = decode_voltages(
+                chunk.reshape(min(chunk_channels, n_channels - c0), -1),
+                codec,
+                stored_dtype,
+            )
+            a = max(start_frame, t0)
+            b = min(end_frame, t0 + chunk.shape[1])
+            for row, ch in enumerate(chs):
+                if c0 <= ch - 1 < c0 + chunk_channels:
+                    source = chunk[ch - 1 - c0, a - t0 : b - t0]
+                    target = out[row, a - start_frame : b - start_frame]
+                    if factor is None:
+                        target[:] = source
+                    else:
+                        np.multiply(source, factor, out=target, casting="unsafe")
+
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+            list(pool.map(inflate, tasks))
 
 
 def create_reader(
-    path: str, start: int | None = None, end: int | None = None
+    path: str,
+    start: int | None = None,
+    end: int | None = None,
+    chs: list[int] | None = None,
+    quantized: bool = False,
 ) -> MEAReader:
     """拡張子に応じた Reader を生成する。"""
     suffix = Path(path).suffix
     if suffix == ".hed":
-        return HedBioReader(path, start, end)
+        return HedBioReader(path, start, end, chs, quantized)
     if suffix == ".npz":
-        return NpzReader(path)
+        return NpzReader(path, start, end, chs, quantized=quantized)
     raise ValueError(f"未対応の拡張子です: {suffix}")
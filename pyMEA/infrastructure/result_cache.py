@@ -0,0 +1,144 @@
+"""派生結果をディレクトリに .npy で保存する永続キャッシュ (容量上限つき LRU)。
+
+1エントリは <directory>/<key>/ 以下の <名前>.npy の集まり。読み出しは
+np.load(mmap_mode="r") なので、ヒット時は再計算もファイル全体の読込もせずに
+使う部分だけがページインされる。書き込みは一時ディレクトリに書いてから rename
+するため、並列に実行している別プロセスが書きかけのエントリを読むことはない。
+"""
+
+import hashlib
+import os
+import shutil
+import uuid
+
+import numpy as np
+from numpy._typing import NDArray
+
+DEFAULT_MAX_BYTES = 10 * 1024**3
+_TMP_PREFIX = ".tmp-"
+
+
+class DiskResultCache:
+    """
+    容量上限つきのディスクキャッシュ
+    ----------
+    Args:
+        directory: 保存先ディレクトリ (なければ作る)
+        max_bytes: 合計サイズの上限。超えたら最後に使ってから長いエントリから消す
+
+    pyMEA.domain.result_cache.ResultStore を満たすので、set_result_cache に渡せば
+    MEA のフィルタ・ピーク検出・勾配計算の結果が保存・再利用される。
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes <= 0:
+            raise ValueError("max_bytesは正の値で入力してください")
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        # 保存済みの合計サイズの見積もり (最初の保存時に走査する)。上限を超えたときだけ
+        # 走査し直して消すので、保存のたびに全エントリを stat しない
+        self._total_bytes: int | None = None
+
+    def load(self, key: str) -> dict[str, NDArray] | None:
+        entry = os.path.join(self.directory, key)
+        try:
+            names = [n for n in os.listdir(entry) if n.endswith(".npy")]
+            arrays = {
+                name[: -len(".npy")]: np.load(os.path.join(entry, name), mmap_mode="r")
+                for name in names
+            }
+        except (FileNotFoundError, ValueError):
+            # 存在しない・壊れたエントリは未保存として扱う (再計算して上書きする)
+            return None
+        # 最近使ったエントリほど消されにくくする (LRU)
+        try:
+            os.utime(entry)
+        except OSError:
+            # 読み出した直後に別プロセスが消した場合も、開いた memmap はそのまま使える
+            pass
+        return arrays
+
+    def save(self, key: str, arrays: dict[str, NDArray]) -> None:
+        entry = os.path.join(self.directory, key)
+        tmp = os.path.join(self.directory, f"{_TMP_PREFIX}{key}-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        size = 0
+        try:
+            for name, array in arrays.items():
+                path = os.path.join(tmp, f"{name}.npy")
+                np.save(path, np.asarray(array))
+                size += os.path.getsize(path)
+            if os.path.isdir(entry):
+                # 壊れたエントリを置き換える (同時に保存された同じ内容なら捨てるだけ)
+                shutil.rmtree(entry, ignore_errors=True)
+            os.rename(tmp, entry)
+        except OSError:
+            # 別プロセスが先に同じキーを保存した場合など。結果は同じなので捨てる
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        if self._total_bytes is None:
+            self._total_bytes = self.nbytes
+        else:
+            self._total_bytes += size
+        if self._total_bytes > self.max_bytes:
+            self._evict(keep=key)
+
+    def clear(self) -> None:
+        """保存済みのエントリをすべて消す"""
+        for key, _, _ in self._entries():
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+        self._total_bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """保存済みのエントリの合計サイズ"""
+        return sum(size for _, _, size in self._entries())
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def _entries(self) -> list[tuple[str, float, int]]:
+        """(キー, 最終使用時刻, サイズ) の一覧"""
+        entries = []
+        for item in os.scandir(self.directory):
+            if not item.is_dir() or item.name.startswith(_TMP_PREFIX):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(item.path))
+                entries.append((item.name, item.stat().st_mtime, size))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _evict(self, keep: str) -> None:
+        # 見積もりには別プロセスの保存・削除が含まれないため、走査し直してから消す
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        for key, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+            total -= size
+        self._total_bytes = total
+
+
+def source_fingerprint(paths: list[str]) -> str | None:
+    """
+    ファイルのパス・サイズ・更新時刻から元データの指紋を作る
+    ----------
+    どれかのファイルが存在しない場合は None (キャッシュしない) を返す。
+    ファイルを書き換えると指紋が変わるため、古いキャッシュは使われなくなる。
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        digest.update(
+            f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode()
+        )
+    return digest.hexdigest()
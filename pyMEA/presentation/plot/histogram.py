@@ -1,5 +1,4 @@
 import io
-import itertools
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -11,10 +10,9 @@ from pyMEA.presentation.output import output_buf
 
 
 def peak_flatten(MEA_data: MEA, peak_index: Peaks64, eles: list[int]) -> ndarray:
-    detect_time = [MEA_data[0][peak_index[i]] for i in eles]
-    detect_time = list(itertools.chain.from_iterable(detect_time))
-
-    return np.array(detect_time)
+    # 全長の時刻配列を作らず、ピーク位置の分だけ時刻を計算する
+    times = MEA_data.time_axis
+    return np.concatenate([times[peak_index[i]] for i in eles] or [np.empty(0)])
 
 
 @output_buf
@@ -19,9 +19,10 @@ def raster_plot(
     isBuf=False,
 ):
     plt.figure(figsize=figsize, dpi=dpi)
+    times = MEA_data.time_axis
     for i, ele in enumerate(eles):
         plt.plot(
-            MEA_data[0][peak_index[ele]],
+            times[peak_index[ele]],
             np.ones(len(peak_index[ele])) * i,
             "|",
             color="black",
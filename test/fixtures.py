@@ -3,7 +3,7 @@
 原本の .hed/.bio はリポジトリに置かず、3秒ぶんを抽出した .npz
 (test/resources/fixtures/*.npz) からデータを供給する。
 
-read_MEA / hed2array が内部で呼ぶ decode_hed・read_bio を
+read_MEA / hed2array が内部で呼ぶ decode_hed・read_bio・_read_bio_voltages・hed2memmap を
 フィクスチャ駆動に差し替えることで、テストは read_MEA を通常どおり
 呼び出せる(ファイルI/O層のロジックも経由する)。
 """
@@ -60,7 +60,7 @@ _installed = False
 
 
 def install_fixture_io() -> None:
-    """decode_hed / read_bio をフィクスチャ駆動へ差し替える (セッション全体に適用)。"""
+    """decode_hed / read_bio / _read_bio_voltages / hed2memmap をフィクスチャ駆動へ差し替える (セッション全体に適用)。"""
     global _installed
     if _installed:
         return
@@ -80,19 +80,99 @@ def install_fixture_io() -> None:
         _, sampling_rate, gain = _load_npz(name)
         return HedData(SAMPLING_RATE=sampling_rate, GAIN=gain)
 
-    def fake_read_bio(bio_path, start, end, sampling_rate=10000, gain=50000, volt_range=100):
+    def fake_read_bio(
+        bio_path, start, end, sampling_rate=10000, gain=50000, volt_range=100, chs=None
+    ):
         name = _fixture_name(getattr(bio_path, "path", bio_path))
         if name is None:
-            return _orig_read_bio(bio_path, start, end, sampling_rate, gain, volt_range)
+            return _orig_read_bio(
+                bio_path, start, end, sampling_rate, gain, volt_range, chs
+            )
         array, sr, _ = _load_npz(name)
+        rows = [0] + (list(range(1, array.shape[0])) if chs is None else list(chs))
         # 電位値は float32 のまま (検出結果に影響なし)、配列は float64 に揃える
-        sliced = array[:, int(start * sr):int(end * sr)].astype(np.float64)
+        sliced = array[rows, int(start * sr):int(end * sr)].astype(np.float64)
         # 時刻行は float32 だと精度不足になるため正確に再計算する
         sliced[0] = np.arange(sliced.shape[1]) / sr + start
         return sliced
 
-    # read_bio モジュール内 (hed2array が参照)
+    _orig_read_bio_voltages = read_bio_mod._read_bio_voltages
+
+    def fake_read_bio_voltages(
+        bio_paths, start, end, sampling_rate=10000, gain=50000, volt_range=100, chs=None
+    ):
+        name = _fixture_name(getattr(bio_paths[0], "path", bio_paths[0]))
+        if name is None:
+            return _orig_read_bio_voltages(
+                bio_paths, start, end, sampling_rate, gain, volt_range, chs
+            )
+        array, sr, _ = _load_npz(name)
+        rows = list(range(1, array.shape[0])) if chs is None else list(chs)
+        voltages = np.array(array[rows, int(start * sr):int(end * sr)], dtype=np.float32)
+        voltages.setflags(write=False)
+        return voltages
+
+    _orig_hed2memmap = read_bio_mod.hed2memmap
+
+    def fake_hed2memmap(hed_path):
+        name = _fixture_name(getattr(hed_path, "path", hed_path))
+        if name is None:
+            return _orig_hed2memmap(hed_path)
+        from pyMEA.domain.model.VoltageBlock import VoltageBlock
+
+        array, sr, _ = _load_npz(name)
+        # フィクスチャは .bio を持たないため、記録全体をメモリ上の電位として返す
+        voltages = np.array(array[list(range(1, array.shape[0]))], dtype=np.float32)
+        voltages.setflags(write=False)
+        return VoltageBlock(voltages, 0, sr)
+
+    # read_bio モジュール内 (hed2array・MEA の読み込みが参照)
     read_bio_mod.decode_hed = fake_decode_hed
     read_bio_mod.read_bio = fake_read_bio
+    read_bio_mod._read_bio_voltages = fake_read_bio_voltages
+    read_bio_mod.hed2memmap = fake_hed2memmap
     # read_MEA が import 済みの参照
     read_mea_mod.decode_hed = fake_decode_hed
+
+
+# decode_hed の解読辞書の逆引き (合成 .hed の作成用)
+_RATE_CODES = {100000: 0, 50000: 1, 25000: 2, 20000: 3, 10000: 4, 5000: 5}
+_GAIN_CODES = {
+    20: 16436,
+    100: 16473,
+    1000: 16527,
+    2000: 16543,
+    5000: 16563,
+    10000: 16579,
+    20000: 16595,
+    50000: 16616,
+}
+
+
+def write_synthetic_recording(
+    directory,
+    name: str = "synthetic",
+    seconds: float = 2,
+    sampling_rate: int = 10000,
+    gain: int = 2000,
+    segments: int = 1,
+    seed: int = 0,
+) -> str:
+    """実ファイルの合成 .hed/.bio (int16, 68ch インターリーブ) を書き出し .hed パスを返す。
+
+    segments > 1 なら <stem>0001.bio, <stem>0002.bio, ... に時間方向で分割して書き出す。
+    """
+    directory = Path(directory)
+    hed = np.zeros(32, dtype="<h")
+    hed[16] = _RATE_CODES[sampling_rate]
+    hed[3] = _GAIN_CODES[gain]
+    hed_path = directory / f"{name}.hed"
+    hed.tofile(hed_path)
+
+    n_frames = int(seconds * sampling_rate)
+    rng = np.random.default_rng(seed)
+    raw = rng.integers(-2000, 2000, size=(n_frames, 68), dtype=np.int16).astype("<h")
+    for i, part in enumerate(np.array_split(raw, segments)):
+        part.tofile(directory / f"{name}{i + 1:04d}.bio")
+
+    return str(hed_path)
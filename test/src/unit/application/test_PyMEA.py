@@ -68,6 +68,11 @@ class TestMutableMEA(unittest.TestCase):
         self.assertEqual((65, 30000), m.array.shape)
         self.assertEqual(3, m.time)
 
+    def test_配列は書き込み可能なfloat64(self):
+        m = MutableMEA(fixture_hed_path("cardio"), 0, 1)
+        self.assertEqual(np.float64, m.array.dtype)
+        m.array[1, 0] = 0.0
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,99 @@
+"""状態を引き継ぐ因果フィルタ (CausalFilter) の回帰テスト。"""
+
+import unittest
+
+import numpy as np
+from scipy.signal import butter, sosfilt
+
+from pyMEA.domain.model.CausalFilter import CausalFilter
+from pyMEA.domain.model.ChannelSubsetArray import ChannelSubsetArray
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.MEA import MEA
+
+SAMPLING_RATE = 10000
+
+
+def _mea(n_frames=20000) -> MEA:
+    array = np.random.default_rng(0).normal(size=(65, n_frames)).astype(np.float32)
+    end = n_frames / SAMPLING_RATE
+    return MEA(HedPath("synthetic.hed"), 0, end, SAMPLING_RATE, 2000, array)
+
+
+class CausalFilterTest(unittest.TestCase):
+    def setUp(self):
+        self.mea = _mea()
+        self.x = self.mea.array.voltages.astype(np.float64)
+
+    def _one_pass(self, causal: CausalFilter) -> np.ndarray:
+        return causal.clone().process(self.x)
+
+    def test_ブロックに分けても1回で処理した結果とビット単位で一致する(self):
+        causal = CausalFilter.highpass(SAMPLING_RATE, 1).then(
+            CausalFilter.iirnotch(SAMPLING_RATE, 50, 30)
+        )
+        expected = self._one_pass(causal)
+        bounds = [0, 1, 777, 5000, 5000, 13001, 20000]
+        actual = np.concatenate(
+            [causal.process(self.x[:, a:b]) for a, b in zip(bounds, bounds[1:])],
+            axis=1,
+        )
+        np.testing.assert_array_equal(expected, actual)
+        self.assertEqual(20000, causal.frames)
+
+    def test_scipyのsosfiltと一致する(self):
+        causal = CausalFilter.bandpass(SAMPLING_RATE, 1, 1000)
+        sos = butter(4, [1, 1000], btype="bandpass", fs=SAMPLING_RATE, output="sos")
+        expected = sosfilt(sos, self.x, axis=-1)
+        np.testing.assert_array_equal(expected, causal.process(self.x))
+
+    def test_MEAのブロックをそのまま渡せる(self):
+        causal = CausalFilter.highpass(SAMPLING_RATE, 1)
+        expected = self._one_pass(causal)
+        first = causal.process(self.mea.window(0, 1))
+        second = causal.process(self.mea.window(1, 2))
+        actual = np.concatenate([first, second], axis=1)
+        np.testing.assert_array_equal(expected, actual)
+
+    def test_定常状態から始めると立ち上がりの過渡応答が小さい(self):
+        x = self.x + 100
+        zeros = CausalFilter.highpass(SAMPLING_RATE, 1).process(x)
+        steady = CausalFilter.highpass(SAMPLING_RATE, 1, initial="steady").process(x)
+        self.assertLess(np.abs(steady[:, :100]).max(), np.abs(zeros[:, :100]).max())
+
+    def test_resetで先頭から計算し直す(self):
+        causal = CausalFilter.highpass(SAMPLING_RATE, 1)
+        first = causal.process(self.x)
+        causal.reset()
+        self.assertIsNone(causal.zi)
+        np.testing.assert_array_equal(first, causal.process(self.x))
+
+    def test_電極数が違えばエラー(self):
+        with self.assertRaises(ValueError):
+            CausalFilter.highpass(SAMPLING_RATE, 1).process(self.x[:3])
+        with self.assertRaises(ValueError):
+            CausalFilter.highpass(SAMPLING_RATE, 1, initial="ones")
+
+
+class MEACausalFilterTest(unittest.TestCase):
+    def test_ブロック長によらず同じ結果になる(self):
+        mea = _mea().with_lineage(("source", "synthetic"))
+        causal = CausalFilter.highpass(SAMPLING_RATE, 1)
+        a = mea.causal_filter(causal, block_s=0.3)
+        b = mea.causal_filter(causal, block_s=5)
+        np.testing.assert_array_equal(a.array.voltages, b.array.voltages)
+        self.assertIsNone(causal.zi)  # 渡したフィルタの状態は変えない
+        self.assertEqual(causal.step(), a.lineage[-1])
+
+    def test_一部の電極だけを持つMEAにも使える(self):
+        voltages = np.random.default_rng(1).normal(size=(3, 5000)).astype(np.float32)
+        array = ChannelSubsetArray(voltages, [2, 7, 40], 0, SAMPLING_RATE)
+        mea = MEA(HedPath("synthetic.hed"), 0, 0.5, SAMPLING_RATE, 2000, array)
+        actual = mea.causal_filter(CausalFilter.highpass(SAMPLING_RATE, 1))
+        self.assertEqual([2, 7, 40], actual.channels)
+        expected = CausalFilter.highpass(SAMPLING_RATE, 1, n_channels=3).process(
+            voltages.astype(np.float64)
+        )
+        np.testing.assert_array_equal(expected.astype(np.float32), actual.array.voltages)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+"""チャンク単位のフィルタパイプライン (FilterPipeline) の回帰テスト。"""
+
+import tempfile
+import tracemalloc
+import unittest
+import warnings
+from test.fixtures import fixture_hed_path, write_synthetic_recording
+from unittest import mock
+
+import numpy as np
+
+from pyMEA import FilterPipeline, FilterType, read_MEA
+from pyMEA.domain.model.FilterPipeline import MIN_CHUNK_MARGINS, PRESET_PIPELINES
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.MEA import MEA
+from pyMEA.infrastructure import read_bio
+
+SAMPLING_RATE = 10000
+
+
+def _mea(seconds=6) -> MEA:
+    n_frames = seconds * SAMPLING_RATE
+    rng = np.random.default_rng(0)
+    t = np.arange(n_frames) / SAMPLING_RATE
+    array = rng.normal(scale=10, size=(65, n_frames)) + 30 * np.sin(2 * np.pi * 50 * t)
+    return MEA(HedPath("synthetic.hed"), 0, seconds, SAMPLING_RATE, 2000, array)
+
+
+class FilterPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.mea = _mea()
+        # 境界の処理を確かめるため、のりしろより短いチャンクをわざと使う
+        catcher = warnings.catch_warnings()
+        catcher.__enter__()
+        self.addCleanup(catcher.__exit__, None, None, None)
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+    def _assert_close(self, expected: MEA, actual: MEA, atol=1e-3):
+        self.assertEqual(expected.shape, actual.shape)
+        np.testing.assert_allclose(
+            expected.array.voltages, actual.array.voltages, rtol=0, atol=atol
+        )
+
+    def test_チャンクに分けてもチェーンと一致する(self):
+        pipeline = (
+            FilterPipeline(chunk_s=0.5)
+            .bandpass(10, 3000)
+            .iirnotch_filter(50, 30)
+            .common_median_reference()
+        )
+        expected = self.mea.bandpass(10, 3000).iirnotch_filter(50, 30)
+        expected = expected.common_median_reference()
+        self._assert_close(expected, self.mea.apply_pipeline(pipeline))
+
+    def test_並列に処理しても同じ結果になる(self):
+        pipeline = FilterPipeline(chunk_s=0.5).highpass(20).common_median_reference()
+        source = self.mea.array
+        serial = pipeline.run(source, self.mea.channels, SAMPLING_RATE, workers=1)
+        parallel = pipeline.run(source, self.mea.channels, SAMPLING_RATE, workers=3)
+        np.testing.assert_array_equal(serial, parallel)
+
+    def test_のりしろが記録より長ければ記録全体で計算する(self):
+        # 1Hz のハイパスはのりしろが記録より長いため、チェーンと同じ計算になる
+        pipeline = FilterPipeline(chunk_s=0.5).highpass(1).common_median_reference()
+        expected = self.mea.highpass(1).common_median_reference()
+        self._assert_close(expected, self.mea.apply_pipeline(pipeline), atol=1e-5)
+
+    def test_ウェーブレットは記録全体と同じレベルで分解する(self):
+        pipeline = FilterPipeline(chunk_s=0.5).wavelet_denoise()
+        actual = self.mea.apply_pipeline(pipeline)
+        expected = self.mea.wavelet_denoise()
+        # 閾値はチャンクごとに推定するため完全には一致しない
+        diff = np.abs(expected.array.voltages - actual.array.voltages)
+        self.assertLess(float(np.median(diff)), 0.5)
+
+    def test_FIRの段はチャンクに分けても記録全体と一致する(self):
+        pipeline = (
+            FilterPipeline(chunk_s=0.5)
+            .highpass(5, method="fir")
+            .iirnotch_filter(50, 30, method="fir", transition_hz=2)
+        )
+        expected = FilterPipeline(chunk_s=60, stages=pipeline.stages)
+        self._assert_close(
+            self.mea.apply_pipeline(expected), self.mea.apply_pipeline(pipeline), 1e-4
+        )
+        self.assertEqual(("highpass", 5, 4, "fir"), pipeline.step()[1][0])
+        self.assertEqual(("iirnotch", 50, 30, "fir", 2), pipeline.step()[1][1])
+
+    def test_FIRのノッチは電源ノイズを除去する(self):
+        pipeline = FilterPipeline().iirnotch_filter(50, 30, method="fir")
+        actual = self.mea.apply_pipeline(pipeline)
+        spectrum = np.abs(np.fft.rfft(actual[1]))
+        before = np.abs(np.fft.rfft(self.mea[1]))
+        bin_50hz = 50 * len(self.mea[1]) // SAMPLING_RATE
+        self.assertLess(spectrum[bin_50hz], before[bin_50hz] / 100)
+
+    def test_由来にパイプラインを記録する(self):
+        mea = self.mea.with_lineage(("source", "synthetic"))
+        pipeline = FilterPipeline().highpass(1).common_median_reference()
+        actual = mea.apply_pipeline(pipeline)
+        self.assertEqual(pipeline.step(), actual.lineage[-1])
+        self.assertEqual(("highpass", 1, 4), pipeline.step()[1][0])
+
+    def test_省略したチャンク長はのりしろの4倍以上にする(self):
+        pipeline = FilterPipeline().highpass(1)
+        margin = pipeline.stages[0].margin(SAMPLING_RATE)
+        plan = pipeline.plan(10**7, list(range(64)), SAMPLING_RATE)
+        self.assertEqual(margin, plan.margin)
+        self.assertEqual(MIN_CHUNK_MARGINS * margin, plan.chunk_frames)
+
+    def test_指定したチャンク長はそのまま使い短ければ警告する(self):
+        pipeline = FilterPipeline(chunk_s=0.5).highpass(20)
+        plan = pipeline.plan(10**6, list(range(64)), SAMPLING_RATE)
+        self.assertEqual(SAMPLING_RATE // 2, plan.chunk_frames)
+        with self.assertWarns(RuntimeWarning):
+            self.mea.apply_pipeline(pipeline)
+
+    def test_並列数はメモリの上限に収める(self):
+        pipeline = FilterPipeline(chunk_s=1)
+        # 段がなければ1チャンクは 64 電極 × 10000 フレーム × float32 のバッファだけ
+        chunk_bytes = 64 * SAMPLING_RATE * 4
+        plan = pipeline.plan(10**6, list(range(64)), SAMPLING_RATE, 8, 2 * chunk_bytes)
+        self.assertEqual(chunk_bytes, plan.chunk_bytes)
+        self.assertEqual(2, plan.workers)
+
+    def test_1チャンクがメモリの上限に収まらなければエラー(self):
+        pipeline = FilterPipeline(chunk_s=1).highpass(20)
+        with self.assertRaises(ValueError):
+            pipeline.plan(10**6, list(range(64)), SAMPLING_RATE, max_bytes=1024**2)
+        with self.assertRaises(ValueError):
+            self.mea.apply_pipeline(pipeline, max_bytes=1024**2)
+
+    def test_電極ブロックはメモリの上限に合わせて小さくする(self):
+        pipeline = FilterPipeline(chunk_s=1).highpass(20)
+        chs = list(range(64))
+        full = pipeline.plan(10**6, chs, SAMPLING_RATE)
+        budget = full.chunk_bytes // 2
+        small = pipeline.plan(10**6, chs, SAMPLING_RATE, max_bytes=budget)
+        self.assertLess(small.channels_per_block, full.channels_per_block)
+        self.assertLessEqual(small.chunk_bytes, budget)
+
+    def test_確保する作業領域はメモリの上限に収まる(self):
+        mea = _mea(seconds=20)
+        pipeline = FilterPipeline().highpass(5).common_median_reference()
+        max_bytes = 32 * 1024**2
+        n_frames = mea.shape[1]
+        out = np.empty((len(mea.channels), n_frames), dtype=np.float32)
+        plan = pipeline.plan(n_frames, mea.channels, SAMPLING_RATE, 2, max_bytes)
+        self.assertLess(plan.channels_per_block, len(mea.channels))
+        tracemalloc.start()
+        try:
+            pipeline.run(mea.array, mea.channels, SAMPLING_RATE, 2, out, max_bytes)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLessEqual(peak, max_bytes)
+        expected = mea.highpass(5).common_median_reference()
+        np.testing.assert_allclose(expected[1:], out, rtol=0, atol=1e-3)
+
+    def test_チャンク長は正の値(self):
+        with self.assertRaises(ValueError):
+            FilterPipeline(chunk_s=0)
+
+
+class PresetPipelineTest(unittest.TestCase):
+    def test_心筋デノイズプリセットはチェーンと一致する(self):
+        path = fixture_hed_path("cardio").__str__()
+        raw = read_MEA(path, 0, 3, 450).data
+        expected = read_MEA(path, 0, 3, 450, FilterType.CARDIO_DENOISE).data
+        actual = raw.apply_pipeline(PRESET_PIPELINES[FilterType.CARDIO_DENOISE])
+        np.testing.assert_allclose(
+            expected.array.voltages, actual.array.voltages, rtol=0, atol=1e-3
+        )
+
+    def test_記録のプリセットは電位を読み込まずにパイプラインでかける(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_synthetic_recording(directory, seconds=12)
+            expected = read_MEA(path, 1, 12, 450).data.bandpass(100, 3000)
+            with mock.patch.object(
+                read_bio, "_read_bio_voltages", side_effect=AssertionError
+            ):
+                actual = read_MEA(path, 1, 12, 450, FilterType.NEURO_DENOISE).data
+            self.assertEqual(expected.shape, actual.shape)
+            self.assertEqual(1, actual.start)
+            np.testing.assert_allclose(
+                expected.array.voltages, actual.array.voltages, rtol=0, atol=1e-3
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+"""多電極フィルタエンジン (pyMEA.domain.filtering) と MEA のフィルタの回帰テスト。"""
+
+import unittest
+from unittest import mock
+
+import numpy as np
+from scipy.signal import butter, filtfilt, freqz, iirnotch, sosfiltfilt
+
+from pyMEA.domain import filtering
+from pyMEA.domain.filtering import (
+    butter_sos,
+    clear_filter_design_cache,
+    common_median_reference_block,
+    fft_fir_filter,
+    filter_block,
+    filter_design_cache_stats,
+    fir_taps,
+    notch_ba,
+)
+from pyMEA.domain.model.ChannelSubsetArray import ChannelSubsetArray
+from pyMEA.domain.model.FilterPipeline import FilterPipeline
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.MEA import (
+    MEA,
+    iirnotch_filter_single_ch,
+    zero_phase_butter,
+)
+from pyMEA.domain.model.VoltageBlock import VoltageBlock
+
+SAMPLING_RATE = 10000
+
+
+def _mea(n_frames=5000) -> MEA:
+    array = np.random.default_rng(0).normal(size=(65, n_frames)).astype(np.float32)
+    end = n_frames / SAMPLING_RATE
+    return MEA(HedPath("synthetic.hed"), 0, end, SAMPLING_RATE, 2000, array)
+
+
+class FilterBlockTest(unittest.TestCase):
+    def test_電極ごとに1次元でかけた結果と一致する(self):
+        mea = _mea()
+        sos = butter(4, [1, 1000], btype="bandpass", fs=SAMPLING_RATE, output="sos")
+        actual = filter_block(mea.array, mea.channels, lambda x: sosfiltfilt(sos, x))
+
+        self.assertEqual(np.float32, actual.dtype)
+        self.assertFalse(actual.flags.writeable)
+        for ch in (1, 32, 64):
+            expected = sosfiltfilt(sos, mea[ch].astype(np.float64)).astype(np.float32)
+            np.testing.assert_array_equal(expected, actual[ch - 1])
+
+    def test_スレッドで分割しても結果は同じ(self):
+        mea = _mea()
+        b, a = iirnotch(50, 30, SAMPLING_RATE)
+        expected = filter_block(mea.array, mea.channels, lambda x: filtfilt(b, a, x))
+        with mock.patch.object(filtering, "PARALLEL_MIN_SAMPLES", 0):
+            actual = filter_block(
+                mea.array, mea.channels, lambda x: filtfilt(b, a, x), workers=4
+            )
+        np.testing.assert_array_equal(expected, actual)
+
+    def test_float32で計算できる(self):
+        mea = _mea()
+        dtypes = []
+
+        def func(x):
+            dtypes.append(x.dtype)
+            return x
+
+        actual = filter_block(mea.array, mea.channels, func, dtype=np.float32)
+        self.assertEqual({np.dtype(np.float32)}, set(dtypes))
+        np.testing.assert_array_equal(mea.array.voltages, actual)
+
+    def test_一部の電極だけを持つ配列も行の順に処理する(self):
+        voltages = np.random.default_rng(1).normal(size=(3, 1000)).astype(np.float32)
+        array = ChannelSubsetArray(voltages, [5, 2, 60], 0, SAMPLING_RATE)
+        actual = filter_block(array, [5, 2, 60], lambda x: x * 2)
+        np.testing.assert_array_equal(voltages * 2, actual)
+
+
+class FFTFirFilterTest(unittest.TestCase):
+    def test_直接の畳み込みと一致する(self):
+        x = np.random.default_rng(2).normal(size=(3, 30000))
+        taps = fir_taps(SAMPLING_RATE, "highpass", 20)
+        half = (len(taps) - 1) // 2
+        # 両端を奇関数拡張してから "valid" で畳み込むと群遅延を補正した出力になる
+        padded = np.concatenate(
+            [2 * x[:, :1] - x[:, half:0:-1], x, 2 * x[:, -1:] - x[:, -2 : -half - 2 : -1]],
+            axis=1,
+        )
+        expected = np.stack([np.convolve(row, taps, mode="valid") for row in padded])
+        np.testing.assert_allclose(expected, fft_fir_filter(x, taps), rtol=0, atol=1e-10)
+
+    def test_係数が信号より長くてもよい(self):
+        taps = fir_taps(SAMPLING_RATE, "highpass", 1)
+        x = np.ones((2, 100))
+        actual = fft_fir_filter(x, taps)
+        self.assertEqual((2, 100), actual.shape)
+        # 直流は除去される
+        np.testing.assert_allclose(0, actual, atol=1e-2)
+
+    def test_設計した係数が指定の帯域を通す(self):
+        taps = fir_taps(SAMPLING_RATE, "bandstop", [49, 51])
+        self.assertEqual(1, len(taps) % 2)
+        np.testing.assert_allclose(taps, taps[::-1])  # 線形位相
+        _, h = freqz(taps, worN=[10, 50, 500], fs=SAMPLING_RATE)
+        gain = np.abs(h)
+        self.assertLess(gain[1], 1e-2)
+        np.testing.assert_allclose([1, 1], gain[[0, 2]], atol=1e-2)
+
+
+class CommonMedianReferenceTest(unittest.TestCase):
+    def test_チャンクに分けてもnp_medianと一致する(self):
+        mea = _mea()
+        voltages = mea.array.voltages
+        actual = common_median_reference_block(
+            mea.array, mea.channels, chunk_frames=777
+        )
+        self.assertFalse(actual.flags.writeable)
+        np.testing.assert_array_equal(voltages - np.median(voltages, axis=0), actual)
+
+    def test_除いた電極は中央値に使わない(self):
+        mea = _mea()
+        voltages = mea.array.voltages.copy()
+        voltages[4] = 1e6  # 飽和した電極5
+        array = VoltageBlock(voltages, 0, SAMPLING_RATE)
+        actual = common_median_reference_block(array, mea.channels, exclude=[5, 99])
+
+        ref = np.median(np.delete(voltages, 4, axis=0), axis=0)
+        np.testing.assert_array_equal(voltages - ref, actual)
+
+    def test_すべての電極を除くとエラー(self):
+        voltages = np.zeros((2, 10), dtype=np.float32)
+        array = ChannelSubsetArray(voltages, [1, 2], 0, SAMPLING_RATE)
+        with self.assertRaises(ValueError):
+            common_median_reference_block(array, [1, 2], exclude=[1, 2])
+
+    def test_MEAとパイプラインで同じ電極を除ける(self):
+        mea = _mea().with_lineage(("source", "synthetic"))
+        expected = mea.common_median_reference(exclude=[7, 3])
+        pipeline = FilterPipeline(chunk_s=0.1).common_median_reference(exclude=[3, 7])
+        actual = mea.apply_pipeline(pipeline)
+
+        np.testing.assert_allclose(
+            expected.array.voltages, actual.array.voltages, rtol=0, atol=1e-5
+        )
+        self.assertEqual(
+            ("common_median_reference", (3, 7)), expected.lineage[-1]
+        )
+        self.assertEqual(
+            ("common_median_reference",), mea.common_median_reference().lineage[-1]
+        )
+
+
+class FilterDesignCacheTest(unittest.TestCase):
+    def setUp(self):
+        clear_filter_design_cache()
+
+    def test_同じ設計は再利用して読み取り専用で返す(self):
+        first = butter_sos(SAMPLING_RATE, [1, 1000], "bandpass", 4)
+        second = butter_sos(SAMPLING_RATE, (1.0, 1000.0), "bandpass", 4)
+
+        self.assertIs(first, second)
+        self.assertFalse(first.flags.writeable)
+        expected = butter(4, [1, 1000], btype="bandpass", fs=SAMPLING_RATE, output="sos")
+        np.testing.assert_array_equal(expected, first)
+        stats = filter_design_cache_stats()
+        self.assertEqual((1, 1, 1), (stats.hits, stats.misses, stats.designs))
+        self.assertEqual(0.5, stats.hit_rate)
+
+    def test_パラメータが違えば別の設計になる(self):
+        b, a = notch_ba(SAMPLING_RATE, 50, 30)
+        b60, _ = notch_ba(SAMPLING_RATE, 60, 30)
+        expected_b, expected_a = iirnotch(50, 30, SAMPLING_RATE)
+        np.testing.assert_array_equal(expected_b, b)
+        np.testing.assert_array_equal(expected_a, a)
+        self.assertFalse(np.array_equal(b, b60))
+        self.assertEqual(2, filter_design_cache_stats().misses)
+
+    def test_MEAのフィルタを繰り返しても設計は1回(self):
+        # 拍動ごとに切り出した区間を順にフィルタする場合を模す
+        for n_frames in (1000, 1200, 1400):
+            _mea(n_frames).bandpass(300, 3000)
+        stats = filter_design_cache_stats()
+        self.assertEqual((2, 1), (stats.hits, stats.misses))
+
+
+class MEAFilterTest(unittest.TestCase):
+    def test_float32計算はfloat64計算とほぼ一致する(self):
+        mea = _mea().with_lineage(("source", "synthetic"))
+        expected = mea.bandpass(300, 3000)
+        actual = mea.bandpass(300, 3000, dtype=np.float32)
+        np.testing.assert_allclose(
+            expected.array.voltages, actual.array.voltages, rtol=0, atol=1e-4
+        )
+        self.assertNotEqual(expected.lineage, actual.lineage)
+        self.assertIsInstance(actual.array, VoltageBlock)
+
+    def test_ノッチフィルタは電極ごとの計算と一致する(self):
+        mea = _mea()
+        b, a = iirnotch(50, 30, SAMPLING_RATE)
+        actual = mea.iirnotch_filter(50, 30)
+        expected = filtfilt(b, a, mea[10].astype(np.float64)).astype(np.float32)
+        np.testing.assert_array_equal(expected, actual[10])
+
+    def test_FIRでかけるとドリフトだけを除去する(self):
+        t = np.arange(20000) / SAMPLING_RATE
+        signal = np.sin(2 * np.pi * 200 * t)
+        # 阻止域の減衰は 60 dB なので、振幅 10 のドリフトは 0.01 以下になる
+        drift = 10 * np.sin(2 * np.pi * 0.5 * t)
+        array = np.vstack([t, np.tile(signal + drift, (64, 1))]).astype(np.float32)
+        mea = MEA(HedPath("synthetic.hed"), 0, 2, SAMPLING_RATE, 2000, array)
+        actual = mea.highpass(20, method="fir")
+        center = slice(5000, 15000)
+        np.testing.assert_allclose(signal[center], actual[1][center], rtol=0, atol=0.02)
+
+    def test_未対応の実装はエラー(self):
+        with self.assertRaises(ValueError):
+            _mea().highpass(1, method="fft")
+
+    def test_float32の入力も既定ではfloat64で計算する(self):
+        x = _mea()[1:4]
+        sos = butter(4, 1, "highpass", fs=SAMPLING_RATE, output="sos")
+        expected = sosfiltfilt(sos, x.astype(np.float64), axis=-1)
+        actual = zero_phase_butter(x, SAMPLING_RATE, 1, "highpass")
+        self.assertEqual(np.float64, actual.dtype)
+        np.testing.assert_array_equal(expected, actual)
+
+        b, a = iirnotch(50, 30, SAMPLING_RATE)
+        actual = iirnotch_filter_single_ch(x, SAMPLING_RATE, 50, 30)
+        self.assertEqual(np.float64, actual.dtype)
+        np.testing.assert_array_equal(filtfilt(b, a, x.astype(np.float64)), actual)
+
+    def test_dtypeを指定するとその精度で計算する(self):
+        x = _mea()[1:4].astype(np.float64)
+        actual = zero_phase_butter(
+            x, SAMPLING_RATE, [300, 3000], "bandpass", dtype=np.float32
+        )
+        self.assertEqual(np.float32, actual.dtype)
+        actual = iirnotch_filter_single_ch(x, SAMPLING_RATE, dtype=np.float32)
+        self.assertEqual(np.float32, actual.dtype)
+
+    def test_未対応の精度はエラー(self):
+        with self.assertRaises(ValueError):
+            _mea().bandpass(1, 1000, dtype=np.int16)
+
+
+if __name__ == "__main__":
+    unittest.main()
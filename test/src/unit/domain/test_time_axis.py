@@ -0,0 +1,103 @@
+"""遅延評価の時刻軸 (TimeAxis) の回帰テスト。"""
+
+import unittest
+from test.fixtures import fixture_hed_path
+
+import numpy as np
+
+from pyMEA import detect_peak_neg, read_MEA
+from pyMEA.domain.model.TimeAxis import TimeAxis
+from pyMEA.domain.service.burst import peak_flatten
+
+
+class TimeAxisTest(unittest.TestCase):
+    def setUp(self):
+        self.axis = TimeAxis(30001, 12.5, 10000)
+        self.expected = np.arange(30001) / 10000 + 12.5
+
+    def test_展開するとarangeと同じ値になる(self):
+        self.assertEqual(np.float64, self.axis.dtype)
+        self.assertEqual((30001,), self.axis.shape)
+        np.testing.assert_array_equal(self.expected, np.asarray(self.axis))
+
+    def test_インデックスは要素だけを計算する(self):
+        peaks = np.array([0, 7, 29999, -1])
+        np.testing.assert_array_equal(self.expected[peaks], self.axis[peaks])
+        np.testing.assert_array_equal(self.expected[[3, 5]], self.axis[[3, 5]])
+        mask = self.expected > 14
+        np.testing.assert_array_equal(self.expected[mask], self.axis[mask])
+        self.assertEqual(self.expected[-2], self.axis[-2])
+        self.assertEqual(0, len(self.axis[np.array([], dtype=int)]))
+        with self.assertRaises(IndexError):
+            self.axis[30001]
+        with self.assertRaises(IndexError):
+            self.axis[np.array([0, 30001])]
+
+    def test_スライスは時刻軸のまま返す(self):
+        for index in (slice(100, 2000), slice(5, None, 7), slice(None, -3)):
+            sliced = self.axis[index]
+            self.assertIsInstance(sliced, TimeAxis)
+            np.testing.assert_array_equal(self.expected[index], np.asarray(sliced))
+        np.testing.assert_array_equal(
+            self.expected[100:2000:3][[0, 5]], self.axis[100:2000:3][[0, 5]]
+        )
+        np.testing.assert_array_equal(self.expected[::-2], self.axis[::-2])
+
+    def test_searchsortedはnumpyと同じ位置を返す(self):
+        values = np.concatenate(
+            [self.expected[::997], self.expected[::991] + 3e-5, [0, 12.5, 1e9, -1]]
+        )
+        for side in ("left", "right"):
+            np.testing.assert_array_equal(
+                np.searchsorted(self.expected, values, side=side),
+                self.axis.searchsorted(values, side=side),
+            )
+            sliced = self.axis[10:20000:3]
+            np.testing.assert_array_equal(
+                np.searchsorted(np.asarray(sliced), values, side=side),
+                np.searchsorted(sliced, values, side=side),
+            )
+        self.assertEqual(25, self.axis.searchsorted(12.5025))
+
+    def test_演算はfloat64の配列になる(self):
+        np.testing.assert_array_equal(self.expected - 12.5, self.axis - 12.5)
+        np.testing.assert_array_equal(np.diff(self.expected), np.diff(self.axis))
+
+
+class MEATimesTest(unittest.TestCase):
+    def setUp(self):
+        self.mea = read_MEA(fixture_hed_path("cardio"), 0, 5, 450).data
+
+    def test_time_axisは時刻軸を返す(self):
+        self.assertIsInstance(self.mea.time_axis, TimeAxis)
+        n = self.mea.shape[1]
+        np.testing.assert_array_equal(
+            np.arange(n) / self.mea.SAMPLING_RATE, np.asarray(self.mea.time_axis)
+        )
+
+    def test_timesとmea0はndarrayのまま(self):
+        for times in (self.mea.times, self.mea[0]):
+            self.assertIsInstance(times, np.ndarray)
+            self.assertEqual(np.float64, times.dtype)
+            self.assertFalse(times.flags.writeable)
+            np.testing.assert_array_equal(np.asarray(self.mea.time_axis), times)
+        n = self.mea.shape[1]
+        self.assertEqual((n - 1) / self.mea.SAMPLING_RATE, self.mea[0].max())
+        self.assertEqual(0, self.mea.times.min())
+        self.assertEqual((n, 1), self.mea[0].reshape(-1, 1).shape)
+
+    def test_PyMEAの0行目はデータ行を返す(self):
+        pymea = read_MEA(fixture_hed_path("cardio"), 0, 5, 450)
+        np.testing.assert_array_equal(pymea.data.array[0], pymea[0])
+        self.assertEqual(pymea.data.array[0].dtype, pymea[0].dtype)
+
+    def test_ピーク時刻への変換は従来と一致する(self):
+        peak_index = detect_peak_neg(self.mea)
+        expected = np.concatenate(
+            [self.mea[0][peak_index[ch]] for ch in range(1, 65)]
+        )
+        np.testing.assert_array_equal(expected, peak_flatten(self.mea, peak_index))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""MEA の切り出しがビュー (ゼロコピー) になることの回帰テスト。"""
+
+import unittest
+from test.fixtures import fixture_hed_path
+from unittest import mock
+
+import numpy as np
+
+from pyMEA import detect_peak_neg, read_MEA
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.MEA import MEA
+from pyMEA.domain.model.VoltageBlock import VoltageBlock
+
+
+class MEAViewTest(unittest.TestCase):
+    def setUp(self):
+        self.mea = read_MEA(fixture_hed_path("cardio"), 0, 5, 450).data
+
+    def test_読み取り専用のfloat32配列はコピーせずに保持する(self):
+        array = np.zeros((65, 100), dtype=np.float32)
+        array.setflags(write=False)
+        mea = MEA(HedPath("cardio.hed"), 0, 0.01, 10000, 2000, array)
+        self.assertTrue(np.shares_memory(array, mea.array.voltages))
+
+    def test_書き込み可能な配列はコピーして読み取り専用にする(self):
+        array = np.zeros((65, 100), dtype=np.float32)
+        mea = MEA(HedPath("cardio.hed"), 0, 0.01, 10000, 2000, array)
+        self.assertFalse(np.shares_memory(array, mea.array.voltages))
+        self.assertFalse(mea.array.voltages.flags.writeable)
+
+    def test_windowは時刻で切り出したビューを返す(self):
+        window = self.mea.window(1.5, 2.5)
+        self.assertTrue(np.shares_memory(self.mea.array.voltages, window.array.voltages))
+        self.assertEqual(1.5, window.start)
+        self.assertEqual(2.5, window.end)
+        np.testing.assert_array_equal(self.mea.from_slice(15000, 25000)[3], window[3])
+        np.testing.assert_allclose(self.mea[0][15000:25000], window[0])
+
+    def test_windowの区間外は例外(self):
+        with self.assertRaises(ValueError):
+            self.mea.window(4, 6)
+        with self.assertRaises(ValueError):
+            self.mea.window(2, 1)
+
+    def test_拍動周期の切り出しは電位データを共有する(self):
+        beats = self.mea.from_beat_cycles(detect_peak_neg(self.mea), base_ch=1)
+        self.assertGreater(len(beats), 1)
+        for beat in beats:
+            self.assertTrue(np.shares_memory(self.mea.array.voltages, beat.array.voltages))
+
+    def test_フィルタ結果は1回の確保で組み立てる(self):
+        filtered = self.mea.highpass(1)
+        self.assertEqual(np.float32, filtered.array.dtype)
+        self.assertFalse(filtered.array.voltages.flags.writeable)
+        np.testing.assert_allclose(self.mea[0], filtered[0])
+
+
+class VoltageBlockTest(unittest.TestCase):
+    def setUp(self):
+        self.mea = read_MEA(fixture_hed_path("cardio"), 0, 2, 450).data
+
+    def test_電位だけを64行で保持し時刻行は導出する(self):
+        n = self.mea.array.shape[1]
+        self.assertIsInstance(self.mea.array, VoltageBlock)
+        self.assertEqual((64, n), self.mea.array.voltages.shape)
+        self.assertEqual((65, n), self.mea.shape)
+        self.assertEqual(np.float64, self.mea[0].dtype)
+        np.testing.assert_allclose(np.arange(n) / self.mea.SAMPLING_RATE, self.mea[0])
+        np.testing.assert_allclose(self.mea[0], self.mea.array[0], atol=1e-6)
+
+    def test_電位行はビューで返す(self):
+        voltages = self.mea.array.voltages
+        self.assertTrue(np.shares_memory(voltages, self.mea[5]))
+        self.assertTrue(np.shares_memory(voltages, self.mea.array[1:]))
+        self.assertTrue(np.shares_memory(voltages, self.mea.array[-1, 10:20]))
+        np.testing.assert_array_equal(voltages[4], self.mea[5])
+        np.testing.assert_array_equal(voltages[2:5], self.mea.array[3:6])
+        np.testing.assert_array_equal(np.asarray(self.mea.array)[1:], voltages)
+
+    def test_変換は時刻行を組み立て直さない(self):
+        for transformed in (
+            self.mea.highpass(1),
+            self.mea.down_sampling(10),
+            self.mea.common_median_reference(),
+        ):
+            self.assertIsInstance(transformed.array, VoltageBlock)
+            self.assertEqual(64, len(transformed.array.voltages))
+        shifted = self.mea.from_slice(5000, 10000).init_time()
+        self.assertTrue(np.shares_memory(self.mea.array.voltages, shifted.array.voltages))
+        self.assertEqual(0, shifted[0][0])
+        np.testing.assert_array_equal(self.mea[3][5000:10000], shifted[3])
+
+    def test_arrayはndarrayのメソッドと属性をそのまま使える(self):
+        array = self.mea.array
+        expected = np.asarray(array)
+
+        self.assertEqual(expected.max(), array.max())
+        self.assertEqual(expected.min(), array.min())
+        np.testing.assert_array_equal(expected.mean(axis=1), array.mean(axis=1))
+        np.testing.assert_array_equal(expected.T, array.T)
+        np.testing.assert_array_equal(expected.reshape(-1), array.reshape(-1))
+        self.assertEqual(expected.nbytes, array.nbytes)
+        self.assertFalse(array.flags.writeable)
+        self.assertEqual(expected.tolist()[3][:5], array.tolist()[3][:5])
+        with self.assertRaises(AttributeError):
+            array.no_such_attribute
+
+    def test_集計は全体を展開せずに計算する(self):
+        array = self.mea.array
+        expected = np.asarray(array)
+        with mock.patch.object(type(array), "__array__", side_effect=AssertionError):
+            self.assertEqual(expected.max(), array.max())
+            self.assertEqual(expected.min(), array.min())
+            np.testing.assert_array_equal(expected.max(axis=0), array.max(axis=0))
+            np.testing.assert_array_equal(expected.sum(axis=1), array.sum(axis=1))
+            np.testing.assert_allclose(expected.mean(), array.mean(), rtol=1e-5)
+            self.assertFalse(array.flags.writeable)
+
+    def test_ndarrayの未対応の属性は展開せずにエラー(self):
+        array = self.mea.array
+        with mock.patch.object(type(array), "__array__", side_effect=AssertionError):
+            with self.assertRaises(AttributeError):
+                array.argmax
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""memmap による .bio 遅延読み込みの回帰テスト。
+
+合成 .hed/.bio を実ファイルとして書き出し、従来の read_MEA (一括読込) と
+open_MEA (memmap 遅延読込) が同じ電位・時刻を返すことを担保する。
+"""
+
+import tempfile
+import unittest
+from test.fixtures import write_synthetic_recording
+
+import numpy as np
+
+from pyMEA import open_MEA, read_MEA
+from pyMEA.domain.model.VoltageArray import VoltageArray
+
+
+class BioMemmapTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.hed = write_synthetic_recording(self._tmp.name, seconds=3)
+        self.eager = read_MEA(self.hed, 0, 3, 450).data
+        self.lazy = open_MEA(self.hed).data
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_記録全体をコピーせずに開く(self):
+        self.assertIsInstance(self.lazy.array, VoltageArray)
+        self.assertEqual(self.eager.shape, self.lazy.shape)
+        self.assertEqual(0, self.lazy.start)
+        self.assertEqual(3, self.lazy.end)
+
+    def test_電極ごとの電位は一括読込と一致する(self):
+        for ch in (1, 17, 64):
+            self.assertEqual(np.float32, self.lazy[ch].dtype)
+            np.testing.assert_allclose(self.eager[ch], self.lazy[ch], rtol=1e-6)
+        np.testing.assert_array_equal(self.eager[0], self.lazy[0])
+
+    def test_from_sliceは遅延のまま切り出す(self):
+        sliced = self.lazy.from_slice(5000, 15000)
+        expected = self.eager.from_slice(5000, 15000)
+
+        self.assertIsInstance(sliced.array, VoltageArray)
+        self.assertEqual(expected.shape, sliced.shape)
+        self.assertEqual(expected.start, sliced.start)
+        np.testing.assert_allclose(expected[3], sliced[3], rtol=1e-6)
+        np.testing.assert_array_equal(expected[0], sliced[0])
+
+    def test_フィルタ結果は一括読込と一致する(self):
+        np.testing.assert_allclose(
+            self.eager.highpass(1).array[1:],
+            self.lazy.highpass(1).array[1:],
+            rtol=1e-4,
+            atol=1e-3,
+        )
+
+    def test_全体の配列化は一括読込と一致する(self):
+        np.testing.assert_allclose(
+            np.asarray(self.eager.array[1:]), np.asarray(self.lazy.array)[1:], rtol=1e-6
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
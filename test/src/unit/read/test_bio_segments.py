@@ -0,0 +1,62 @@
+"""0002.bio 以降に分割された記録を1本の時間軸として読む回帰テスト。"""
+
+import tempfile
+import unittest
+from test.fixtures import write_synthetic_recording
+
+import numpy as np
+
+from pyMEA import open_MEA, read_MEA
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.infrastructure.bio_memmap import BioSegmentIndex
+from pyMEA.infrastructure.read_bio import find_bio_segments, iter_windows
+
+
+class BioSegmentsTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        # 同じ乱数列を 1ファイル / 3ファイル分割 で書き出す (3秒 = 1秒 × 3)
+        self.single = write_synthetic_recording(self._tmp.name, "single", seconds=3)
+        self.split = write_synthetic_recording(
+            self._tmp.name, "split", seconds=3, segments=3
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_連番の分割ファイルを時間順に見つける(self):
+        paths = find_bio_segments(HedPath(self.split))
+        self.assertEqual(
+            ["split0001.bio", "split0002.bio", "split0003.bio"],
+            [p.path[-13:] for p in paths],
+        )
+
+    def test_索引は全体のフレーム範囲をファイルごとに分解する(self):
+        index = BioSegmentIndex([None, None, None], [100, 50, 100])
+        self.assertEqual(250, index.n_frames)
+        self.assertEqual([(0, 90, 10), (1, 0, 50), (2, 0, 10)], index.locate(90, 160))
+        self.assertEqual([(1, 20, 10)], index.locate(120, 130))
+
+    def test_ファイル境界をまたぐ区間を連続した1区間として読む(self):
+        expected = read_MEA(self.single, 0, 3, 450).data
+        actual = read_MEA(self.split, 0, 3, 450).data
+
+        self.assertEqual(expected.shape, actual.shape)
+        np.testing.assert_allclose(expected.array[1:], actual.array[1:], rtol=1e-6)
+        np.testing.assert_array_equal(expected[0], actual[0])
+
+    def test_memmapとブロック読込も分割を意識せずに使える(self):
+        expected = read_MEA(self.single, 0, 3, 450).data
+        lazy = open_MEA(self.split).data
+        self.assertEqual(3, lazy.end)
+        np.testing.assert_allclose(
+            expected.from_slice(9000, 21000)[5], lazy.from_slice(9000, 21000)[5], rtol=1e-6
+        )
+
+        blocks = list(iter_windows(self.split, window_s=0.75))
+        stitched = np.concatenate([b.array[1:] for b in blocks], axis=1)
+        np.testing.assert_allclose(expected.array[1:], stitched, rtol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""計測データカタログ (SQLite) の回帰テスト。"""
+
+import os
+import tempfile
+import unittest
+from test.fixtures import write_synthetic_recording
+from unittest import mock
+
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.infrastructure import read_bio
+from pyMEA.infrastructure.catalog import RecordingCatalog
+
+
+class RecordingCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        os.mkdir(os.path.join(self.root, "day2"))
+        self.short = write_synthetic_recording(self.root, "short", seconds=1)
+        self.long = write_synthetic_recording(
+            os.path.join(self.root, "day2"), "long", seconds=3, sampling_rate=20000, segments=2
+        )
+        self.catalog = RecordingCatalog(os.path.join(self.root, "catalog.sqlite"))
+
+    def tearDown(self):
+        self.catalog.close()
+        self._tmp.cleanup()
+
+    def test_ヘッダー情報と記録長を登録する(self):
+        self.assertEqual(2, self.catalog.scan(self.root))
+        self.assertEqual(2, len(self.catalog))
+
+        entry = self.catalog.get(self.long)
+        self.assertEqual(20000, entry.sampling_rate)
+        self.assertEqual(2000, entry.gain)
+        self.assertEqual(60000, entry.n_frames)
+        self.assertEqual(3, entry.duration)
+        self.assertEqual(2, len(entry.bio_paths))
+        self.assertEqual(60000 * 68 * 2, sum(entry.bio_sizes))
+        self.assertEqual(read_bio.decode_hed(HedPath(self.long)), entry.hed_data)
+
+    def test_条件で記録を絞り込める(self):
+        self.catalog.scan(self.root)
+        self.assertEqual(
+            [self.long],
+            [e.hed_path for e in self.catalog.query(sampling_rate=20000, min_duration=2)],
+        )
+        self.assertEqual([self.short], [e.hed_path for e in self.catalog.query(max_duration=1)])
+        self.assertEqual([], self.catalog.query(sampling_rate=10000, min_duration=2))
+
+    def test_再走査では変更された記録だけを読み直す(self):
+        self.catalog.scan(self.root)
+        with mock.patch.object(read_bio, "decode_hed", wraps=read_bio.decode_hed) as decode:
+            self.assertEqual(0, self.catalog.scan(self.root))
+            decode.assert_not_called()
+
+            write_synthetic_recording(self.root, "short", seconds=2)
+            self.assertEqual(1, self.catalog.scan(self.root))
+            self.assertEqual(1, decode.call_count)
+        self.assertEqual(2, self.catalog.get(self.short).duration)
+
+    def test_消えた記録はカタログから削除する(self):
+        self.catalog.scan(self.root)
+        os.remove(self.short.replace(".hed", "0001.bio"))
+        self.catalog.scan(self.root)
+        self.assertIsNone(self.catalog.get(self.short))
+        self.assertEqual(1, len(self.catalog))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""電極を指定した .bio / .npz 読み込みの回帰テスト。
+
+指定した電極の電位が全電極読み込みと一致し、指定外の電極は0として読めること、
+フィルタ・切り出し後もチャンネルマップが保たれることを担保する。
+"""
+
+import os
+import tempfile
+import unittest
+from test.fixtures import write_synthetic_recording
+
+import numpy as np
+
+from pyMEA import read_MEA, read_MEA_npz
+from pyMEA.domain.model.ChannelSubsetArray import ChannelSubsetArray
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.infrastructure.read_bio import hed2array
+
+
+class ChannelSubsetTest(unittest.TestCase):
+    CHS = [3, 17, 64]
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.hed = write_synthetic_recording(self._tmp.name, seconds=2)
+        self.full_mea = read_MEA(self.hed, 0, 2, 450)
+        self.full = self.full_mea.data
+        self.subset = read_MEA(self.hed, 0, 2, 450, chs=self.CHS).data
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_指定した電極だけを保持する(self):
+        self.assertIsInstance(self.subset.array, ChannelSubsetArray)
+        self.assertEqual(self.CHS, self.subset.channels)
+        self.assertEqual((len(self.CHS), self.full.shape[1]), self.subset.array.voltages.shape)
+        self.assertEqual(self.full.shape, self.subset.shape)
+
+    def test_指定した電極の電位は全電極読み込みと一致する(self):
+        for ch in self.CHS:
+            np.testing.assert_array_equal(self.full[ch], self.subset[ch])
+        np.testing.assert_array_equal(self.full[0], self.subset[0])
+
+    def test_指定外の電極は0として読める(self):
+        np.testing.assert_array_equal(np.zeros(self.full.shape[1]), self.subset[1])
+
+    def test_フィルタと切り出し後もチャンネルマップを保つ(self):
+        filtered = self.subset.highpass(1)
+        self.assertEqual(self.CHS, filtered.channels)
+        np.testing.assert_allclose(
+            self.full.highpass(1)[17], filtered[17], rtol=1e-5, atol=1e-3
+        )
+
+        sliced = self.subset.from_slice(1000, 5000)
+        self.assertEqual(self.CHS, sliced.channels)
+        np.testing.assert_array_equal(self.full.from_slice(1000, 5000)[64], sliced[64])
+
+    def test_ダウンサンプリング後もチャンネルマップを保つ(self):
+        down = self.subset.down_sampling(100)
+        expected = self.full.down_sampling(100)
+
+        self.assertEqual(self.CHS, down.channels)
+        self.assertEqual(len(self.CHS), len(down.array.voltages))
+        self.assertEqual(expected.SAMPLING_RATE, down.SAMPLING_RATE)
+        self.assertEqual(expected.end, down.end)
+        for ch in self.CHS:
+            np.testing.assert_array_equal(expected[ch], down[ch])
+        np.testing.assert_array_equal(expected[0], down[0])
+
+    def test_範囲外の電極番号はエラー(self):
+        with self.assertRaises(ValueError):
+            hed2array(HedPath(self.hed), 0, 1, chs=[0, 65])
+
+    def test_npzも指定電極だけを読み込む(self):
+        path = os.path.join(self._tmp.name, "subset.npz")
+        self.full_mea.save_npz(path, dtype="float32", chunked=True)
+        loaded = read_MEA_npz(path, chs=self.CHS).data
+
+        self.assertEqual(self.CHS, loaded.channels)
+        for ch in self.CHS:
+            np.testing.assert_array_equal(self.full[ch], loaded[ch])
+
+
+if __name__ == "__main__":
+    unittest.main()
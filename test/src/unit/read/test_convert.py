@@ -0,0 +1,104 @@
+"""ディレクトリ一括変換 (convert_directory) の回帰テスト。"""
+
+import os
+import tempfile
+import unittest
+from test.fixtures import write_synthetic_recording
+from unittest import mock
+
+import numpy as np
+
+from pyMEA import convert_directory, read_MEA, read_MEA_npz
+from pyMEA.infrastructure import npz_io, read_bio
+
+
+class ConvertDirectoryTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self._tmp.name, "src")
+        self.dst = os.path.join(self._tmp.name, "dst")
+        os.makedirs(os.path.join(self.src, "day2"))
+        self.a = write_synthetic_recording(self.src, "a", seconds=2.5)
+        self.b = write_synthetic_recording(
+            os.path.join(self.src, "day2"), "b", seconds=1, segments=2, seed=1
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_相対パスを保ってnpzに変換する(self):
+        reports = convert_directory(
+            self.src, self.dst, workers=1, window_s=0.7, electrode_distance=450, verbose=False
+        )
+        self.assertEqual(["converted", "converted"], [r.status for r in reports])
+        self.assertTrue(all(r.mb_per_s > 0 for r in reports))
+
+        for hed, relative, seconds in ((self.a, "a.npz", 2.5), (self.b, "day2/b.npz", 1)):
+            loaded = read_MEA_npz(os.path.join(self.dst, relative))
+            expected = read_MEA(hed, 0, seconds, 450).data
+            self.assertEqual(450, loaded.electrode.ele_dis)
+            self.assertEqual(seconds, loaded.data.end)
+            # int16 は .bio の ADC 分解能で保存するため元の値に戻る
+            np.testing.assert_allclose(
+                np.asarray(expected.array[1:]), loaded.data.array[1:], rtol=1e-5, atol=1e-6
+            )
+
+    def test_変換済みで最新のファイルはスキップする(self):
+        convert_directory(self.src, self.dst, workers=1, verbose=False)
+        reports = convert_directory(self.src, self.dst, workers=1, verbose=False)
+        self.assertEqual(["skipped", "skipped"], [r.status for r in reports])
+
+        # 入力が更新された記録だけ変換し直す
+        future = os.path.getmtime(os.path.join(self.dst, "a.npz")) + 10
+        os.utime(self.a, (future, future))
+        reports = convert_directory(self.src, self.dst, workers=1, verbose=False)
+        self.assertEqual(["converted", "skipped"], [r.status for r in reports])
+
+    def test_変換できない記録があっても続ける(self):
+        os.remove(self.b.replace(".hed", "0001.bio"))
+        os.remove(self.b.replace(".hed", "0002.bio"))
+        reports = convert_directory(self.src, self.dst, workers=1, verbose=False)
+        self.assertEqual(["converted", "failed"], [r.status for r in reports])
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "day2", "b.npz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "day2", "b.partial.npz")))
+
+    def test_読込が途中で失敗してもファイルとスレッドプールを閉じる(self):
+        writers = []
+
+        class RecordingWriter(npz_io.ChunkedNpzWriter):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                writers.append(self)
+
+        iter_windows = read_bio.iter_windows
+
+        def failing_windows(hed_path, window_s):
+            yield next(iter_windows(hed_path, window_s))
+            raise OSError("read failed")
+
+        partial = os.path.join(self._tmp.name, "a.partial.npz")
+        with (
+            mock.patch.object(npz_io, "ChunkedNpzWriter", RecordingWriter),
+            mock.patch.object(read_bio, "iter_windows", failing_windows),
+        ):
+            with self.assertRaises(OSError):
+                npz_io.save_recording_npz(self.a, partial, window_s=0.5, workers=2)
+
+        writer = writers[0]
+        self.assertIsNone(writer._zip.fp)
+        self.assertTrue(writer._pool._shutdown)
+        os.remove(partial)
+
+    def test_プロセス並列でも同じ結果になる(self):
+        serial = os.path.join(self._tmp.name, "serial")
+        convert_directory(self.src, serial, workers=1, verbose=False)
+        reports = convert_directory(self.src, self.dst, workers=2, verbose=False)
+        self.assertEqual(["converted", "converted"], [r.status for r in reports])
+        np.testing.assert_array_equal(
+            read_MEA_npz(os.path.join(serial, "a.npz")).data.array[1:],
+            read_MEA_npz(os.path.join(self.dst, "a.npz")).data.array[1:],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
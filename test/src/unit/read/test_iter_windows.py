@@ -0,0 +1,46 @@
+"""iter_windows (長時間記録のブロック逐次読込) の回帰テスト。"""
+
+import tempfile
+import unittest
+from test.fixtures import write_synthetic_recording
+
+import numpy as np
+
+from pyMEA import read_MEA
+from pyMEA.infrastructure.read_bio import iter_windows
+
+
+class IterWindowsTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.hed = write_synthetic_recording(self._tmp.name, seconds=3)
+        self.eager = read_MEA(self.hed, 0, 3, 450).data
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_重なりなしのブロックをつなぐと一括読込と一致する(self):
+        blocks = list(iter_windows(self.hed, window_s=0.7))
+
+        self.assertEqual([0, 0.7, 1.4, 2.1, 2.8], [round(b.start, 6) for b in blocks])
+        self.assertEqual(2000, blocks[-1].shape[1])  # 末尾のみ短い
+        stitched = np.concatenate([b.array[1:] for b in blocks], axis=1)
+        np.testing.assert_allclose(self.eager.array[1:], stitched, rtol=1e-6)
+
+    def test_hopを指定すると前後のブロックが重なる(self):
+        blocks = list(iter_windows(self.hed, window_s=1, hop_s=0.5, start=1, end=3))
+
+        self.assertEqual([1, 1.5, 2], [b.start for b in blocks])
+        expected = self.eager.from_slice(15000, 25000)
+        np.testing.assert_allclose(expected.array[1:], blocks[1].array[1:], rtol=1e-6)
+        np.testing.assert_allclose(expected[0], blocks[1][0])
+
+    def test_不正な区間は例外(self):
+        with self.assertRaises(ValueError):
+            next(iter_windows(self.hed, window_s=0))
+        with self.assertRaises(ValueError):
+            next(iter_windows(self.hed, window_s=1, start=2, end=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
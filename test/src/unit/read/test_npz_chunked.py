@@ -0,0 +1,101 @@
+"""チャンク形式 .npz (部分読込) の回帰テスト。"""
+
+import os
+import tempfile
+import unittest
+from test.fixtures import fixture_hed_path
+
+import numpy as np
+
+from pyMEA import read_MEA, read_MEA_npz
+from pyMEA.infrastructure.npz_io import chunk_key, save_mea_npz
+
+
+class NpzChunkedTest(unittest.TestCase):
+    def setUp(self):
+        self.pymea = read_MEA(fixture_hed_path("cardio"), 0, 3, 450)
+        self._tmp = tempfile.TemporaryDirectory()
+        self.npz = os.path.join(self._tmp.name, "chunked.npz")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_全体の読込は一括形式と一致する(self):
+        flat = os.path.join(self._tmp.name, "flat.npz")
+        self.pymea.save_npz(flat, dtype="int16")
+        self.pymea.save_npz(self.npz, dtype="int16", chunked=True)
+
+        expected = read_MEA_npz(flat).data
+        actual = read_MEA_npz(self.npz).data
+        np.testing.assert_array_equal(expected.array[1:], actual.array[1:])
+        self.assertEqual(expected.start, actual.start)
+        self.assertEqual(expected.end, actual.end)
+        self.assertEqual(450, read_MEA_npz(self.npz).electrode.ele_dis)
+
+    def test_区間と電極を指定して一部だけ読み込む(self):
+        self.pymea.save_npz(self.npz, dtype="float32", chunked=True)
+        loaded = read_MEA_npz(self.npz, start=0.5, end=2.5, chs=[3, 40]).data
+
+        expected = self.pymea.data.from_slice(5000, 25000)
+        self.assertEqual((65, 20000), loaded.shape)
+        self.assertEqual(0.5, loaded.start)
+        self.assertEqual(2.5, loaded.end)
+        np.testing.assert_array_equal(expected[0], loaded[0])
+        for ch in (3, 40):
+            np.testing.assert_array_equal(expected[ch], loaded[ch])
+        self.assertFalse(loaded[4].any())  # 指定外の電極は0
+
+    def test_チャンクの境界をまたぐ区間を読み込める(self):
+        save_mea_npz(
+            self.pymea.data,
+            self.npz,
+            "float32",
+            chunked=True,
+            chunk_frames=777,
+            chunk_channels=5,
+        )
+        with np.load(self.npz) as data:
+            self.assertIn(chunk_key(12, 38), data.files)  # 64ch / 5, 30000 / 777
+
+        loaded = read_MEA_npz(self.npz, start=1.23, end=1.7, chs=[5, 6, 64]).data
+        expected = self.pymea.data.from_slice(12300, 17000)
+        for ch in (5, 6, 64):
+            np.testing.assert_array_equal(expected[ch], loaded[ch])
+
+    def test_一括形式でも区間と電極を指定できる(self):
+        self.pymea.save_npz(self.npz, dtype="float32")
+        loaded = read_MEA_npz(self.npz, start=1, end=2, chs=[7]).data
+        np.testing.assert_array_equal(self.pymea.data.from_slice(10000, 20000)[7], loaded[7])
+
+    def test_並列圧縮と逐次圧縮は同じ内容になる(self):
+        serial = os.path.join(self._tmp.name, "serial.npz")
+        save_mea_npz(self.pymea.data, serial, chunked=True, workers=1)
+        save_mea_npz(self.pymea.data, self.npz, chunked=True, workers=4)
+
+        with np.load(serial) as expected, np.load(self.npz) as actual:
+            self.assertEqual(expected.files, actual.files)
+            for key in expected.files:
+                np.testing.assert_array_equal(expected[key], actual[key])
+
+    def test_圧縮レベルを指定できる(self):
+        fast = os.path.join(self._tmp.name, "fast.npz")
+        self.pymea.save_npz(fast, dtype="float32", chunked=True, compresslevel=1)
+        self.pymea.save_npz(self.npz, dtype="float32", chunked=True, compresslevel=9)
+
+        self.assertGreaterEqual(os.path.getsize(fast), os.path.getsize(self.npz))
+        np.testing.assert_array_equal(
+            read_MEA_npz(fast).data.array[1:], read_MEA_npz(self.npz).data.array[1:]
+        )
+        with self.assertRaises(ValueError):
+            self.pymea.save_npz(self.npz, chunked=True, compresslevel=10)
+
+    def test_保存区間の外は例外(self):
+        self.pymea.save_npz(self.npz, chunked=True)
+        with self.assertRaises(ValueError):
+            read_MEA_npz(self.npz, start=0, end=4)
+        with self.assertRaises(ValueError):
+            read_MEA_npz(self.npz, chs=[65])
+
+
+if __name__ == "__main__":
+    unittest.main()
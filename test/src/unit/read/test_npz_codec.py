@@ -0,0 +1,84 @@
+"""npz 保存時のコーデック (差分・バイトシャッフル) の回帰テスト。"""
+
+import os
+import tempfile
+import unittest
+from test.fixtures import fixture_hed_path
+
+import numpy as np
+
+from pyMEA import read_MEA, read_MEA_npz
+from pyMEA.infrastructure.npz_codec import (
+    SUPPORTED_CODECS,
+    decode_voltages,
+    encode_voltages,
+)
+
+
+class NpzCodecTest(unittest.TestCase):
+    def test_int16の全域で可逆に符号化できる(self):
+        rng = np.random.default_rng(0)
+        x = rng.integers(-32768, 32768, size=(5, 1000)).astype(np.int16)
+        x[0, :4] = [32767, -32768, 32767, -32768]  # 差分が桁あふれする並び
+        for codec in SUPPORTED_CODECS:
+            encoded = encode_voltages(x, codec)
+            np.testing.assert_array_equal(x, decode_voltages(encoded, codec, np.int16))
+            # バイト列から復元しても同じ (チャンク形式の読込経路)
+            raw = np.frombuffer(np.ascontiguousarray(encoded).tobytes(), dtype=np.uint8)
+            np.testing.assert_array_equal(
+                x, decode_voltages(raw.reshape(5, -1), codec, np.int16)
+            )
+
+    def test_float32はシャッフルだけ使える(self):
+        x = np.linspace(-1, 1, 300, dtype=np.float32).reshape(3, 100)
+        np.testing.assert_array_equal(
+            x, decode_voltages(encode_voltages(x, "shuffle"), "shuffle", np.float32)
+        )
+        with self.assertRaises(ValueError):
+            encode_voltages(x, "delta")
+        with self.assertRaises(ValueError):
+            encode_voltages(x.astype(np.int16), "lz4")
+
+
+class NpzCodecSaveTest(unittest.TestCase):
+    def setUp(self):
+        self.pymea = read_MEA(fixture_hed_path("cardio"), 0, 2, 450)
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._tmp.name, f"{name}.npz")
+
+    def test_コーデックを変えても読み込む値は同じ(self):
+        self.pymea.save_npz(self._path("plain"))
+        expected = read_MEA_npz(self._path("plain")).data.array[1:]
+        for chunked in (False, True):
+            for codec in SUPPORTED_CODECS:
+                path = self._path(f"{codec}_{chunked}")
+                self.pymea.save_npz(path, chunked=chunked, codec=codec)
+                np.testing.assert_array_equal(
+                    expected, read_MEA_npz(path).data.array[1:], err_msg=codec
+                )
+
+    def test_チャンク形式で一部だけ読み込める(self):
+        self.pymea.save_npz(self._path("ds"), chunked=True, codec="delta_shuffle")
+        plain = self._path("plain")
+        self.pymea.save_npz(plain, chunked=True)
+
+        expected = read_MEA_npz(plain, start=0.5, end=1.5, chs=[2, 33]).data
+        actual = read_MEA_npz(self._path("ds"), start=0.5, end=1.5, chs=[2, 33]).data
+        for ch in (2, 33):
+            np.testing.assert_array_equal(expected[ch], actual[ch])
+
+    def test_差分とシャッフルで小さくなる(self):
+        self.pymea.save_npz(self._path("plain"))
+        self.pymea.save_npz(self._path("ds"), codec="delta_shuffle")
+        self.assertLess(
+            os.path.getsize(self._path("ds")), os.path.getsize(self._path("plain"))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
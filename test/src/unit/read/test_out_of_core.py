@@ -0,0 +1,117 @@
+"""メモリ外 (out-of-core) のゼロ位相フィルタ (filter_to_npy) の回帰テスト。"""
+
+import os
+import tempfile
+import tracemalloc
+import unittest
+from test.fixtures import write_synthetic_recording
+from unittest import mock
+
+import numpy as np
+from scipy.signal import butter, sosfiltfilt
+
+from pyMEA import FilterPipeline, FilterType, filter_to_npy, read_MEA
+
+SECONDS = 20
+SAMPLING_RATE = 10000
+# 記録全体の sosfiltfilt との差の上限 (入力振幅に対する比)
+TOLERANCE = 1e-6
+
+
+class FilterToNpyTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.hed = write_synthetic_recording(self._tmp.name, seconds=SECONDS)
+        self.npy = os.path.join(self._tmp.name, "filtered.npy")
+        self.raw = read_MEA(self.hed, 0, SECONDS, 450).data
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _assert_equivalent(self, expected: np.ndarray, actual: np.ndarray):
+        scale = float(np.abs(self.raw.array.voltages).max())
+        np.testing.assert_allclose(expected, actual, rtol=0, atol=TOLERANCE * scale)
+
+    def test_記録全体のsosfiltfiltと許容誤差内で一致する(self):
+        # 1Hz ハイパスののりしろ (約 6.6 s) より短いチャンクを指定しても分割して処理する
+        pipeline = FilterPipeline(chunk_s=1).highpass(1)
+        with self.assertWarns(RuntimeWarning):
+            result = filter_to_npy(self.hed, self.npy, pipeline)
+
+        sos = butter(4, 1, btype="highpass", fs=SAMPLING_RATE, output="sos")
+        expected = sosfiltfilt(sos, self.raw.array.voltages.astype(np.float64), axis=-1)
+        self._assert_equivalent(expected, result.data.array.voltages)
+
+    def test_結果はnpyのmemmapを参照する(self):
+        pipeline = FilterPipeline(chunk_s=1).bandpass(100, 3000)
+        result = filter_to_npy(self.hed, self.npy, pipeline)
+        voltages = result.data.array.voltages
+        self.assertIsInstance(voltages.base, np.memmap)
+        self.assertFalse(voltages.flags.writeable)
+
+        saved = np.load(self.npy, mmap_mode="r")
+        self.assertEqual((64, SECONDS * SAMPLING_RATE), saved.shape)
+        np.testing.assert_array_equal(saved, voltages)
+
+    def test_心筋デノイズプリセットはread_MEAと一致する(self):
+        result = filter_to_npy(self.hed, self.npy, FilterType.CARDIO_DENOISE)
+        expected = read_MEA(self.hed, 0, SECONDS, 450, FilterType.CARDIO_DENOISE)
+        self._assert_equivalent(
+            expected.data.array.voltages, result.data.array.voltages
+        )
+        self.assertEqual(expected.data.shape, result.data.shape)
+
+    def test_並列数とチャンク長を指定できる(self):
+        run = FilterPipeline.run
+        patcher = mock.patch.object(FilterPipeline, "run", autospec=True, side_effect=run)
+        with patcher as spy:
+            filter_to_npy(self.hed, self.npy, FilterType.NEURO_DENOISE)
+            filter_to_npy(
+                self.hed,
+                self.npy,
+                FilterType.NEURO_DENOISE,
+                workers=1,
+                chunk_s=2,
+                max_bytes=10**8,
+            )
+        default, custom = spy.call_args_list
+        self.assertEqual(2, default.kwargs["workers"])
+        self.assertEqual(1, custom.kwargs["workers"])
+        self.assertEqual(10**8, custom.kwargs["max_bytes"])
+        self.assertEqual(2, custom.args[0].chunk_s)
+
+    def test_作業領域はmax_bytesに収まる(self):
+        max_bytes = 64 * 1024**2
+        tracemalloc.start()
+        try:
+            with self.assertWarns(RuntimeWarning):
+                result = filter_to_npy(
+                    self.hed,
+                    self.npy,
+                    FilterType.CARDIO_DENOISE,
+                    chunk_s=2,
+                    max_bytes=max_bytes,
+                )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLessEqual(peak, max_bytes)
+        expected = read_MEA(self.hed, 0, SECONDS, 450, FilterType.CARDIO_DENOISE)
+        self._assert_equivalent(
+            expected.data.array.voltages, result.data.array.voltages
+        )
+
+    def test_1チャンクがmax_bytesに収まらなければnpyを作らずにエラー(self):
+        with self.assertRaises(ValueError):
+            filter_to_npy(
+                self.hed, self.npy, FilterType.CARDIO_DENOISE, max_bytes=1024**2
+            )
+        self.assertFalse(os.path.exists(self.npy))
+
+    def test_フィルタでないプリセットはエラー(self):
+        with self.assertRaises(ValueError):
+            filter_to_npy(self.hed, self.npy, FilterType.CARDIO_AVE_WAVE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+"""先読み Reader (PrefetchReader / iter_MEA) の回帰テスト。"""
+
+import tempfile
+import threading
+import time
+import unittest
+from test.fixtures import write_synthetic_recording
+
+import numpy as np
+
+from pyMEA import iter_MEA, read_MEA
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.infrastructure.prefetch import PrefetchReader, _result_nbytes
+from pyMEA.infrastructure.reader import MEAReadResult, create_reader
+
+
+class FakeReader:
+    """読込回数を記録し、n_bytes の配列を返す Reader"""
+
+    def __init__(self, index: int, log: list, n_bytes: int = 400, fail: bool = False):
+        self.index = index
+        self.log = log
+        self.n_bytes = n_bytes
+        self.fail = fail
+
+    def read(self) -> MEAReadResult:
+        self.log.append((self.index, threading.current_thread().name))
+        if self.fail:
+            raise OSError(f"read failed: {self.index}")
+        return MEAReadResult(
+            hed_path=HedPath("fake.hed"),
+            array=np.full((1, self.n_bytes // 4), self.index, dtype=np.float32),
+            sampling_rate=10000,
+            gain=50000,
+            start=0,
+            end=1,
+        )
+
+
+def _wait_for(condition, timeout=2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def _collect_with_timeout(prefetch: PrefetchReader, timeout=2.0) -> list:
+    """反復が timeout 以内に終わらなければ失敗させる (待ち続けるバグでテストを止めない)"""
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(prefetch), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise AssertionError("PrefetchReader の反復が終わらない")
+    return results
+
+
+class PrefetchReaderTest(unittest.TestCase):
+    def test_順番どおりに別スレッドで読み込む(self):
+        log = []
+        with PrefetchReader([FakeReader(i, log) for i in range(5)]) as results:
+            indices = [int(r.array[0, 0]) for r in results]
+        self.assertEqual([0, 1, 2, 3, 4], indices)
+        self.assertTrue(all(name != threading.current_thread().name for _, name in log))
+
+    def test_先読みはdepth件までに留める(self):
+        log = []
+        with PrefetchReader([FakeReader(i, log) for i in range(10)], depth=3) as prefetch:
+            results = iter(prefetch)
+            next(results)
+            _wait_for(lambda: len(log) >= 4)
+            time.sleep(0.05)
+            # 取り出した1件 + 先読み3件
+            self.assertEqual(4, len(log))
+
+    def test_メモリ上限を超えたら次を読まない(self):
+        log = []
+        readers = [FakeReader(i, log, n_bytes=1000) for i in range(10)]
+        with PrefetchReader(readers, depth=8, max_bytes=2000) as prefetch:
+            results = iter(prefetch)
+            next(results)
+            _wait_for(lambda: len(log) >= 3)
+            time.sleep(0.05)
+            self.assertEqual(3, len(log))
+
+    def test_読込の例外はその順番で送出する(self):
+        log = []
+        readers = [FakeReader(0, log), FakeReader(1, log, fail=True), FakeReader(2, log)]
+        with PrefetchReader(readers) as prefetch:
+            results = iter(prefetch)
+            self.assertEqual(0, int(next(results).array[0, 0]))
+            with self.assertRaises(OSError):
+                next(results)
+
+    def test_closeした後の反復はすぐに終わる(self):
+        log = []
+        prefetch = PrefetchReader([FakeReader(i, log) for i in range(3)])
+        prefetch.close()
+        self.assertEqual([], _collect_with_timeout(prefetch))
+        self.assertEqual([], log)
+
+    def test_反復中に別スレッドからcloseすると反復が終わる(self):
+        log = []
+        release = threading.Event()
+
+        class BlockingReader(FakeReader):
+            def read(self):
+                release.wait(2.0)
+                return super().read()
+
+        prefetch = PrefetchReader([BlockingReader(0, log)])
+        results = []
+        consumer = threading.Thread(target=lambda: results.extend(prefetch))
+        consumer.start()
+        _wait_for(lambda: prefetch._thread is not None)
+        closer = threading.Thread(target=prefetch.close)
+        closer.start()
+        _wait_for(lambda: not consumer.is_alive(), timeout=1.0)
+        self.assertFalse(consumer.is_alive())
+        release.set()
+        closer.join(2.0)
+        consumer.join(2.0)
+        self.assertEqual([], results)
+
+    def test_不正なdepthは例外(self):
+        with self.assertRaises(ValueError):
+            PrefetchReader([], depth=0)
+
+
+class IterMEATest(unittest.TestCase):
+    def test_read_MEAと同じ結果を順に返す(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [
+                write_synthetic_recording(tmp, f"rec{i}", seconds=1, seed=i)
+                for i in range(3)
+            ]
+            for path, pymea in zip(paths, iter_MEA(paths, 0, 1, 450, chs=[5])):
+                expected = read_MEA(path, 0, 1, 450)
+                self.assertEqual(path, pymea.data.hed_path.path)
+                np.testing.assert_array_equal(expected.data[5], pymea.data[5])
+                self.assertEqual(450, pymea.electrode.ele_dis)
+
+    def test_量子化データも保持しているバイト数をメモリ上限に数える(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [
+                write_synthetic_recording(tmp, f"rec{i}", seconds=1, seed=i)
+                for i in range(4)
+            ]
+            result = create_reader(paths[0], 0, 1, quantized=True).read()
+            # int16 のまま (64, N) を保持している
+            self.assertEqual(64 * result.array.n_frames * 2, _result_nbytes(result))
+
+            log = []
+
+            class LoggingReader:
+                def __init__(self, path):
+                    self.path = path
+
+                def read(self):
+                    log.append(self.path)
+                    return create_reader(self.path, 0, 1, quantized=True).read()
+
+            readers = [LoggingReader(path) for path in paths]
+            with PrefetchReader(readers, depth=8, max_bytes=1) as prefetch:
+                results = iter(prefetch)
+                next(results)
+                _wait_for(lambda: len(log) >= 2)
+                time.sleep(0.05)
+                # 取り出した1件 + 上限を超えるまでの先読み1件
+                self.assertEqual(2, len(log))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""int16 + scale で電位を保持する MEA (QuantizedArray) の回帰テスト。"""
+
+import os
+import tempfile
+import unittest
+from test.fixtures import fixture_hed_path, write_synthetic_recording
+from unittest import mock
+
+import numpy as np
+
+from pyMEA import detect_peak_neg, read_MEA, read_MEA_npz
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.QuantizedArray import QuantizedArray
+from pyMEA.infrastructure import bio_memmap
+from pyMEA.infrastructure.read_bio import hed2quantized
+
+
+class QuantizeTest(unittest.TestCase):
+    def setUp(self):
+        self.mea = read_MEA(fixture_hed_path("cardio"), 0, 2, 450).data
+        self.quantized = self.mea.quantize()
+
+    def test_int16で保持してメモリを半分にする(self):
+        self.assertIsInstance(self.quantized.array, QuantizedArray)
+        self.assertEqual(np.int16, self.quantized.array.samples.dtype)
+        self.assertEqual(self.mea.shape, self.quantized.shape)
+        self.assertEqual(np.asarray(self.mea.array[1:]).nbytes // 2, self.quantized.array.nbytes)
+
+    def test_電位は量子化誤差の範囲で一致する(self):
+        scale = self.quantized.array.scale
+        for ch in (1, 32, 64):
+            self.assertEqual(np.float32, self.quantized[ch].dtype)
+            np.testing.assert_allclose(self.mea[ch], self.quantized[ch], atol=scale)
+        np.testing.assert_array_equal(self.mea[0], self.quantized[0])
+
+    def test_フィルタとピーク検出をそのまま使える(self):
+        np.testing.assert_allclose(
+            self.mea.highpass(1)[5], self.quantized.highpass(1)[5], atol=self.quantized.array.scale
+        )
+        expected = detect_peak_neg(self.mea)
+        actual = detect_peak_neg(self.quantized)
+        for ch in (1, 20, 64):
+            np.testing.assert_array_equal(expected[ch], actual[ch])
+
+    def test_切り出しは量子化したまま行う(self):
+        sliced = self.quantized.from_slice(1000, 3000)
+        self.assertIsInstance(sliced.array, QuantizedArray)
+        np.testing.assert_array_equal(self.quantized[7][1000:3000], sliced[7])
+
+
+class QuantizedReadTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.hed = write_synthetic_recording(self._tmp.name, seconds=2)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_bioの生値を無損失で保持する(self):
+        expected = read_MEA(self.hed, 0.5, 1.5, 450).data
+        actual = read_MEA(self.hed, 0.5, 1.5, 450, quantized=True).data
+        self.assertIsInstance(actual.array, QuantizedArray)
+        for ch in (1, 40, 64):
+            np.testing.assert_array_equal(expected[ch], actual[ch])
+        np.testing.assert_array_equal(expected[0], actual[0])
+
+    def test_bioの生値をブロックごとにそのまま写す(self):
+        seg_dir = os.path.join(self._tmp.name, "segments")
+        os.makedirs(seg_dir)
+        hed = write_synthetic_recording(seg_dir, seconds=2, segments=3, seed=2)
+        raw = np.concatenate(
+            [
+                np.fromfile(hed.replace(".hed", f"000{i}.bio"), dtype="<h").reshape(-1, 68)
+                for i in (1, 2, 3)
+            ]
+        )
+        with mock.patch.object(bio_memmap, "DECODE_BLOCK_FRAMES", 777):
+            full = hed2quantized(HedPath(hed), 0, 2)
+            subset = hed2quantized(HedPath(hed), 1, 2, chs=[9, 2])
+
+        np.testing.assert_array_equal(raw[:, 4:].T, full.samples)
+        np.testing.assert_array_equal(raw[10000:, [12, 5]].T, subset.samples)
+        self.assertEqual([9, 2], subset.channels)
+        self.assertFalse(full.samples.flags.writeable)
+
+    def test_int16のnpzは展開せずに保持する(self):
+        pymea = read_MEA(self.hed, 0, 2, 450)
+        for chunked in (False, True):
+            path = os.path.join(self._tmp.name, f"q{chunked}.npz")
+            pymea.save_npz(path, chunked=chunked, codec="delta")
+            expected = read_MEA_npz(path, start=0.5, end=1.5).data
+            actual = read_MEA_npz(path, start=0.5, end=1.5, chs=[3, 9], quantized=True).data
+            self.assertIsInstance(actual.array, QuantizedArray)
+            self.assertEqual([3, 9], actual.channels)
+            for ch in (3, 9):
+                np.testing.assert_array_equal(expected[ch], actual[ch])
+            self.assertFalse(actual[4].any())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""read_bio (int16 → float64 の1パス復号) と MEA 用の float32 読み込みの回帰テスト。"""
+
+import tempfile
+import unittest
+from test.fixtures import write_synthetic_recording
+from unittest import mock
+
+import numpy as np
+
+from pyMEA.domain.model.BioPath import BioPath
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.MEA import MEA
+from pyMEA.infrastructure import bio_memmap
+from pyMEA.infrastructure.bio_memmap import open_bio_memmap
+from pyMEA.infrastructure.read_bio import (
+    _hed2voltages,
+    _read_bio_voltages,
+    hed2array,
+    read_bio_segments,
+)
+
+
+def reference_read_bio(path, start, end, sampling_rate, gain, volt_range=100):
+    """従来実装 (float64 に拡張してから補助チャンネルを削除) による期待値"""
+    raw = np.fromfile(path, dtype="<h").reshape(-1, 68)
+    raw = raw[start * sampling_rate : end * sampling_rate]
+    data = raw.T[4:] * (volt_range / (2**16 - 2)) * 4 * (50000 / gain)
+    t = np.arange(data.shape[1]) / sampling_rate + start
+    return np.vstack([t, data])
+
+
+class ReadBioTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.hed = write_synthetic_recording(self._tmp.name, seconds=3)
+        self.bio = BioPath(self.hed[:-4] + "0001.bio")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_従来の復号と一致するfloat64を返す(self):
+        expected = reference_read_bio(self.bio.path, 1, 3, 10000, 2000)
+        actual = read_bio_segments([self.bio], 1, 3, 10000, 2000)
+
+        self.assertEqual(np.float64, actual.dtype)
+        self.assertTrue(actual.flags.writeable)
+        self.assertEqual(expected.shape, actual.shape)
+        np.testing.assert_allclose(expected, actual, rtol=1e-12)
+
+    def test_hed2arrayはfloat64を返す(self):
+        actual = hed2array(HedPath(self.hed), 0, 1)
+        self.assertEqual(np.float64, actual.dtype)
+        self.assertEqual((65, 10000), actual.shape)
+
+    def test_MEA用の読み込みは電位だけを読み取り専用のfloat32で返す(self):
+        expected = reference_read_bio(self.bio.path, 1, 3, 10000, 2000)
+        actual = _read_bio_voltages([self.bio], 1, 3, 10000, 2000, chs=[5, 2])
+
+        self.assertEqual(np.float32, actual.dtype)
+        self.assertFalse(actual.flags.writeable)
+        np.testing.assert_allclose(expected[[5, 2]], actual, rtol=1e-6)
+
+    def test_スレッド分割しても結果は同じ(self):
+        recording = open_bio_memmap(self.bio, 10000, 2000)
+        serial = recording.read_voltages(workers=1)
+        with mock.patch.object(bio_memmap, "DECODE_BLOCK_FRAMES", 4096):
+            parallel = recording.read_voltages(workers=4)
+        np.testing.assert_array_equal(serial, parallel)
+
+    def test_確保済みバッファに直接書き込む(self):
+        recording = open_bio_memmap(self.bio, 10000, 2000)
+        out = np.empty((64, 5000), dtype=np.float32)
+        result = recording.read_voltages(1000, 6000, out=out)
+        self.assertIs(out, result)
+
+    def test_MEAは読込結果をコピーせずに保持する(self):
+        array = _hed2voltages(HedPath(self.hed), 0, 1)
+        mea = MEA(HedPath("synthetic.hed"), 0, 1, 10000, 2000, array)
+        self.assertIs(array, mea.array)
+
+        # 書き込み可能な配列は従来どおりコピーして読み取り専用にする
+        writable = np.zeros((65, 10), dtype=np.float32)
+        mea = MEA(HedPath("synthetic.hed"), 0, 1, 10000, 2000, writable)
+        self.assertFalse(np.shares_memory(writable, mea.array.voltages))
+        self.assertFalse(mea.array.voltages.flags.writeable)
+
+    def test_書き込み可能な配列の読み取り専用ビューはコピーする(self):
+        writable = np.zeros((65, 10), dtype=np.float32)
+        view = writable.view()
+        view.setflags(write=False)
+        mea = MEA(HedPath("synthetic.hed"), 0, 1, 10000, 2000, view)
+
+        self.assertFalse(np.shares_memory(writable, mea.array.voltages))
+        writable[1] = 1
+        self.assertEqual(0, mea[1].max())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""記録ハンドル (Recording) の回帰テスト。"""
+
+import tempfile
+import unittest
+from test.fixtures import write_synthetic_recording
+from unittest import mock
+
+import numpy as np
+
+from pyMEA import Recording, read_MEA
+
+
+class RecordingTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.hed = write_synthetic_recording(self._tmp.name, seconds=3, segments=2)
+        self.recording = Recording(self.hed, electrode_distance=450, block_s=0.5)
+
+    def tearDown(self):
+        self.recording.close()
+        self._tmp.cleanup()
+
+    def test_read_MEAと同じ区間を返す(self):
+        for start, end in ((0, 3), (0.2, 0.4), (0.75, 2.3), (2.9, 5)):
+            expected = read_MEA(self.hed, start, end, 450)
+            actual = self.recording.read(start, end)
+            self.assertEqual(expected.data.start, actual.data.start)
+            self.assertEqual(expected.data.end, actual.data.end)
+            self.assertEqual(expected.data.shape, actual.data.shape)
+            np.testing.assert_array_equal(
+                np.asarray(expected.data.array)[1:], actual.data.array[1:]
+            )
+            np.testing.assert_array_equal(expected.data[0], actual.data[0])
+        self.assertEqual(450, actual.electrode.ele_dis)
+        self.assertEqual(3, self.recording.duration)
+
+    def test_重なった区間は復号済みのブロックを使う(self):
+        self.recording.read(0.2, 1.2)
+        stats = self.recording.cache_stats
+        self.assertEqual((0, 3), (stats.hits, stats.misses))
+
+        with mock.patch.object(self.recording._memmap, "read_voltages") as decode:
+            self.recording.read(0.6, 1.4)
+            decode.assert_not_called()
+        stats = self.recording.cache_stats
+        self.assertEqual((2, 3), (stats.hits, stats.misses))
+        self.assertAlmostEqual(0.4, stats.hit_rate)
+
+    def test_1ブロック内の区間はコピーせずに返す(self):
+        first = self.recording.read(0.1, 0.3).data
+        second = self.recording.read(0.2, 0.4).data
+        self.assertTrue(np.shares_memory(first.array.voltages, second.array.voltages))
+        self.assertFalse(second.array.voltages.flags.writeable)
+
+    def test_メモリ上限を超えたら古いブロックから手放す(self):
+        block_bytes = 64 * 5000 * 4
+        recording = Recording(self.hed, block_s=0.5, max_bytes=2 * block_bytes)
+        recording.read(0, 1.5)
+        stats = recording.cache_stats
+        self.assertEqual((2, 1), (stats.blocks, stats.evictions))
+        self.assertLessEqual(stats.nbytes, stats.max_bytes)
+
+        recording.read(0, 0.1)  # 先頭ブロックは手放しているので読み直す
+        self.assertEqual(4, recording.cache_stats.misses)
+
+    def test_電極を指定して読み込める(self):
+        actual = self.recording.read(0.5, 1.5, chs=[2, 10]).data
+        expected = read_MEA(self.hed, 0.5, 1.5, 450).data
+        self.assertEqual([2, 10], actual.channels)
+        np.testing.assert_array_equal(expected[10], actual[10])
+        self.assertFalse(actual[3].any())
+        with self.assertRaises(ValueError):
+            self.recording.read(0, 1, chs=[65])
+
+    def test_不正な区間と閉じた後の読込は例外(self):
+        with self.assertRaises(ValueError):
+            self.recording.read(2, 1)
+        self.recording.close()
+        with self.assertRaises(ValueError):
+            self.recording.read(0, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
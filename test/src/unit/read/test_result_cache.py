@@ -0,0 +1,152 @@
+"""派生結果のディスクキャッシュ (enable_result_cache / DiskResultCache) の回帰テスト。"""
+
+import os
+import tempfile
+import time
+import unittest
+from test.fixtures import fixture_hed_path, write_synthetic_recording
+from unittest import mock
+
+import numpy as np
+
+from pyMEA import (
+    detect_peak_neg,
+    disable_result_cache,
+    enable_result_cache,
+    read_MEA,
+    read_MEA_npz,
+)
+from pyMEA.domain.model.HedPath import HedPath
+from pyMEA.domain.model.MEA import MEA
+from pyMEA.domain.service.gradient.Gradients import Gradients
+from pyMEA.infrastructure.result_cache import DiskResultCache
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("キャッシュがあるのに再計算した")
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.hed = write_synthetic_recording(self._tmp.name, seconds=2)
+        self.cache = enable_result_cache(os.path.join(self._tmp.name, "cache"))
+
+    def tearDown(self):
+        disable_result_cache()
+        self._tmp.cleanup()
+
+    def test_同じ記録に同じフィルタをかけると再計算しない(self):
+        expected = read_MEA(self.hed, 0, 2, 450).data.highpass(1).bandpass(1, 1000)
+        self.assertEqual(2, len(self.cache))
+
+        with mock.patch("pyMEA.domain.model.MEA.zero_phase_butter", _fail):
+            actual = read_MEA(self.hed, 0, 2, 450).data.highpass(1).bandpass(1, 1000)
+        np.testing.assert_array_equal(expected.array.voltages, actual.array.voltages)
+        self.assertFalse(actual.array.voltages.flags.writeable)
+        self.assertEqual(expected.lineage, actual.lineage)
+
+    def test_パラメータや区間が違えば別の結果になる(self):
+        mea = read_MEA(self.hed, 0, 2, 450).data
+        mea.highpass(1)
+        mea.highpass(2)
+        mea.from_slice(0, 5000).highpass(1)
+        read_MEA(self.hed, 0, 1, 450).data.highpass(1)
+        self.assertEqual(4, len(self.cache))
+        self.assertNotEqual(mea.highpass(1).lineage, mea.highpass(2).lineage)
+
+    def test_元ファイルを書き換えると使わない(self):
+        read_MEA(self.hed, 0, 2, 450).data.common_median_reference()
+        bio = self.hed.replace(".hed", "0001.bio")
+        future = time.time() + 10
+        os.utime(bio, (future, future))
+        read_MEA(self.hed, 0, 2, 450).data.common_median_reference()
+        self.assertEqual(2, len(self.cache))
+
+    def test_ピーク検出の結果を再利用する(self):
+        data = read_MEA(self.hed, 0, 2, 450).data.highpass(1)
+        expected = detect_peak_neg(data, threshold=2)
+        with mock.patch("pyMEA.domain.service.peak_detection.find_peaks", _fail):
+            data = read_MEA(self.hed, 0, 2, 450).data.highpass(1)
+            actual = detect_peak_neg(data, threshold=2)
+        for ch in range(1, 65):
+            np.testing.assert_array_equal(expected[ch], actual[ch])
+
+    def test_npzの読込結果も由来を持つ(self):
+        path = os.path.join(self._tmp.name, "a.npz")
+        read_MEA(self.hed, 0, 2, 450).save_npz(path)
+        data = read_MEA_npz(path).data
+        self.assertIsNotNone(data.lineage)
+        data.highpass(1)
+        with mock.patch("pyMEA.domain.model.MEA.zero_phase_butter", _fail):
+            read_MEA_npz(path).data.highpass(1)
+
+    def test_由来のないMEAはキャッシュしない(self):
+        array = np.random.default_rng(0).normal(size=(65, 1000)).astype(np.float32)
+        mea = MEA(HedPath("synthetic.hed"), 0, 0.1, 10000, 2000, array)
+        self.assertIsNone(mea.lineage)
+        mea.highpass(1)
+        self.assertEqual(0, len(self.cache))
+
+    def test_由来はコンストラクタで渡せる(self):
+        array = np.zeros((65, 100), dtype=np.float32)
+        mea = MEA(HedPath("synthetic.hed"), 0, 0.01, 10000, 2000, array, ("source", "x"))
+        self.assertEqual(("source", "x"), mea.lineage)
+        self.assertEqual(("source", "x", ("slice", 0, 10)), mea.from_slice(0, 10).lineage)
+        self.assertIsNone(mea.with_lineage(None).lineage)
+
+    def test_勾配のフィット結果を再利用する(self):
+        mea = read_MEA(fixture_hed_path("cardio"), 1, 2, 450).data
+        peak_index = detect_peak_neg(mea)
+        expected = Gradients(mea, peak_index, 450)
+        self.assertGreater(len(expected), 0)  # フィットを実行してキャッシュに保存する
+        with mock.patch("pyMEA.domain.service.gradient.Solver.curve_fit", _fail):
+            actual = Gradients(mea, peak_index, 450)
+            np.testing.assert_array_equal(expected.r2s, actual.r2s)
+        for e, a in zip(expected.calc_velocity(), actual.calc_velocity()):
+            np.testing.assert_array_equal(e, a)
+
+
+class DiskResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = DiskResultCache(self._tmp.name, max_bytes=2500)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_memmapで読み出す(self):
+        self.cache.save("a", {"x": np.arange(10), "y": np.empty(0)})
+        loaded = self.cache.load("a")
+        self.assertIsInstance(loaded["x"], np.memmap)
+        np.testing.assert_array_equal(np.arange(10), loaded["x"])
+        self.assertEqual(0, len(loaded["y"]))
+        self.assertIsNone(self.cache.load("b"))
+
+    def test_上限を超えたら最後に使ってから長いものから消す(self):
+        for i, key in enumerate(("a", "b")):
+            self.cache.save(key, {"x": np.zeros(100)})
+            os.utime(os.path.join(self._tmp.name, key), (i, i))
+        self.cache.load("a")  # a を使ったので b のほうが古くなる
+        self.cache.save("c", {"x": np.zeros(100)})
+
+        self.assertIsNotNone(self.cache.load("a"))
+        self.assertIsNone(self.cache.load("b"))
+        self.assertIsNotNone(self.cache.load("c"))
+        self.assertLessEqual(self.cache.nbytes, 2500)
+
+    def test_上限内なら保存のたびに走査しない(self):
+        self.cache.save("a", {"x": np.zeros(10)})
+        with mock.patch.object(DiskResultCache, "_entries", side_effect=_fail):
+            self.cache.save("b", {"x": np.zeros(10)})
+        self.assertEqual(2, len(self.cache))
+
+    def test_読み出し中に消されても読み出した配列を返す(self):
+        self.cache.save("a", {"x": np.arange(10)})
+        with mock.patch("os.utime", side_effect=FileNotFoundError):
+            loaded = self.cache.load("a")
+        np.testing.assert_array_equal(np.arange(10), loaded["x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
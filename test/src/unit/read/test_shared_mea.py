@@ -0,0 +1,69 @@
+"""共有メモリ上の MEA (MEA.to_shared / MEA.from_shared) の回帰テスト。"""
+
+import pickle
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from test.fixtures import write_synthetic_recording
+
+import numpy as np
+
+from pyMEA import read_MEA
+from pyMEA.domain.model.MEA import MEA
+
+
+def _channel_sum(handle, ch):
+    # ワーカープロセスで共有メモリの MEA を開き、1電極ぶんを集計する
+    mea = MEA.from_shared(handle)
+    return float(np.sum(mea[ch], dtype=np.float64))
+
+
+class SharedMEATest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.hed = write_synthetic_recording(self._tmp.name, seconds=1)
+        self.mea = read_MEA(self.hed, 0, 1, 450).data
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_コピーせずに同じ電位を参照する(self):
+        with self.mea.to_shared() as shared:
+            actual = MEA.from_shared(shared.handle)
+            np.testing.assert_array_equal(self.mea.array.voltages, actual.array.voltages)
+            np.testing.assert_array_equal(self.mea.times, actual.times)
+            self.assertFalse(actual.array.voltages.flags.writeable)
+            self.assertEqual(self.mea.lineage, actual.lineage)
+            self.assertEqual(self.mea.shape, actual.shape)
+            self.assertEqual(self.mea.array.voltages.nbytes, shared.nbytes)
+
+    def test_ハンドルは電位データを含まない(self):
+        with self.mea.to_shared() as shared:
+            self.assertLess(len(pickle.dumps(shared.handle)), 2048)
+
+    def test_ワーカープロセスで開ける(self):
+        expected = [float(np.sum(self.mea[ch], dtype=np.float64)) for ch in range(1, 65)]
+        with self.mea.to_shared() as shared:
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                actual = list(pool.map(_channel_sum, repeat(shared.handle), range(1, 65)))
+        self.assertEqual(expected, actual)
+
+    def test_電極を絞ったMEAも共有できる(self):
+        subset = read_MEA(self.hed, 0, 1, 450, chs=[3, 10, 64]).data
+        with subset.to_shared() as shared:
+            actual = MEA.from_shared(shared.handle)
+            self.assertEqual([3, 10, 64], actual.channels)
+            np.testing.assert_array_equal(subset[10], actual[10])
+
+    def test_削除後は開けない(self):
+        shared = self.mea.to_shared()
+        handle = shared.handle
+        shared.unlink()
+        shared.close()
+        with self.assertRaises(FileNotFoundError):
+            MEA.from_shared(handle)
+
+
+if __name__ == "__main__":
+    unittest.main()
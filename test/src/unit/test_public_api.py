@@ -25,6 +25,15 @@ from pyMEA import (
 EXPECTED_ALL = {
     "read_MEA",
     "read_MEA_npz",
+    "open_MEA",
+    "iter_MEA",
+    "Recording",
+    "convert_directory",
+    "filter_to_npy",
+    "enable_result_cache",
+    "disable_result_cache",
+    "CausalFilter",
+    "FilterPipeline",
     "FilterType",
     "MEA",
     "MutableMEA",
@@ -57,6 +66,8 @@ def test_read_MEA_signature():
         "distance",
         "power_noise_freq",
         "steps",
+        "chs",
+        "quantized",
     ]
     defaults = {
         name: p.default
@@ -70,6 +81,8 @@ def test_read_MEA_signature():
         "distance": 3000,
         "power_noise_freq": 50,
         "steps": 10,
+        "chs": None,
+        "quantized": False,
     }
 
 
@@ -122,7 +135,11 @@ def test_mea_contract():
         "SAMPLING_RATE",
         "GAIN",
         "array",
+        "lineage",
     }
+    # 由来は省略可能で、等価比較には使わない
+    assert fields["lineage"].default is None
+    assert not fields["lineage"].compare
     assert param_names(MEA.from_slice) == ["self", "start_frame", "end_frame"]
     assert param_names(MEA.from_beat_cycles) == [
         "self",